@@ -1,20 +1,44 @@
+import hashlib
 import logging
+import threading
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, List, Tuple
 import uuid
 import numpy as np
 from fastapi import HTTPException
+from sqlalchemy import String, cast, func, literal_column
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.orm import Session
-from app.models import AttendanceSession, ClassUsers, User
-from app.utils.encoding import bytes_to_encoding
+from app.face.detectors.tiling import TileLayout, parse_tile_layout
+from app.face.gallery.snapshot import load_snapshot, write_snapshot
+from app.models import AttendanceSession, Classes, ClassUsers, Room, User
 from app.config import get_settings
-from app.services import FaceService, LivePresenceTracker, PresenceTracker
+from app.database import SessionLocal
+from app.services import FaceService, InferenceExecutor, LivePresenceTracker, PresenceTracker, ScopedFaceService
+from app.services.camera_manager import (
+    CameraManager,
+    CameraSource,
+    create_camera_manager,
+    parse_camera_options,
+    parse_camera_source,
+)
+from app.services.inference_executor import create_inference_executor
+from app.services.stream_hub import StreamHub
 
 # Global instances (initialized on startup)
 face_service: FaceService = None
 presence_tracker: PresenceTracker = None
 live_presence_tracker: LivePresenceTracker = None
 user_names: Dict[uuid.UUID, str] = {}
+inference_executor: InferenceExecutor = None
+stream_hub: StreamHub = None
+camera_manager: CameraManager = None
+
+# Fingerprint of the encodings face_service's gallery was last loaded from
+# (kept in step by add_user_to_services/remove_user_from_services).
+_gallery_fingerprint: str | None = None
+_gallery_lock = threading.Lock()
+_executor_lock = threading.Lock()
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -24,62 +48,161 @@ EXPECTED_EMBEDDING_BYTES = 512 * 4  # 2048 bytes for 512-dim float32
 
 @dataclass
 class RecognitionRuntime:
-    face_service: FaceService
+    face_service: FaceService | ScopedFaceService
     presence_tracker: PresenceTracker
     live_presence_tracker: LivePresenceTracker
     user_names: Dict[uuid.UUID, str]
 
 
-def _load_runtime_users(db: Session, class_id: uuid.UUID | None = None) -> list[User]:
-    """Load users eligible for recognition for a given runtime scope."""
-
-    if class_id is not None:
-        rows = (
-            db.query(ClassUsers)
-            .filter(ClassUsers.class_id == class_id, ClassUsers.photo_encoding != None)
-            .all()
-        )
-        user_ids = [row.id for row in rows]
-        return db.query(User).filter(User.id.in_(user_ids), User.photo_encoding != None).all()
-
+def _load_runtime_users(db: Session) -> list[User]:
+    """Load the global roster eligible for recognition."""
     return db.query(User).filter(User.photo_encoding != None, User.active == True).all()
 
 
-def build_runtime(db: Session, class_id: uuid.UUID | None = None) -> RecognitionRuntime:
-    """Build an isolated recognition runtime from the database."""
-    users = _load_runtime_users(db, class_id=class_id)
-
-    known_encodings = {}
-    runtime_user_names: Dict[uuid.UUID, str] = {}
+def _encoding_fingerprint(db: Session) -> str:
+    """
+    Digest of the global roster's ids and encodings, used to detect a stale
+    gallery and to validate the on-disk snapshot. It changes when any
+    encoding does, not only when users are added or removed.
+
+    On PostgreSQL it is one aggregate computed in the database, so only a
+    single digest leaves it; other dialects (local SQLite) hash the blobs
+    client-side.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        entry = cast(User.id, String) + ":" + func.md5(User.photo_encoding)
+        digest = func.md5(func.string_agg(entry, aggregate_order_by(literal_column("';'"), User.id)))
+        return (
+            db.query(func.coalesce(digest, ""))
+            .filter(User.photo_encoding != None, User.active == True)
+            .scalar()
+        )
 
-    for user in users:
+    rows = (
+        db.query(User.id, User.photo_encoding)
+        .filter(User.photo_encoding != None, User.active == True)
+        .order_by(User.id)
+        .all()
+    )
+    fingerprint = hashlib.sha256()
+    for user_id, encoding in rows:
+        fingerprint.update(f"{user_id}:{hashlib.md5(bytes(encoding)).hexdigest()};".encode("ascii"))
+    return fingerprint.hexdigest()
+
+
+def _load_global_gallery(db: Session, fingerprint: str) -> Tuple[List[uuid.UUID], np.ndarray]:
+    """
+    Return the global roster's ids and (N, 512) encoding matrix.
+
+    With GALLERY_SNAPSHOT_DIR set, the matrix is memory-mapped from the on-disk
+    snapshot, which is rebuilt from the database first if it is stale.
+    """
+    directory = settings.GALLERY_SNAPSHOT_DIR
+    if directory:
+        snapshot = load_snapshot(directory)
+        if snapshot is not None and snapshot.fingerprint == fingerprint:
+            return [uuid.UUID(user_id) for user_id in snapshot.ids], snapshot.matrix
+
+    ids, blobs = [], []
+    for user in _load_runtime_users(db):
         if len(user.photo_encoding) != EXPECTED_EMBEDDING_BYTES:
-            logger.warning(
-                "User %s %s (id=%s) has a stale encoding (%d bytes) — "
-                "re-enroll to enable recognition.",
-                user.first_name, user.last_name, user.id, len(user.photo_encoding)
-            )
+            _warn_stale_encoding(user)
             continue
-        known_encodings[user.id] = bytes_to_encoding(user.photo_encoding)
-        runtime_user_names[user.id] = f"{user.first_name} {user.last_name}".strip()
+        ids.append(user.id)
+        blobs.append(bytes(user.photo_encoding))
+    matrix = np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(ids), EXPECTED_EMBEDDING_BYTES // 4)
+
+    if directory:
+        write_snapshot(directory, ids, matrix, fingerprint)
+        logger.info("Wrote gallery snapshot with %d encodings to %s", len(ids), directory)
+        snapshot = load_snapshot(directory)
+        if snapshot is not None:
+            return ids, snapshot.matrix
+    return ids, matrix
+
+
+def _load_user_names(db: Session) -> Dict[uuid.UUID, str]:
+    """Display names of the global roster, without pulling encoding blobs."""
+    rows = (
+        db.query(User.id, User.first_name, User.last_name)
+        .filter(User.photo_encoding != None, User.active == True)
+        .all()
+    )
+    return {row.id: f"{row.first_name} {row.last_name}".strip() for row in rows}
 
+
+def _warn_stale_encoding(user: User):
+    logger.warning(
+        "User %s %s (id=%s) has a stale encoding (%d bytes) — "
+        "re-enroll to enable recognition.",
+        user.first_name, user.last_name, user.id, len(user.photo_encoding)
+    )
+
+
+def _shared_face_service(db: Session) -> FaceService:
+    """
+    Return the process-wide FaceService holding the global gallery, reloading
+    the gallery in place if the roster's encodings changed in the database
+    (e.g. enrollments handled by another worker).
+    """
+    global face_service, _gallery_fingerprint
+
+    fingerprint = _encoding_fingerprint(db)
+    with _gallery_lock:
+        if face_service is None:
+            face_service = FaceService()
+        if fingerprint != _gallery_fingerprint:
+            user_ids, matrix = _load_global_gallery(db, fingerprint)
+            face_service.load_gallery(user_ids, matrix)
+            names = _load_user_names(db)
+            user_names.clear()
+            user_names.update({user_id: names.get(user_id, "") for user_id in user_ids})
+            _gallery_fingerprint = fingerprint
+        return face_service
+
+
+def _new_runtime(face_service: FaceService | ScopedFaceService, user_names: Dict[uuid.UUID, str]) -> RecognitionRuntime:
     return RecognitionRuntime(
-        face_service=FaceService(known_encodings),
+        face_service=face_service,
         presence_tracker=PresenceTracker(),
         live_presence_tracker=LivePresenceTracker(ttl_seconds=settings.LIVE_PRESENCE_TTL_SECONDS),
-        user_names=runtime_user_names,
+        user_names=user_names,
+    )
+
+
+def build_runtime(db: Session, class_id: uuid.UUID | None = None) -> RecognitionRuntime:
+    """
+    Build a recognition runtime with its own presence trackers.
+
+    Every runtime matches against the one shared global gallery; a class
+    runtime only restricts matching to the class roster, so it costs one
+    query on class_users and no encodings are copied. The shared gallery
+    holds active users only, so inactive class members are neither
+    recognised nor listed in a class runtime's user_names.
+    """
+    shared = _shared_face_service(db)
+    if class_id is None:
+        return _new_runtime(shared, user_names)
+
+    rows = (
+        db.query(ClassUsers.id, ClassUsers.first_name, ClassUsers.last_name)
+        .join(User, User.id == ClassUsers.id)
+        .filter(ClassUsers.class_id == class_id, ClassUsers.photo_encoding != None, User.active == True)
+        .all()
+    )
+    return _new_runtime(
+        shared.scoped(row.id for row in rows),
+        {row.id: f"{row.first_name} {row.last_name}".strip() for row in rows},
     )
 
 
-def init_services(db: Session, class_id: uuid.UUID | None = None):
+def init_services(db: Session):
     """Initialize the process-global recognition services from the database."""
-    global face_service, presence_tracker, live_presence_tracker, user_names
+    global presence_tracker, live_presence_tracker
 
-    runtime = build_runtime(db, class_id=class_id)
-    face_service = runtime.face_service
+    runtime = build_runtime(db)
     presence_tracker = runtime.presence_tracker
     live_presence_tracker = runtime.live_presence_tracker
-    user_names = dict(runtime.user_names)
 
 
 def build_runtime_for_session(session_id: uuid.UUID, db: Session) -> RecognitionRuntime:
@@ -107,11 +230,116 @@ def get_live_presence_tracker() -> LivePresenceTracker:
     return live_presence_tracker
 
 
+def get_inference_executor() -> InferenceExecutor:
+    """Process-wide executor shared by every stream, created on first use."""
+    global inference_executor
+    with _executor_lock:
+        if inference_executor is None:
+            inference_executor = create_inference_executor(settings)
+        return inference_executor
+
+
+def get_stream_hub() -> StreamHub:
+    """Process-wide hub sharing one camera pipeline between the viewers of a stream."""
+    global stream_hub
+    if stream_hub is None:
+        stream_hub = StreamHub()
+    return stream_hub
+
+
+def get_camera_manager() -> CameraManager:
+    """Process-wide manager sharing each capture source between the streams that use it."""
+    global camera_manager
+    if camera_manager is None:
+        camera_manager = create_camera_manager(settings)
+    return camera_manager
+
+
+def resolve_camera_connection(
+    db: Session,
+    room_id: uuid.UUID | None = None,
+    session_id: uuid.UUID | None = None,
+    class_id: uuid.UUID | None = None,
+) -> str:
+    """
+    Camera of a stream: the camera_connection of the requested room, or else
+    of the session's or class's room.
+
+    A room asked for by id must have a camera; streams selected by session or
+    class fall back to CAMERA_DEFAULT_SOURCE.
+    """
+    if room_id is None and session_id is not None:
+        sess = db.query(AttendanceSession).filter(AttendanceSession.id == session_id).one_or_none()
+        if sess is None:
+            raise HTTPException(status_code=404, detail="Attendance session not found")
+        room = db.query(Room).filter(Room.id == sess.room_id).one_or_none()
+    elif room_id is None and class_id is not None:
+        room = db.query(Room).join(Classes, Classes.room_id == Room.id).filter(Classes.id == class_id).one_or_none()
+    elif room_id is not None:
+        room = db.query(Room).filter(Room.id == room_id).one_or_none()
+        if room is None:
+            raise HTTPException(status_code=404, detail="Room not found")
+        if parse_camera_source(room.camera_connection) is None:
+            raise HTTPException(status_code=404, detail="Room has no camera configured")
+        return room.camera_connection
+    else:
+        room = None
+
+    if room is not None and parse_camera_source(room.camera_connection) is not None:
+        return room.camera_connection
+    return settings.CAMERA_DEFAULT_SOURCE
+
+
+def resolve_camera_source(
+    db: Session,
+    room_id: uuid.UUID | None = None,
+    session_id: uuid.UUID | None = None,
+    class_id: uuid.UUID | None = None,
+) -> CameraSource:
+    """Capture source of a stream (see resolve_camera_connection)."""
+    return parse_camera_source(resolve_camera_connection(db, room_id, session_id, class_id))
+
+
+def resolve_detection_tiling(connection: str) -> TileLayout | None:
+    """
+    Detection tile layout of a camera: its "tiles" option (e.g.
+    "rtsp://cam/stream#tiles=3x2", see parse_camera_options), else
+    DETECTION_TILES. Raises ValueError for a malformed layout.
+    """
+    spec = parse_camera_options(connection).get("tiles", settings.DETECTION_TILES)
+    return parse_tile_layout(spec, overlap=settings.DETECTION_TILE_OVERLAP)
+
+
+def shutdown_services():
+    """Stop background workers started by the recognition services."""
+    global inference_executor
+    if inference_executor is not None:
+        inference_executor.shutdown(wait=False)
+        inference_executor = None
+
+
+def _sync_gallery_fingerprint():
+    """
+    Record the database's fingerprint after an enrollment made through this
+    worker (already applied to the gallery), so it does not trigger a reload.
+    """
+    global _gallery_fingerprint
+    if _gallery_fingerprint is None:
+        return
+    db = SessionLocal()
+    try:
+        _gallery_fingerprint = _encoding_fingerprint(db)
+    finally:
+        db.close()
+
+
 def add_user_to_services(user_id: uuid.UUID, name: str, encoding: np.ndarray):
     """Add a new user to running services."""
     global face_service, user_names
     if face_service:
-        face_service.add_encoding(user_id, encoding)
+        with _gallery_lock:
+            face_service.add_encoding(user_id, encoding)
+            _sync_gallery_fingerprint()
     else:
         logger.warning(
             "face_service is None — enrollment for user_id=%s saved to DB "
@@ -125,6 +353,8 @@ def remove_user_from_services(user_id: uuid.UUID):
     """Remove a user from running services."""
     global face_service, user_names
     if face_service:
-        face_service.remove_encoding(user_id)
+        with _gallery_lock:
+            face_service.remove_encoding(user_id)
+            _sync_gallery_fingerprint()
     if user_id in user_names:
         del user_names[user_id]
@@ -3,6 +3,7 @@ from app.api.routes import (
     attendance,
     attendance_record,
     buidling,
+    cameras,
     campus,
     classes,
     courses,
@@ -24,6 +25,7 @@ api_router.include_router(attendance.router, prefix="/attendance", tags=["attend
 api_router.include_router(campus.router, prefix="/campuses", tags=["campuses"])
 api_router.include_router(buidling.router, prefix="/buildings", tags=["buildings"])
 api_router.include_router(room.router, prefix="/rooms", tags=["rooms"])
+api_router.include_router(cameras.router, prefix="/cameras", tags=["cameras"])
 api_router.include_router(term.router, prefix="/terms", tags=["terms"])
 api_router.include_router(courses.router, prefix="/courses", tags=["courses"])
 api_router.include_router(classes.router, prefix="/classes", tags=["classes"])
@@ -0,0 +1,32 @@
+from fastapi import APIRouter
+
+from app.api.deps import get_camera_manager, get_face_service, get_stream_hub
+from app.services.camera_manager import redact_source
+
+router = APIRouter()
+
+
+@router.get("/")
+def get_cameras():
+    """
+    Health of the open capture sources and the streams running on them.
+
+    Cameras report their achieved capture FPS, dropped frames and the age of
+    their newest frame; streams report their preview/recognition rates, the
+    recognition rate their share of RECOGNITION_FPS_BUDGET allows, and viewers.
+    "recognition" counts the faces detected and embedded by this worker and
+    those the quality gate kept from being embedded.
+    """
+    manager = get_camera_manager()
+    streams = [
+        {"source": redact_source(source), "scope": scope, "scope_id": scope_id, **stats}
+        for (source, scope, scope_id), stats in get_stream_hub().stats().items()
+    ]
+    face_service = get_face_service()
+    return {
+        "max_active": manager.max_active,
+        "recognition_fps_budget": manager.recognition_fps_budget,
+        "cameras": manager.health(),
+        "streams": streams,
+        "recognition": face_service.pipeline_stats() if face_service is not None else None,
+    }
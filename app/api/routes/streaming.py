@@ -1,31 +1,127 @@
-import asyncio
-import base64
 import logging
-from datetime import datetime, timezone
 import uuid
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from uvicorn.protocols.utils import ClientDisconnected
 
 from app.api.deps import (
     build_runtime,
     build_runtime_for_session,
+    get_camera_manager,
+    get_inference_executor,
     get_live_presence_tracker,
+    get_stream_hub,
+    resolve_camera_connection,
+    resolve_detection_tiling,
 )
+from app.config import get_settings
 from app.database import SessionLocal
-from app.services import CameraService
+from app.face.detectors.tiling import TileLayout
+from app.face.tracking import create_face_tracker
+from app.services.camera_manager import CameraSource, parse_camera_source
+from app.services.motion_gate import create_motion_gate
+from app.services.replay_capture import is_replay_source
 from app.services.session_attendance_service import record_attendance_from_recognition
-from app.utils.drawing import draw_face_boxes
+from app.services.stream_hub import StreamFrame, StreamPipeline
+from app.services.stream_scheduler import StreamScheduler
+from app.utils.stream_protocol import check_image_mode, check_protocol
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def _stream_key(source: CameraSource, session_id: uuid.UUID | None, class_id: uuid.UUID | None) -> tuple:
+    """Viewers share a pipeline when they watch the same source with the same recognition scope."""
+    if session_id is not None:
+        return source, "session", session_id
+    if class_id is not None:
+        return source, "class", class_id
+    return source, "global", None
+
+
+def _resolve_camera(
+    room_id: uuid.UUID | None,
+    session_id: uuid.UUID | None,
+    class_id: uuid.UUID | None,
+) -> tuple[CameraSource, TileLayout | None]:
+    """
+    Capture source and detection tile layout of a stream's camera. Raises
+    ValueError for an unusable replay source or a malformed tile layout.
+    Blocking (queries the database): the route runs it on a worker thread.
+    """
+    db = SessionLocal()
+    try:
+        connection = resolve_camera_connection(db, room_id=room_id, session_id=session_id, class_id=class_id)
+    finally:
+        db.close()
+    source = parse_camera_source(connection)
+    is_replay_source(source)  # rejects local paths that are neither videos nor image directories
+    return source, resolve_detection_tiling(connection)
+
+
+def _create_pipeline(
+    key: tuple,
+    source: CameraSource,
+    session_id: uuid.UUID | None,
+    class_id: uuid.UUID | None,
+    tiling: TileLayout | None = None,
+) -> StreamPipeline:
+    """
+    Build the recognition runtime for a new pipeline; its DB session lives as
+    long as the pipeline. Blocking (queries the database): the hub runs it on
+    a worker thread.
+    """
+    db = SessionLocal()
+
+    def record_attendance(event):
+        record_attendance_from_recognition(
+            db=db,
+            user_id=event.user_id,
+            confidence=event.confidence,
+            timestamp=event.timestamp,
+            explicit_session_id=session_id,
+        )
+
+    try:
+        if session_id is not None:
+            runtime = build_runtime_for_session(session_id, db)
+        elif class_id is not None:
+            runtime = build_runtime(db, class_id=class_id)
+        else:
+            runtime = build_runtime(db)
+
+        scheduler = StreamScheduler.from_settings(settings)
+        return StreamPipeline(
+            key=key,
+            camera=get_camera_manager().lease(source, scheduler),
+            runtime=runtime,
+            executor=get_inference_executor(),
+            scheduler=scheduler,
+            record_attendance=record_attendance,
+            shared_live_presence_tracker=get_live_presence_tracker(),
+            stats_interval=settings.STREAM_STATS_INTERVAL_SECONDS,
+            on_stop=[db.close],
+            motion_gate=create_motion_gate(settings),
+            thumbnail_fps=settings.STREAM_THUMBNAIL_FPS,
+            thumbnail_width=settings.STREAM_THUMBNAIL_WIDTH,
+            tracker=create_face_tracker(settings),
+            tiling=tiling,
+        )
+    except Exception:
+        db.close()
+        raise
 
 
 @router.websocket("/ws/stream")
 async def video_stream(
     websocket: WebSocket,
+    room_id: uuid.UUID | None = None,
     session_id: uuid.UUID | None = None,
     class_id: uuid.UUID | None = None,
+    protocol: str = "json",
+    image: str = "full",
 ):
     """
     WebSocket endpoint for real-time video streaming with face recognition.
@@ -33,114 +129,93 @@ async def video_stream(
     Sends two types of messages:
     1. Frame messages with annotated video and face detections
     2. Attendance update messages when a user is confirmed present
+    3. Stats messages with the stream's achieved preview/recognition rates
+
+    Preview frames go out at STREAM_PREVIEW_FPS; recognition runs in the
+    background at up to STREAM_RECOGNITION_FPS and frames in between are
+    drawn with the latest results.
+
+    The camera is the room's camera_connection, for room_id or else the
+    session's or class's room (CAMERA_DEFAULT_SOURCE when it has none).
+    Viewers of the same camera and scope share one pipeline (capture,
+    recognition, encoding); a viewer that cannot keep up skips frames
+    without slowing the others. A "#tiles=COLUMNSxROWS" suffix on the
+    camera_connection (or DETECTION_TILES) detects its frames tile by tile.
+
+    With protocol=binary each frame is instead a compact "faces" text message
+    plus a binary message carrying the raw JPEG (see app.utils.stream_protocol).
+
+    image=thumbnail or image=none replaces the annotated frames with face
+    metadata sent when the results change (plus, for thumbnail, a small
+    plain JPEG every 1 / STREAM_THUMBNAIL_FPS seconds); the client draws
+    the overlay and the server skips drawing and encoding full frames
+    while nobody watches them.
     """
     await websocket.accept()
 
-    db = SessionLocal()
-
     try:
-        if session_id is not None:
-            runtime = build_runtime_for_session(session_id, db)
-        elif class_id is not None:
-            runtime = build_runtime(db, class_id=class_id)
-        else:
-            runtime = build_runtime(db)
-
-        face_service = runtime.face_service
-        if face_service is None:
-            await websocket.send_json({
-                "type": "error",
-                "message": "Face recognition service is not initialized",
-            })
-            return
-
-        presence_tracker = runtime.presence_tracker
-        live_presence_tracker = runtime.live_presence_tracker
-        user_names = runtime.user_names
-        shared_live_presence_tracker = get_live_presence_tracker()
-
-        camera = CameraService()
-        if not camera.start():
-            await websocket.send_json({
-                "type": "error",
-                "message": "Failed to start camera",
-            })
-            return
-
-        try:
-            async for frame in camera.get_frames():
-                try:
-                    faces = face_service.process_frame(frame)
-
-                    for face in faces:
-                        user_id = face.get("user_id")
-                        if user_id:
-                            face["name"] = user_names.get(user_id, f"ID: {user_id}")
-                            face["status"] = presence_tracker.get_status_for_display(user_id)
-                        else:
-                            face["name"] = None
-                            face["status"] = "unknown"
-
-                    seen_user_ids = [face["user_id"] for face in faces if face.get("user_id") is not None]
-                    if live_presence_tracker is not None:
-                        live_presence_tracker.mark_seen(seen_user_ids)
-                    if (
-                        shared_live_presence_tracker is not None
-                        and shared_live_presence_tracker is not live_presence_tracker
-                    ):
-                        shared_live_presence_tracker.mark_seen(seen_user_ids)
-
-                    events = presence_tracker.update(faces)
-
-                    for event in events:
-                        record_attendance_from_recognition(
-                            db=db,
-                            user_id=event.user_id,
-                            confidence=event.confidence,
-                            timestamp=event.timestamp,
-                            explicit_session_id=session_id,
-                        )
-
-                        await websocket.send_json({
-                            "type": "attendance_update",
-                            "user_id": str(event.user_id),
-                            "name": user_names.get(event.user_id, f"ID: {event.user_id}"),
-                            "confidence": event.confidence,
-                            "timestamp": event.timestamp.isoformat(),
-                        })
-
-                    annotated_frame = draw_face_boxes(frame, faces, user_names)
-                    jpeg_bytes = camera.encode_frame(annotated_frame)
-                    frame_b64 = base64.b64encode(jpeg_bytes).decode("utf-8")
-
-                    # Convert UUID objects to strings for JSON serialization
-                    serializable_faces = [
-                        {**face, "user_id": str(face["user_id"]) if face.get("user_id") else None}
-                        for face in faces
-                    ]
-
-                    await websocket.send_json({
-                        "type": "frame",
-                        "image": frame_b64,
-                        "faces": serializable_faces,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                    })
-
-                except asyncio.CancelledError:
-                    logger.info("Camera stream cancelled")
-                    break
-                except ClientDisconnected:
-                    logger.info("Client disconnected during frame send")
-                    break
-                except Exception as e:
-                    logger.error("Frame processing error: %s", str(e), exc_info=True)
-                    continue
-
-        except WebSocketDisconnect:
-            logger.info("WebSocket disconnected")
-        finally:
-            camera.stop()
-            logger.info("Camera stopped")
+        protocol = check_protocol(protocol)
+        image = check_image_mode(image)
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "message": str(e)})
+        return
 
+    try:
+        source, tiling = await run_in_threadpool(_resolve_camera, room_id, session_id, class_id)
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "message": e.detail})
+        return
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "message": str(e)})
+        return
+
+    key = _stream_key(source, session_id, class_id)
+    hub = get_stream_hub()
+    subscriber = await hub.subscribe(
+        key,
+        lambda: _create_pipeline(key, source, session_id, class_id, tiling),
+        max_frames=settings.STREAM_VIEWER_QUEUE_FRAMES,
+        image=image,
+    )
+    if subscriber is None:
+        await websocket.send_json({
+            "type": "error",
+            "message": "Failed to start camera",
+        })
+        return
+
+    faces_version = None
+    try:
+        while True:
+            message = await subscriber.get()
+            if message is None:
+                break
+            if not isinstance(message, StreamFrame):
+                if message.get("type") == "stats":
+                    message = {**message, "viewer_dropped_frames": subscriber.dropped_frames}
+                await websocket.send_json(message)
+            elif image == "full":
+                if message.jpeg is None:
+                    continue  # published before this viewer joined
+                if protocol == "binary":
+                    metadata, frame_bytes = message.binary_messages
+                    await websocket.send_text(metadata)
+                    await websocket.send_bytes(frame_bytes)
+                else:
+                    await websocket.send_json(message.json_message)
+            else:
+                if message.faces_version != faces_version:
+                    faces_version = message.faces_version
+                    if protocol == "binary":
+                        await websocket.send_text(message.binary_faces_message)
+                    else:
+                        await websocket.send_json(message.json_faces_message)
+                if image == "thumbnail" and message.thumbnail is not None:
+                    if protocol == "binary":
+                        await websocket.send_bytes(message.binary_thumbnail_message)
+                    else:
+                        await websocket.send_json(message.json_thumbnail_message)
+    except (WebSocketDisconnect, ClientDisconnected):
+        logger.info("WebSocket disconnected")
     finally:
-        db.close()
+        await hub.unsubscribe(key, subscriber)
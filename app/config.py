@@ -12,7 +12,23 @@ class Settings(BaseSettings):
     DETECTOR_BACKEND: str = "retinaface"  # "retinaface" or "yunet"
     YUNET_MODEL_PATH: str = "models/face_detection_yunet_2023mar.onnx"
     ARCFACE_MODEL_PACK: str = "buffalo_l"
+    DETECTION_MAX_SIDE: int = 0  # detect on a copy of the frame this long at most; 0 = full resolution
+    DETECTION_TILES: str = ""  # "COLUMNSxROWS" tiled detection for cameras without a #tiles= option
+    DETECTION_TILE_OVERLAP: float = 0.2  # tile overlap, as a fraction of a grid cell
     SIMILARITY_THRESHOLD: float = 0.35
+    MATCH_ONE_TO_ONE: bool = False  # stop two faces in one frame from matching the same user
+    GALLERY_INDEX: str = "dense"  # "dense" (exact) or "ivf" (approximate, for large galleries)
+    GALLERY_IVF_NLIST: int = 0    # IVF cells; 0 picks ~sqrt(gallery size)
+    GALLERY_IVF_NPROBE: int = 8   # IVF cells scanned per query
+    GALLERY_PRECISION: str = "float32"  # "float32", "float16" or "int8" (per-row scaled)
+
+    # ONNX Runtime (per model session)
+    ONNX_PROVIDERS: str = "CPUExecutionProvider"  # comma-separated, highest priority first
+    ONNX_INTRA_OP_THREADS: int = 0   # 0 lets ONNX Runtime decide; also caps OpenCV threads for YuNet
+    ONNX_INTER_OP_THREADS: int = 0
+    ONNX_EXECUTION_MODE: str = "sequential"  # "sequential" or "parallel"
+    ONNX_GRAPH_OPTIMIZATION_LEVEL: str = "all"  # "disable", "basic", "extended" or "all"
+    ONNX_OPTIMIZED_MODEL_DIR: str = ""  # cache optimized graphs here when set
 
     # Entry/Exit tracking
     ENTRY_FRAME_THRESHOLD: int = 5   # Frames to confirm entry (~0.5s at 10 FPS)
@@ -21,12 +37,46 @@ class Settings(BaseSettings):
 
     # Video processing
     PROCESSING_FPS: int = 10
+    STREAM_PREVIEW_FPS: float = 0      # frames sent to viewers; 0 = PROCESSING_FPS
+    STREAM_RECOGNITION_FPS: float = 0  # frames sent for recognition; 0 = PROCESSING_FPS
+    STREAM_STATS_INTERVAL_SECONDS: float = 5.0  # "stats" messages on /ws/stream; 0 disables
+    STREAM_THUMBNAIL_FPS: float = 1.0  # thumbnails per second for ?image=thumbnail viewers; 0 = none
+    STREAM_THUMBNAIL_WIDTH: int = 320  # thumbnail width in pixels
+    STREAM_VIEWER_QUEUE_FRAMES: int = 2  # frames queued per viewer before its oldest is dropped
+    CAMERA_THREADED_CAPTURE: bool = True  # read frames on a capture thread, not the event loop
+    CAMERA_DEFAULT_SOURCE: str = "0"  # source for streams whose room has no camera_connection
+    CAMERA_MAX_ACTIVE: int = 0        # capture sources open at once; 0 = unlimited
+    RECOGNITION_FPS_BUDGET: float = 0  # recognitions/s shared by all streams; 0 = unlimited
+    MOTION_GATE_ENABLED: bool = False  # skip recognition of frames where nothing changed
+    MOTION_GATE_PIXEL_THRESHOLD: int = 25  # grey-level change that counts a pixel as changed
+    MOTION_GATE_REGION_FRACTION: float = 0.02  # changed share of any region that counts as motion
+    MOTION_GATE_REFRESH_SECONDS: float = 5.0  # forced recognition interval on a static scene; 0 disables
+    FACE_QUALITY_ENABLED: bool = False  # skip embedding faces too small, blurred, turned or uncertain
+    FACE_QUALITY_MIN_SCORE: float = 0.5  # detector score floor
+    FACE_QUALITY_MIN_EYE_DISTANCE: float = 12.0  # inter-ocular distance in pixels
+    FACE_QUALITY_MAX_ROLL: float = 30.0  # degrees
+    FACE_QUALITY_MAX_YAW: float = 45.0  # degrees, estimated from the landmarks
+    FACE_QUALITY_MIN_SHARPNESS: float = 30.0  # Laplacian variance of the face crop
+    FACE_TRACKING_ENABLED: bool = False  # track faces across recognitions, reuse their embeddings
+    TRACK_MATCH_IOU: float = 0.3  # minimum IoU between a predicted track box and a detection
+    TRACK_MAX_MISSED: int = 5  # recognitions a track survives without a detection
+    TRACK_REEMBED_INTERVAL: int = 10  # re-embed a tracked face at least every N recognitions
+    TRACK_REEMBED_IOU: float = 0.5  # ...or when its box overlaps the last embedded box less than this
+    CAMERA_REPLAY_PACING: str = "realtime"  # file/directory/synthetic sources: realtime or fast
+    CAMERA_REPLAY_FPS: float = 0  # replay rate; 0 = the video's own rate
+    CAMERA_REPLAY_LOOP: bool = False  # restart replay sources at their end
+    INFERENCE_EXECUTOR: str = "thread"  # "thread" or "process" pool for per-frame inference
+    INFERENCE_WORKERS: int = 2
+    INFERENCE_MAX_PENDING: int = 0  # frames in flight across all streams; 0 = 2 x workers
     FRAME_WIDTH: int = 640
     FRAME_HEIGHT: int = 480
     JPEG_QUALITY: int = 70
 
     # Storage
     UPLOAD_DIR: str = "uploads"
+    # Memory-mapped global gallery snapshot shared by all workers; empty disables it.
+    # Keep it outside UPLOAD_DIR, which is served publicly under /uploads.
+    GALLERY_SNAPSHOT_DIR: str = "data/gallery"
 
     model_config = ConfigDict(env_file=os.path.join(os.path.dirname(__file__), "../.env"))
 
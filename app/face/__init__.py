@@ -1,20 +1,58 @@
-from .pipeline import FaceRecognitionPipeline
-from .detectors.factory import create_detector
+from .pipeline import FaceRecognitionPipeline, FrameFaces
+from .detectors.factory import create_detector, detector_cache_key
+from .detectors.tiling import TileLayout, parse_tile_layout
 from .embedders.arcface import ArcFaceEmbedder
+from .quality import FaceQualityGate, create_quality_gate
+from .registry import ModelRegistry, get_model_registry
+from .tracking import FaceTracker, Track, create_face_tracker
+from .runtime_options import OnnxRuntimeOptions
 
 
-def create_pipeline(settings) -> FaceRecognitionPipeline:
+def create_pipeline(settings, registry: ModelRegistry = None) -> FaceRecognitionPipeline:
     """
     Build a FaceRecognitionPipeline from app settings.
 
+    Detector and embedder instances are drawn from the process-wide model
+    registry, so every pipeline built with the same settings shares the same
+    warm ONNX sessions; only the first call pays the model load.
+
     settings must expose:
       - DETECTOR_BACKEND: str
       - ARCFACE_MODEL_PACK: str
       - YUNET_MODEL_PATH: str  (only needed when DETECTOR_BACKEND == "yunet")
+      - ONNX_* runtime options (see OnnxRuntimeOptions.from_settings)
+      - DETECTION_MAX_SIDE: int  (0 detects at full frame resolution)
+      - FACE_QUALITY_* options (see create_quality_gate)
     """
-    detector = create_detector(settings.DETECTOR_BACKEND, settings)
-    embedder = ArcFaceEmbedder(model_pack=settings.ARCFACE_MODEL_PACK)
-    return FaceRecognitionPipeline(detector=detector, embedder=embedder)
+    registry = registry or get_model_registry()
+    options = OnnxRuntimeOptions.from_settings(settings)
+    detector = registry.get_or_create(
+        detector_cache_key(settings.DETECTOR_BACKEND, settings),
+        lambda: create_detector(settings.DETECTOR_BACKEND, settings),
+    )
+    embedder = registry.get_or_create(
+        ("embedder", "arcface", settings.ARCFACE_MODEL_PACK, options),
+        lambda: ArcFaceEmbedder(model_pack=settings.ARCFACE_MODEL_PACK, options=options),
+    )
+    return FaceRecognitionPipeline(
+        detector=detector,
+        embedder=embedder,
+        quality_gate=create_quality_gate(settings),
+        detection_max_side=settings.DETECTION_MAX_SIDE,
+    )
 
 
-__all__ = ["FaceRecognitionPipeline", "create_pipeline"]
+__all__ = [
+    "FaceQualityGate",
+    "FaceRecognitionPipeline",
+    "FaceTracker",
+    "FrameFaces",
+    "ModelRegistry",
+    "OnnxRuntimeOptions",
+    "TileLayout",
+    "Track",
+    "create_face_tracker",
+    "create_pipeline",
+    "get_model_registry",
+    "parse_tile_layout",
+]
@@ -1,4 +1,5 @@
 from .base import DetectedFace, FaceDetector
 from .factory import create_detector
+from .tiling import TileLayout, detect_tiled, parse_tile_layout
 
-__all__ = ["DetectedFace", "FaceDetector", "create_detector"]
+__all__ = ["DetectedFace", "FaceDetector", "TileLayout", "create_detector", "detect_tiled", "parse_tile_layout"]
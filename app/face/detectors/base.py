@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import List
+from typing import List, Sequence
 
 import numpy as np
 
@@ -11,8 +11,31 @@ class DetectedFace:
     landmarks_5pt: np.ndarray  # (5, 2) float32: [re, le, nose, rm, lm]
     score: float
 
+    def scaled(self, factor: float) -> "DetectedFace":
+        """The same face in an image resized by factor (e.g. back to the frame it was detected on a copy of)."""
+        x, y = self.bbox["x"] * factor, self.bbox["y"] * factor
+        return DetectedFace(
+            bbox={
+                "x": int(round(x)),
+                "y": int(round(y)),
+                "width": int(round(x + self.bbox["width"] * factor)) - int(round(x)),
+                "height": int(round(y + self.bbox["height"] * factor)) - int(round(y)),
+            },
+            landmarks_5pt=(self.landmarks_5pt * factor).astype(np.float32),
+            score=self.score,
+        )
+
 
 class FaceDetector(ABC):
     @abstractmethod
     def detect(self, image: np.ndarray) -> List[DetectedFace]:
         """Detect faces in a BGR image. Returns list of DetectedFace."""
+
+    def detect_batch(self, images: Sequence[np.ndarray]) -> List[List[DetectedFace]]:
+        """
+        Detect faces in several BGR images (of any sizes), one list per image.
+
+        Backends that can run several images through one inference call
+        override this; the default detects them one by one.
+        """
+        return [self.detect(image) for image in images]
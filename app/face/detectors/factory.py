@@ -1,4 +1,30 @@
+from typing import Hashable, Tuple
+
 from .base import FaceDetector
+from ..runtime_options import OnnxRuntimeOptions
+
+
+# RetinaFace's input when detection runs at full frame resolution.
+DEFAULT_DET_SIZE = 640
+
+
+def retinaface_det_size(settings) -> Tuple[int, int]:
+    """
+    RetinaFace input size: DETECTION_MAX_SIDE rounded up to the network's
+    stride of 32, so frames downscaled for detection are not upscaled again.
+    """
+    side = settings.DETECTION_MAX_SIDE or DEFAULT_DET_SIZE
+    side = -(-side // 32) * 32
+    return side, side
+
+
+def detector_cache_key(name: str, settings) -> Hashable:
+    """Return the model-registry key identifying the weights and runtime a detector loads."""
+    name = name.lower()
+    options = OnnxRuntimeOptions.from_settings(settings)
+    if name == "yunet":
+        return ("detector", name, settings.YUNET_MODEL_PATH, options.intra_op_threads)
+    return ("detector", name, settings.ARCFACE_MODEL_PACK, options, retinaface_det_size(settings))
 
 
 def create_detector(name: str, settings) -> FaceDetector:
@@ -13,12 +39,17 @@ def create_detector(name: str, settings) -> FaceDetector:
         FaceDetector instance
     """
     name = name.lower()
+    options = OnnxRuntimeOptions.from_settings(settings)
     if name == "retinaface":
         from .retinaface import RetinaFaceDetector
-        return RetinaFaceDetector(model_pack=settings.ARCFACE_MODEL_PACK)
+        return RetinaFaceDetector(
+            model_pack=settings.ARCFACE_MODEL_PACK,
+            det_size=retinaface_det_size(settings),
+            options=options,
+        )
     elif name == "yunet":
         from .yunet import YuNetDetector
-        return YuNetDetector(model_path=settings.YUNET_MODEL_PATH)
+        return YuNetDetector(model_path=settings.YUNET_MODEL_PATH, num_threads=options.intra_op_threads)
     else:
         raise ValueError(
             f"Unknown detector backend: '{name}'. "
@@ -1,25 +1,105 @@
-from typing import List
+from typing import Dict, List, Sequence, Tuple
 
+import cv2
 import numpy as np
 
 from .base import DetectedFace, FaceDetector
+from ..model_pack import get_model_pack
+from ..runtime_options import OnnxRuntimeOptions
 
 
 class RetinaFaceDetector(FaceDetector):
-    def __init__(self, model_pack: str = "buffalo_l", det_size: tuple = (640, 640)):
-        from insightface.app import FaceAnalysis
-
-        self._app = FaceAnalysis(name=model_pack, allowed_modules=["detection"])
-        self._app.prepare(ctx_id=-1, det_size=det_size)
+    def __init__(
+        self,
+        model_pack: str = "buffalo_l",
+        det_size: tuple = (640, 640),
+        options: OnnxRuntimeOptions = OnnxRuntimeOptions(),
+    ):
+        self._det = get_model_pack(model_pack, options=options).require("detection")
+        self._det_size = tuple(det_size)
+        self._anchor_centers: Dict[Tuple[int, int, int], np.ndarray] = {}
 
     def detect(self, image: np.ndarray) -> List[DetectedFace]:
-        faces = self._app.get(image)
+        bboxes, kpss = self._det.detect(image, input_size=self._det_size, max_num=0, metric="default")
+        return self._faces(bboxes, kpss)
+
+    @staticmethod
+    def _faces(bboxes: np.ndarray, kpss: np.ndarray) -> List[DetectedFace]:
         results = []
-        for f in faces:
-            x1, y1, x2, y2 = [int(v) for v in f.bbox]
+        for i in range(bboxes.shape[0]):
+            x1, y1, x2, y2 = [int(v) for v in bboxes[i, :4]]
             results.append(DetectedFace(
                 bbox={"x": x1, "y": y1, "width": x2 - x1, "height": y2 - y1},
-                landmarks_5pt=f.kps.astype(np.float32),
-                score=float(f.det_score),
+                landmarks_5pt=kpss[i].astype(np.float32),
+                score=float(bboxes[i, 4]),
             ))
         return results
+
+    @property
+    def batchable(self) -> bool:
+        """Whether the ONNX graph takes a variable batch (and predicts landmarks)."""
+        batch = self._det.session.get_inputs()[0].shape[0]
+        return self._det.use_kps and not (isinstance(batch, int) and batch == 1)
+
+    def detect_batch(self, images: Sequence[np.ndarray]) -> List[List[DetectedFace]]:
+        """
+        Detect faces in all images with one ONNX call on a stacked tensor.
+
+        Each image is letterboxed into det_size as InsightFace's detect does,
+        and each image's slice of the outputs is decoded and NMS-filtered on
+        its own. Models with a fixed batch of 1 fall back to one call each.
+        """
+        if len(images) < 2 or not self.batchable:
+            return super().detect_batch(images)
+        width, height = self._det_size
+        canvases, scales = [], []
+        for image in images:
+            scale = min(width / image.shape[1], height / image.shape[0])
+            new_width, new_height = int(image.shape[1] * scale), int(image.shape[0] * scale)
+            canvas = np.zeros((height, width, 3), dtype=np.uint8)
+            canvas[:new_height, :new_width] = cv2.resize(image, (new_width, new_height))
+            canvases.append(canvas)
+            scales.append(new_height / image.shape[0])
+
+        model = self._det
+        blob = cv2.dnn.blobFromImages(
+            canvases, 1.0 / model.input_std, (width, height), (model.input_mean,) * 3, swapRB=True
+        )
+        outputs = model.session.run(model.output_names, {model.input_name: blob})
+        # Outputs are (N, K, C) or, as exported in the model packs, (N * K, C).
+        outputs = [out.reshape(len(images), -1, out.shape[-1]) for out in outputs]
+        return [self._decode([out[b] for out in outputs], scales[b]) for b in range(len(images))]
+
+    def _centers(self, height: int, width: int, stride: int) -> np.ndarray:
+        key = (height, width, stride)
+        if key not in self._anchor_centers:
+            centers = np.stack(np.mgrid[:height, :width][::-1], axis=-1).astype(np.float32)
+            centers = (centers * stride).reshape(-1, 2)
+            if self._det._num_anchors > 1:
+                centers = np.repeat(centers, self._det._num_anchors, axis=0)
+            self._anchor_centers[key] = centers
+        return self._anchor_centers[key]
+
+    def _decode(self, outputs: List[np.ndarray], scale: float) -> List[DetectedFace]:
+        """Boxes and landmarks of one image from its per-stride score, box and keypoint maps."""
+        model = self._det
+        width, height = self._det_size
+        levels = model.fmc
+        scores, boxes, landmarks = [], [], []
+        for level, stride in enumerate(model._feat_stride_fpn):
+            centers = self._centers(height // stride, width // stride, stride)
+            positive = np.where(outputs[level][:, 0] >= model.det_thresh)[0]
+            distances = outputs[level + levels][positive] * stride
+            keypoints = outputs[level + 2 * levels][positive] * stride
+            anchors = centers[positive]
+            scores.append(outputs[level][positive, 0])
+            boxes.append(np.hstack([anchors - distances[:, :2], anchors + distances[:, 2:4]]))
+            landmarks.append((np.tile(anchors, 5) + keypoints).reshape(-1, 5, 2))
+        scores = np.concatenate(scores)
+        if not scores.size:
+            return []
+        order = scores.argsort()[::-1]
+        detections = np.hstack([np.concatenate(boxes) / scale, scores[:, None]]).astype(np.float32)[order]
+        landmarks = (np.concatenate(landmarks) / scale)[order]
+        keep = model.nms(detections)
+        return self._faces(detections[keep], landmarks[keep])
@@ -0,0 +1,143 @@
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .base import DetectedFace, FaceDetector
+from ..preprocessing.resize import resize_for_detection
+
+_LAYOUT = re.compile(r"^\s*(\d+)\s*x\s*(\d+)\s*$", re.IGNORECASE)
+
+# Boxes within this many pixels of a tile edge inside the frame are taken to be cut by it.
+EDGE_MARGIN = 2
+
+
+@dataclass(frozen=True)
+class TileLayout:
+    """
+    Grid of overlapping tiles that a frame is detected in.
+
+    Each of the columns x rows cells is grown by overlap (a fraction of the
+    cell) on every inner side, so a face cut by one tile's edge is whole in
+    its neighbour as long as it is smaller than the overlap. With
+    full_frame, the (downscaled) whole frame is detected too, for the near
+    faces that are larger than the overlap.
+    """
+    columns: int
+    rows: int
+    overlap: float = 0.2
+    full_frame: bool = True
+
+    def tiles(self, width: int, height: int) -> List[Tuple[int, int, int, int]]:
+        """(x1, y1, x2, y2) of every tile of a width x height frame, row by row."""
+        cell_w, cell_h = width / self.columns, height / self.rows
+        pad_w, pad_h = cell_w * self.overlap, cell_h * self.overlap
+        tiles = []
+        for row in range(self.rows):
+            for column in range(self.columns):
+                tiles.append((
+                    max(0, int(column * cell_w - pad_w)),
+                    max(0, int(row * cell_h - pad_h)),
+                    min(width, int(round((column + 1) * cell_w + pad_w))),
+                    min(height, int(round((row + 1) * cell_h + pad_h))),
+                ))
+        return tiles
+
+
+def parse_tile_layout(spec: Optional[str], overlap: float = 0.2, full_frame: bool = True) -> Optional[TileLayout]:
+    """
+    TileLayout from "COLUMNSxROWS" (e.g. "3x2"); None for an empty spec or "1x1",
+    which is single-pass detection.
+    """
+    if spec is None or not spec.strip():
+        return None
+    match = _LAYOUT.match(spec)
+    if match is None or not all(int(n) > 0 for n in match.groups()):
+        raise ValueError(
+            f"Unknown tile layout: '{spec}'. "
+            "Valid options are 'COLUMNSxROWS' (e.g. '3x2') or empty for single-pass detection."
+        )
+    columns, rows = int(match.group(1)), int(match.group(2))
+    if columns == rows == 1:
+        return None
+    return TileLayout(columns=columns, rows=rows, overlap=overlap, full_frame=full_frame)
+
+
+def _cut(face: DetectedFace, tile: Tuple[int, int, int, int], width: int, height: int) -> bool:
+    """Whether face touches an edge of its tile that lies inside the frame."""
+    x1, y1, x2, y2 = tile
+    bx1, by1 = face.bbox["x"], face.bbox["y"]
+    bx2, by2 = bx1 + face.bbox["width"], by1 + face.bbox["height"]
+    return (
+        (x1 > 0 and bx1 <= x1 + EDGE_MARGIN)
+        or (y1 > 0 and by1 <= y1 + EDGE_MARGIN)
+        or (x2 < width and bx2 >= x2 - EDGE_MARGIN)
+        or (y2 < height and by2 >= y2 - EDGE_MARGIN)
+    )
+
+
+def merge_detections(faces: List[DetectedFace], cut: List[bool], overlap_threshold: float = 0.5) -> List[DetectedFace]:
+    """
+    Cross-tile non-maximum suppression.
+
+    Whole faces are preferred over faces cut by a tile edge, then higher
+    scores. A face is suppressed when a kept face covers overlap_threshold
+    of the smaller of the two boxes; overlap relative to the smaller box,
+    rather than IoU, also catches the partial box of a face cut by a tile.
+    """
+    if not faces:
+        return []
+    boxes = np.array(
+        [[f.bbox["x"], f.bbox["y"], f.bbox["x"] + f.bbox["width"], f.bbox["y"] + f.bbox["height"]] for f in faces],
+        dtype=np.float32,
+    )
+    areas = np.prod(np.maximum(boxes[:, 2:] - boxes[:, :2], 0), axis=1)
+    order = sorted(range(len(faces)), key=lambda i: (cut[i], -faces[i].score))
+    kept: List[int] = []
+    for i in order:
+        if kept:
+            top_left = np.maximum(boxes[kept, :2], boxes[i, :2])
+            bottom_right = np.minimum(boxes[kept, 2:], boxes[i, 2:])
+            intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=1)
+            smaller = np.maximum(np.minimum(areas[kept], areas[i]), 1e-9)
+            if np.any(intersection / smaller >= overlap_threshold):
+                continue
+        kept.append(i)
+    return [faces[i] for i in sorted(kept, key=lambda i: -faces[i].score)]
+
+
+def detect_tiled(
+    detector: FaceDetector,
+    image: np.ndarray,
+    layout: TileLayout,
+    max_side: int = 0,
+) -> List[DetectedFace]:
+    """
+    Detect faces in every tile of image (and, with layout.full_frame, in the
+    whole image downscaled to max_side) in one detect_batch call, map them
+    to image coordinates and merge them with merge_detections.
+    """
+    height, width = image.shape[:2]
+    tiles = layout.tiles(width, height)
+    images = [image[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+    scale = 1.0
+    if layout.full_frame:
+        resized, scale = resize_for_detection(image, max_side)
+        images.append(resized)
+    batch = detector.detect_batch(images)
+
+    faces: List[DetectedFace] = []
+    cut: List[bool] = []
+    for tile, detected in zip(tiles, batch):
+        x1, y1 = tile[:2]
+        for face in detected:
+            bbox = dict(face.bbox, x=face.bbox["x"] + x1, y=face.bbox["y"] + y1)
+            shifted = DetectedFace(bbox=bbox, landmarks_5pt=face.landmarks_5pt + np.float32([x1, y1]), score=face.score)
+            faces.append(shifted)
+            cut.append(_cut(shifted, tile, width, height))
+    if layout.full_frame:
+        for face in batch[-1]:
+            faces.append(face.scaled(scale) if scale != 1.0 else face)
+            cut.append(False)
+    return merge_detections(faces, cut)
@@ -1,3 +1,4 @@
+import threading
 from typing import List
 
 import cv2
@@ -7,11 +8,17 @@ from .base import DetectedFace, FaceDetector
 
 
 class YuNetDetector(FaceDetector):
-    def __init__(self, model_path: str, score_threshold: float = 0.6):
+    def __init__(self, model_path: str, score_threshold: float = 0.6, num_threads: int = 0):
+        # cv2.dnn has no per-network thread setting; OpenCV's pool is process-wide.
+        if num_threads > 0:
+            cv2.setNumThreads(num_threads)
         self._model_path = model_path
         self._score_threshold = score_threshold
         self._det = None
         self._input_size = (0, 0)
+        # The cv2 detector carries its input size as mutable state, so a
+        # registry-shared instance must serialise calls across streams.
+        self._lock = threading.Lock()
 
     def _ensure_detector(self, w: int, h: int):
         if self._det is None:
@@ -25,8 +32,9 @@ class YuNetDetector(FaceDetector):
 
     def detect(self, image: np.ndarray) -> List[DetectedFace]:
         h, w = image.shape[:2]
-        self._ensure_detector(w, h)
-        _, raw = self._det.detect(image)
+        with self._lock:
+            self._ensure_detector(w, h)
+            _, raw = self._det.detect(image)
         if raw is None:
             return []
 
@@ -1,4 +1,4 @@
-from .base import FaceEmbedder
+from .base import EMBEDDING_DIM, FaceEmbedder, normalize_rows
 from .arcface import ArcFaceEmbedder
 
-__all__ = ["FaceEmbedder", "ArcFaceEmbedder"]
+__all__ = ["EMBEDDING_DIM", "FaceEmbedder", "ArcFaceEmbedder", "normalize_rows"]
@@ -1,35 +1,22 @@
-from typing import List
+from typing import Sequence
 
 import numpy as np
 
-from .base import FaceEmbedder
+from .base import EMBEDDING_DIM, FaceEmbedder, normalize_rows
+from ..model_pack import get_model_pack
+from ..runtime_options import OnnxRuntimeOptions
 
 
 class ArcFaceEmbedder(FaceEmbedder):
-    def __init__(self, model_pack: str = "buffalo_l"):
-        from insightface.app import FaceAnalysis
-
-        app = FaceAnalysis(name=model_pack, allowed_modules=["detection", "recognition"])
-        app.prepare(ctx_id=-1)
-        self._rec = app.models["recognition"]
+    def __init__(self, model_pack: str = "buffalo_l", options: OnnxRuntimeOptions = OnnxRuntimeOptions()):
+        self._rec = get_model_pack(model_pack, options=options).require("recognition")
 
     def embed(self, aligned_face: np.ndarray) -> np.ndarray:
-        vecs = self._rec.get_feat([aligned_face])  # (1, 512) float32
-        vec = vecs[0].astype(np.float32)
-        norm = np.linalg.norm(vec)
-        if norm > 0:
-            vec = vec / norm
-        return vec
+        return self.embed_batch([aligned_face])[0]
 
-    def embed_batch(self, aligned_faces: List[np.ndarray]) -> List[np.ndarray]:
-        if not aligned_faces:
-            return []
-        vecs = self._rec.get_feat(aligned_faces)  # (N, 512) float32
-        results = []
-        for vec in vecs:
-            vec = vec.astype(np.float32)
-            norm = np.linalg.norm(vec)
-            if norm > 0:
-                vec = vec / norm
-            results.append(vec)
-        return results
+    def embed_batch(self, aligned_faces: Sequence[np.ndarray]) -> np.ndarray:
+        if len(aligned_faces) == 0:
+            return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        # get_feat only batches lists; list() of an (N, 112, 112, 3) array is N views, not copies.
+        vecs = self._rec.get_feat(list(aligned_faces))  # (N, 512) float32
+        return normalize_rows(vecs)
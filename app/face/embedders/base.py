@@ -1,14 +1,31 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Sequence
 
 import numpy as np
 
+EMBEDDING_DIM = 512
+
+
+def normalize_rows(vecs: np.ndarray) -> np.ndarray:
+    """L2-normalise each row of a float32 matrix in place; zero rows are left as-is."""
+    vecs = np.asarray(vecs, dtype=np.float32)
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    np.divide(vecs, norms, out=vecs, where=norms > 0)
+    return vecs
+
 
 class FaceEmbedder(ABC):
     @abstractmethod
     def embed(self, aligned_face: np.ndarray) -> np.ndarray:
         """Return a normalised 512-dim float32 embedding for a single 112x112 BGR face."""
 
-    def embed_batch(self, aligned_faces: List[np.ndarray]) -> List[np.ndarray]:
-        """Embed a list of faces. Default: loop over embed(). Override for batching."""
-        return [self.embed(f) for f in aligned_faces]
+    def embed_batch(self, aligned_faces: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        Embed a batch of faces (list or (N, 112, 112, 3) array).
+
+        Returns a single (N, 512) float32 matrix of normalised rows.
+        Default: loop over embed(). Override for batching.
+        """
+        if len(aligned_faces) == 0:
+            return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        return np.stack([self.embed(f) for f in aligned_faces]).astype(np.float32, copy=False)
@@ -0,0 +1,8 @@
+from .base import GalleryIndex
+from .dense import DenseIndex
+from .ivf import IVFIndex
+from .store import EmbeddingGallery
+from .scope import GalleryScope
+from .factory import create_gallery_index
+
+__all__ = ["GalleryIndex", "DenseIndex", "IVFIndex", "EmbeddingGallery", "GalleryScope", "create_gallery_index"]
@@ -0,0 +1,51 @@
+import copy
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class GalleryIndex(ABC):
+    """
+    Nearest-neighbour index over the gallery of known face embeddings.
+
+    Rows are positions in the gallery matrix; callers map them back to user
+    ids. search() pads queries with fewer than k hits with row -1 and score
+    -inf, and skips rows whose mask entry is False (tombstones, out-of-scope
+    identities).
+
+    Matrices may be float32, float16 or int8; int8 rows come with (M,) scales
+    (see quantization.py) and every method takes them alongside the matrix.
+    """
+
+    @abstractmethod
+    def build(self, matrix: Optional[np.ndarray], scales: Optional[np.ndarray] = None):
+        """(Re)build the index over an (M, D) matrix of unit-vector embeddings."""
+
+    def add(self, rows: np.ndarray, matrix: np.ndarray, scales: Optional[np.ndarray] = None):
+        """
+        Index newly appended rows of matrix (which may have been reallocated).
+        Default: rebuild; incremental indexes override this.
+        """
+        self.build(matrix, scales)
+
+    def compact(self, mapping: np.ndarray, matrix: Optional[np.ndarray], scales: Optional[np.ndarray] = None):
+        """
+        Follow a gallery compaction: mapping[old_row] is the new row, or -1 if dropped.
+        Default: rebuild; indexes that can remap in place override this.
+        """
+        self.build(matrix, scales)
+
+    def snapshot(self) -> "GalleryIndex":
+        """
+        Read-only copy of the index as it is now, to search without holding
+        the gallery's lock. Indexes must replace, never modify, the arrays a
+        snapshot shares with them; the default shallow copy relies on that.
+        """
+        return copy.copy(self)
+
+    @abstractmethod
+    def search(
+        self, queries: np.ndarray, k: int, mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (N, k) cosine scores sorted best-first and the matching (N, k) rows."""
@@ -0,0 +1,27 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .base import GalleryIndex
+from ..matching import top_k_similarities
+
+
+class DenseIndex(GalleryIndex):
+    """Exact brute-force search: one GEMM of the queries against every gallery row."""
+
+    def __init__(self):
+        self._matrix: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+
+    def build(self, matrix: Optional[np.ndarray], scales: Optional[np.ndarray] = None):
+        self._matrix, self._scales = matrix, scales
+
+    def add(self, rows: np.ndarray, matrix: np.ndarray, scales: Optional[np.ndarray] = None):
+        self._matrix, self._scales = matrix, scales
+
+    def search(
+        self, queries: np.ndarray, k: int, mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if self._matrix is None or len(self._matrix) == 0:
+            return np.empty((len(queries), 0), dtype=np.float32), np.empty((len(queries), 0), dtype=np.int64)
+        return top_k_similarities(queries, self._matrix, k, mask=mask, scales=self._scales)
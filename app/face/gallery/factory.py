@@ -0,0 +1,26 @@
+from .base import GalleryIndex
+
+
+def create_gallery_index(name: str, settings) -> GalleryIndex:
+    """
+    Instantiate a GalleryIndex by name.
+
+    Args:
+        name: "dense" or "ivf"
+        settings: app Settings object
+
+    Returns:
+        GalleryIndex instance
+    """
+    name = name.lower()
+    if name == "dense":
+        from .dense import DenseIndex
+        return DenseIndex()
+    elif name == "ivf":
+        from .ivf import IVFIndex
+        return IVFIndex(nlist=settings.GALLERY_IVF_NLIST, nprobe=settings.GALLERY_IVF_NPROBE)
+    else:
+        raise ValueError(
+            f"Unknown gallery index: '{name}'. "
+            "Valid options are 'dense' and 'ivf'."
+        )
@@ -0,0 +1,160 @@
+import copy
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .base import GalleryIndex
+from .dense import DenseIndex
+from .quantization import dequantize_rows
+from ..embedders.base import normalize_rows
+from ..matching import similarities, top_k_similarities
+
+# Below this many rows clustering is not worth it and search stays exact.
+MIN_TRAIN_ROWS = 1024
+# k-means trains on at most this many sampled rows per centroid.
+TRAIN_ROWS_PER_LIST = 64
+
+
+def spherical_kmeans(data: np.ndarray, nlist: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Cosine k-means; returns (nlist, D) unit-vector centroids."""
+    centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        empty = np.bincount(assign, minlength=nlist) == 0
+        if empty.any():
+            # Re-seed empty clusters on random points so every list stays useful.
+            sums[empty] = data[rng.choice(len(data), int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class IVFIndex(GalleryIndex):
+    """
+    Inverted-file index: a k-means coarse quantizer splits the gallery into
+    nlist cells; a query scans only the nprobe cells whose centroids it is
+    closest to. Each cell keeps its vectors contiguously so a probe is one
+    matrix-vector product with no gathering.
+
+    New rows are assigned to their nearest existing centroid without
+    retraining. Galleries smaller than MIN_TRAIN_ROWS, and searches whose mask
+    selects fewer rows than that, are exact. Cells hold vectors in the
+    gallery's own precision.
+    """
+
+    def __init__(self, nlist: int = 0, nprobe: int = 8, iterations: int = 10, seed: int = 0):
+        self.nlist = nlist  # 0 picks ~sqrt(M) at build time
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.seed = seed
+        self._exact = DenseIndex()
+        self._matrix: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._centroids: np.ndarray = None
+        self._list_vecs: List[np.ndarray] = []
+        self._list_scales: List[Optional[np.ndarray]] = []
+        self._list_rows: List[np.ndarray] = []
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def build(self, matrix: Optional[np.ndarray], scales: Optional[np.ndarray] = None):
+        self._matrix, self._scales = matrix, scales
+        self._centroids = None
+        self._list_vecs, self._list_scales, self._list_rows = [], [], []
+        if matrix is None or len(matrix) < MIN_TRAIN_ROWS:
+            self._exact.build(matrix, scales)
+            return
+        self._exact.build(None)
+
+        rng = np.random.default_rng(self.seed)
+        nlist = self.nlist or max(1, int(math.sqrt(len(matrix))))
+        nlist = min(nlist, len(matrix))
+        train_size = min(len(matrix), nlist * TRAIN_ROWS_PER_LIST)
+        sample = rng.choice(len(matrix), train_size, replace=False)
+        train = dequantize_rows(matrix[sample], None if scales is None else scales[sample])
+        self._centroids = spherical_kmeans(train, nlist, self.iterations, rng)
+
+        assign = np.argmax(similarities(self._centroids, matrix, scales), axis=0)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(nlist + 1))
+        for cell in range(nlist):
+            rows = order[bounds[cell]:bounds[cell + 1]]
+            self._list_rows.append(rows)
+            self._list_vecs.append(np.ascontiguousarray(matrix[rows]))
+            self._list_scales.append(None if scales is None else scales[rows])
+
+    def snapshot(self) -> "IVFIndex":
+        # add() and compact() replace cells in these lists, so the copy gets its own lists.
+        snapshot = copy.copy(self)
+        snapshot._exact = self._exact.snapshot()
+        snapshot._list_vecs = list(self._list_vecs)
+        snapshot._list_scales = list(self._list_scales)
+        snapshot._list_rows = list(self._list_rows)
+        return snapshot
+
+    def add(self, rows: np.ndarray, matrix: np.ndarray, scales: Optional[np.ndarray] = None):
+        self._matrix, self._scales = matrix, scales
+        if not self.trained:
+            if len(matrix) >= MIN_TRAIN_ROWS:
+                self.build(matrix, scales)
+            else:
+                self._exact.add(rows, matrix, scales)
+            return
+
+        vectors = matrix[rows]
+        vector_scales = None if scales is None else scales[rows]
+        cells = np.argmax(similarities(self._centroids, vectors, vector_scales), axis=0)
+        for cell in np.unique(cells):
+            picked = cells == cell
+            self._list_rows[cell] = np.concatenate([self._list_rows[cell], rows[picked]])
+            self._list_vecs[cell] = np.concatenate([self._list_vecs[cell], vectors[picked]])
+            if vector_scales is not None:
+                self._list_scales[cell] = np.concatenate([self._list_scales[cell], vector_scales[picked]])
+
+    def compact(self, mapping: np.ndarray, matrix: Optional[np.ndarray], scales: Optional[np.ndarray] = None):
+        self._matrix, self._scales = matrix, scales
+        if not self.trained:
+            self._exact.build(matrix, scales)
+            return
+        for cell, rows in enumerate(self._list_rows):
+            new_rows = mapping[rows]
+            keep = new_rows >= 0
+            self._list_rows[cell] = new_rows[keep]
+            self._list_vecs[cell] = self._list_vecs[cell][keep]
+            if self._list_scales[cell] is not None:
+                self._list_scales[cell] = self._list_scales[cell][keep]
+
+    def search(
+        self, queries: np.ndarray, k: int, mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.trained:
+            return self._exact.search(queries, k, mask=mask)
+        if mask is not None and np.count_nonzero(mask) < MIN_TRAIN_ROWS:
+            return top_k_similarities(queries, self._matrix, k, mask=mask, scales=self._scales)
+
+        nprobe = min(self.nprobe, len(self._centroids))
+        coarse = queries @ self._centroids.T
+        probes = np.argpartition(-coarse, nprobe - 1, axis=1)[:, :nprobe]
+
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        rows = np.full((len(queries), k), -1, dtype=np.int64)
+        for i, query in enumerate(queries):
+            cand_rows = np.concatenate([self._list_rows[c] for c in probes[i]])
+            if cand_rows.size == 0:
+                continue
+            cand_scores = np.concatenate([
+                similarities(query[None, :], self._list_vecs[c], self._list_scales[c])[0] for c in probes[i]
+            ])
+            if mask is not None:
+                cand_scores[~mask[cand_rows]] = -np.inf
+            top = min(k, cand_scores.size)
+            best = np.argpartition(-cand_scores, top - 1)[:top]
+            best = best[np.argsort(-cand_scores[best], kind="stable")]
+            scores[i, :top] = cand_scores[best]
+            rows[i, :top] = cand_rows[best]
+        rows[np.isneginf(scores)] = -1
+        return scores, rows
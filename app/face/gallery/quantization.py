@@ -0,0 +1,46 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+GALLERY_PRECISIONS = ("float32", "float16", "int8")
+
+# int8 codes span [-INT8_LEVELS, INT8_LEVELS]; -128 is never used so the range is symmetric.
+INT8_LEVELS = 127
+
+
+def gallery_dtype(precision: str) -> np.dtype:
+    """Storage dtype for a GALLERY_PRECISION name."""
+    precision = precision.lower()
+    if precision not in GALLERY_PRECISIONS:
+        raise ValueError(
+            f"Unknown gallery precision: '{precision}'. "
+            "Valid options are 'float32', 'float16' and 'int8'."
+        )
+    return np.dtype(precision)
+
+
+def quantize_rows(vectors: np.ndarray, dtype) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Encode (M, D) float vectors for storage as dtype.
+
+    Returns:
+        (codes, scales): codes in dtype, and for int8 the (M,) float32 per-row
+        scale such that vectors ~= codes * scales[:, None] (None otherwise).
+    """
+    dtype = np.dtype(dtype)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype != np.int8:
+        return vectors.astype(dtype), None
+
+    scales = np.abs(vectors).max(axis=1) / INT8_LEVELS
+    scales[scales == 0] = 1.0  # all-zero rows encode as zeros
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def dequantize_rows(codes: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """Inverse of quantize_rows: (M, D) float32 vectors."""
+    vectors = codes.astype(np.float32)
+    if scales is not None:
+        vectors *= scales[:, None]
+    return vectors
@@ -0,0 +1,39 @@
+import threading
+from typing import Hashable, Iterable, Optional
+
+import numpy as np
+
+from .store import EmbeddingGallery
+
+
+class GalleryScope:
+    """
+    A subset of a shared EmbeddingGallery, e.g. the students of one class.
+
+    The scope keeps ids rather than rows, since rows move when an id is
+    re-enrolled or the gallery compacts. The boolean row mask the matcher
+    needs is rebuilt only when the gallery has changed since the last call.
+    """
+
+    def __init__(self, item_ids: Iterable[Hashable]):
+        self.item_ids = frozenset(item_ids)
+        self._lock = threading.Lock()
+        self._cached_gallery: Optional[EmbeddingGallery] = None
+        self._cached_version = -1
+        self._cached_mask: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self.item_ids
+
+    def mask(self, gallery: EmbeddingGallery) -> np.ndarray:
+        """(rows_used,) bool mask of the gallery's live rows that belong to the scope."""
+        with self._lock:
+            if self._cached_gallery is not gallery or self._cached_version != gallery.version:
+                rows = [gallery.row_of(item_id) for item_id in self.item_ids]
+                mask = np.zeros(len(gallery.alive), dtype=bool)
+                mask[[row for row in rows if row is not None]] = True
+                self._cached_gallery, self._cached_version, self._cached_mask = gallery, gallery.version, mask
+            return self._cached_mask
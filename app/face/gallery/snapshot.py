@@ -0,0 +1,111 @@
+import json
+import os
+import os.path as osp
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+MANIFEST_NAME = "gallery.json"
+
+
+@dataclass
+class GallerySnapshot:
+    """A versioned on-disk copy of the gallery: ids plus a memory-mapped float32 matrix."""
+    ids: List[str]
+    matrix: np.ndarray  # (N, D) float32, read-only memmap when loaded from disk
+    fingerprint: str
+
+
+def _atomic_write(path: str, write):
+    """Write via a temp file in the same directory, then rename over path."""
+    fd, tmp_path = tempfile.mkstemp(dir=osp.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            write(handle)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if osp.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_snapshot(directory: str, ids: List[str], matrix: np.ndarray, fingerprint: str) -> str:
+    """
+    Persist a gallery snapshot and make it current.
+
+    Data files are named after the fingerprint and written before the
+    manifest is swapped in, so concurrent readers (other workers) always see
+    a complete snapshot. Files of superseded snapshots are removed; workers
+    still mapping them keep their pages until they reload.
+
+    Returns:
+        Path of the manifest.
+    """
+    os.makedirs(directory, exist_ok=True)
+    stem = f"gallery-{fingerprint[:16]}"
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+
+    _atomic_write(osp.join(directory, f"{stem}.npy"), lambda f: np.save(f, matrix))
+    _atomic_write(
+        osp.join(directory, f"{stem}.ids.json"),
+        lambda f: f.write(json.dumps([str(i) for i in ids]).encode("utf-8")),
+    )
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "fingerprint": fingerprint,
+        "count": int(matrix.shape[0]),
+        "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        "embeddings": f"{stem}.npy",
+        "ids": f"{stem}.ids.json",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    manifest_path = osp.join(directory, MANIFEST_NAME)
+    _atomic_write(manifest_path, lambda f: f.write(json.dumps(manifest).encode("utf-8")))
+
+    for name in os.listdir(directory):
+        if name.startswith("gallery-") and not name.startswith(stem):
+            try:
+                os.remove(osp.join(directory, name))
+            except OSError:
+                pass
+    return manifest_path
+
+
+def read_manifest(directory: str) -> Optional[dict]:
+    path = osp.join(directory, MANIFEST_NAME)
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        return None
+    return manifest
+
+
+def load_snapshot(directory: str) -> Optional[GallerySnapshot]:
+    """
+    Load the current snapshot with its matrix memory-mapped read-only, so
+    every worker shares the same pages through the OS cache.
+
+    Returns None if there is no usable snapshot (missing, old version, or
+    files that do not agree with the manifest).
+    """
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None
+    try:
+        # numpy cannot memory-map a zero-length array
+        mmap_mode = "r" if manifest.get("count") else None
+        matrix = np.load(osp.join(directory, manifest["embeddings"]), mmap_mode=mmap_mode)
+        with open(osp.join(directory, manifest["ids"]), "r", encoding="utf-8") as handle:
+            ids = json.load(handle)
+    except (OSError, ValueError, KeyError):
+        return None
+    if matrix.dtype != np.float32 or len(ids) != matrix.shape[0] or len(ids) != manifest["count"]:
+        return None
+    return GallerySnapshot(ids=ids, matrix=matrix, fingerprint=manifest["fingerprint"])
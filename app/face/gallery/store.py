@@ -0,0 +1,225 @@
+from typing import Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .quantization import dequantize_rows, quantize_rows
+
+# Compact once tombstones exceed this share of the used rows (and MIN_COMPACT_ROWS).
+COMPACT_RATIO = 0.25
+MIN_COMPACT_ROWS = 64
+
+
+class EmbeddingGallery:
+    """
+    Growable, array-backed store of enrolled embeddings.
+
+    Rows live in one preallocated (capacity, D) matrix that doubles when full,
+    so enrolling is amortised O(1) instead of re-stacking every encoding.
+    Rows are never rewritten: re-enrolling an id tombstones its old row and
+    appends a new one, and removals only flip the row's alive flag. Once
+    tombstones pile up, compact() squeezes them out into fresh buffers and
+    reports the old->new row mapping so indexes can follow. Rows in use are
+    thus never moved in place, and views of matrix taken earlier (e.g. by an
+    index snapshot being searched) stay valid.
+
+    Rows can be stored as float32, float16 or int8 with a float32 scale per
+    row; get() and items() always return float32 vectors.
+    """
+
+    def __init__(self, dim: Optional[int] = None, capacity: int = 16, dtype=np.float32):
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self._capacity = max(1, capacity)
+        self._data: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._alive = np.zeros(self._capacity, dtype=bool)
+        self._row_ids: List[Optional[Hashable]] = []
+        self._rows: Dict[Hashable, int] = {}
+        self._size = 0  # rows in use, tombstones included
+        self.version = 0  # bumped whenever an id may have moved to another row
+        if dim is not None:
+            self._allocate(self._capacity)
+
+    @classmethod
+    def from_matrix(cls, item_ids: Sequence[Hashable], matrix: np.ndarray) -> "EmbeddingGallery":
+        """
+        Wrap an existing (N, D) matrix without copying it, e.g. a read-only
+        memory-mapped snapshot. The first enrollment that outgrows it moves
+        the rows to a private, growable buffer.
+        """
+        if matrix.dtype == np.int8:
+            raise ValueError("An int8 gallery needs per-row scales; build it with extend() instead.")
+        gallery = cls(capacity=max(1, len(item_ids)), dtype=matrix.dtype)
+        gallery.dim = matrix.shape[1]
+        gallery._data = matrix
+        gallery._capacity = len(matrix)
+        gallery._alive = np.ones(max(1, len(matrix)), dtype=bool)
+        gallery._alive[len(matrix):] = False
+        gallery._row_ids = list(item_ids)
+        gallery._rows = {item_id: row for row, item_id in enumerate(gallery._row_ids)}
+        gallery._size = len(matrix)
+        return gallery
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._rows
+
+    @property
+    def matrix(self) -> Optional[np.ndarray]:
+        """(rows_used, D) view of the stored rows, tombstones included."""
+        return None if self._data is None else self._data[:self._size]
+
+    @property
+    def scales(self) -> Optional[np.ndarray]:
+        """(rows_used,) per-row scales of an int8 gallery, else None."""
+        return None if self._scales is None else self._scales[:self._size]
+
+    @property
+    def quantized(self) -> bool:
+        return self.dtype != np.float32
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the embedding storage (capacity included)."""
+        data = 0 if self._data is None else self._data.nbytes
+        return data + (0 if self._scales is None else self._scales.nbytes)
+
+    @property
+    def alive(self) -> np.ndarray:
+        """(rows_used,) bool view: False marks tombstoned rows."""
+        return self._alive[:self._size]
+
+    @property
+    def tombstones(self) -> int:
+        return self._size - len(self._rows)
+
+    def id_at(self, row: int) -> Optional[Hashable]:
+        return self._row_ids[row]
+
+    def row_of(self, item_id: Hashable) -> Optional[int]:
+        return self._rows.get(item_id)
+
+    def _vector(self, row: int) -> np.ndarray:
+        if not self.quantized:
+            return self._data[row]
+        scales = None if self._scales is None else self._scales[row:row + 1]
+        return dequantize_rows(self._data[row:row + 1], scales)[0]
+
+    def get(self, item_id: Hashable) -> Optional[np.ndarray]:
+        row = self._rows.get(item_id)
+        return None if row is None else self._vector(row)
+
+    def row_ids(self) -> List[Optional[Hashable]]:
+        """
+        Id of every row in use (None for tombstones). The list is only appended
+        to or replaced, so a reference taken now still maps today's rows to
+        ids, reading None for those removed since.
+        """
+        return self._row_ids
+
+    def ids(self) -> List[Hashable]:
+        return list(self._rows)
+
+    def items(self) -> Iterator[Tuple[Hashable, np.ndarray]]:
+        for item_id, row in self._rows.items():
+            yield item_id, self._vector(row)
+
+    def _allocate(self, capacity: int):
+        """Swap in zeroed buffers of capacity rows, keeping the rows in use."""
+        data = np.zeros((capacity, self.dim), dtype=self.dtype)
+        alive = np.zeros(capacity, dtype=bool)
+        scales = np.ones(capacity, dtype=np.float32) if self.dtype == np.int8 else None
+        if self._data is not None:
+            data[:self._size] = self._data[:self._size]
+            alive[:self._size] = self._alive[:self._size]
+            if scales is not None:
+                scales[:self._size] = self._scales[:self._size]
+        self._data, self._alive, self._scales, self._capacity = data, alive, scales, capacity
+
+    def _reserve(self, rows_needed: int):
+        if self._data is None:
+            self._allocate(max(self._capacity, rows_needed))
+            return
+        if rows_needed <= len(self._data):
+            return
+        capacity = max(1, len(self._data))
+        while capacity < rows_needed:
+            capacity *= 2
+        self._allocate(capacity)
+
+    def extend(self, item_ids: Sequence[Hashable], vectors: np.ndarray) -> np.ndarray:
+        """Append many embeddings with one copy; returns their rows."""
+        vectors = np.asarray(vectors).reshape(len(item_ids), -1)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+
+        start = self._size
+        self._reserve(start + len(item_ids))
+        codes, scales = quantize_rows(vectors, self.dtype)
+        self._data[start:start + len(item_ids)] = codes
+        if scales is not None:
+            self._scales[start:start + len(item_ids)] = scales
+        self._alive[start:start + len(item_ids)] = True
+        self._size += len(item_ids)
+        for offset, item_id in enumerate(item_ids):
+            self._tombstone(item_id)  # re-enrollment: the old row becomes a tombstone
+            self._rows[item_id] = start + offset
+            self._row_ids.append(item_id)
+        self.version += 1
+        return np.arange(start, self._size)
+
+    def add(self, item_id: Hashable, vector: np.ndarray) -> int:
+        """Enroll (or re-enroll) one embedding; returns its row."""
+        return int(self.extend([item_id], vector[None, :])[0])
+
+    def _tombstone(self, item_id: Hashable) -> bool:
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        self._row_ids[row] = None
+        self.version += 1
+        return True
+
+    def remove(self, item_id: Hashable) -> bool:
+        """Tombstone an embedding in O(1). Returns False if the id was unknown."""
+        return self._tombstone(item_id)
+
+    def needs_compaction(self) -> bool:
+        dead = self.tombstones
+        return dead >= MIN_COMPACT_ROWS and dead > COMPACT_RATIO * self._size
+
+    def compact(self) -> np.ndarray:
+        """
+        Drop tombstoned rows in place.
+
+        Returns:
+            (old_rows,) int array mapping each old row to its new row, or -1 for dropped rows.
+        """
+        keep = np.flatnonzero(self.alive)
+        mapping = np.full(self._size, -1, dtype=np.int64)
+        mapping[keep] = np.arange(len(keep))
+
+        # Fresh buffers rather than moving rows in place: earlier views of the
+        # matrix may still be searched, and a memory-mapped buffer is read-only
+        # (its replacement is only as large as the rows kept).
+        capacity = self._capacity
+        if self._data is not None:
+            capacity = len(self._data) if self._data.flags.writeable else max(1, len(keep))
+            data = np.zeros((capacity, self.dim), dtype=self.dtype)
+            data[:len(keep)] = self._data[keep]
+            self._data = data
+            if self._scales is not None:
+                scales = np.ones(capacity, dtype=np.float32)
+                scales[:len(keep)] = self._scales[keep]
+                self._scales = scales
+        self._capacity = capacity
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._alive[:len(keep)] = True
+        self._row_ids = [self._row_ids[row] for row in keep]
+        self._rows = {item_id: row for row, item_id in enumerate(self._row_ids)}
+        self._size = len(keep)
+        self.version += 1
+        return mapping
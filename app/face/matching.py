@@ -0,0 +1,109 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Masks selecting fewer than this share of the gallery are searched by gathering
+# the selected rows; denser masks are applied after one full GEMM.
+SPARSE_MASK_RATIO = 0.5
+# Reduced-precision galleries are widened to float32 this many rows at a time,
+# so a GEMM never needs a float32 copy of the whole gallery.
+DEQUANTIZE_BLOCK_ROWS = 4096
+
+
+def similarities(queries: np.ndarray, gallery: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    (N, M) dot products of float32 queries with a gallery stored as float32,
+    float16 or per-row-scaled int8 (see app.face.gallery.quantization).
+    """
+    if gallery.dtype == np.float32 and scales is None:
+        return queries @ gallery.T
+
+    out = np.empty((len(queries), len(gallery)), dtype=np.float32)
+    for start in range(0, len(gallery), DEQUANTIZE_BLOCK_ROWS):
+        block = gallery[start:start + DEQUANTIZE_BLOCK_ROWS].astype(np.float32)
+        np.matmul(queries, block.T, out=out[:, start:start + len(block)])
+    if scales is not None:
+        out *= scales
+    return out
+
+
+def top_k_similarities(
+    queries: np.ndarray,
+    gallery: np.ndarray,
+    k: int,
+    mask: Optional[np.ndarray] = None,
+    scales: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cosine top-k of every query row against every gallery row with one GEMM.
+
+    Args:
+        queries: (N, D) unit-vector embeddings (one frame's faces)
+        gallery: (M, D) unit-vector embeddings of known identities
+        k: candidates to keep per query
+        mask: optional (M,) bool array; rows where it is False are never returned
+        scales: (M,) per-row scales of an int8 gallery
+
+    Returns:
+        (scores, rows): (N, k') float32 similarities sorted best-first and the
+        matching (N, k') gallery row indices, where k' = min(k, M). Slots
+        without an eligible row hold score -inf and row -1.
+    """
+    selected = None
+    if mask is not None:
+        subset = np.flatnonzero(mask)
+        if len(subset) < SPARSE_MASK_RATIO * len(gallery):
+            selected, gallery, mask = subset, gallery[subset], None
+            scales = None if scales is None else scales[subset]
+
+    scores_all = similarities(queries, gallery, scales)  # (N, M)
+    if mask is not None:
+        scores_all[:, ~mask] = -np.inf
+    k = min(k, scores_all.shape[1])
+    if k == 0:
+        return np.empty((len(queries), 0), dtype=np.float32), np.empty((len(queries), 0), dtype=np.int64)
+    if k < scores_all.shape[1]:
+        rows = np.argpartition(-scores_all, k - 1, axis=1)[:, :k]
+    else:
+        rows = np.broadcast_to(np.arange(k), scores_all.shape).copy()
+    scores = np.take_along_axis(scores_all, rows, axis=1)
+
+    order = np.argsort(-scores, axis=1, kind="stable")
+    scores, rows = np.take_along_axis(scores, order, axis=1), np.take_along_axis(rows, order, axis=1)
+    if selected is not None:
+        rows = selected[rows]
+    rows[np.isneginf(scores)] = -1
+    return scores, rows
+
+
+def best_matches(scores: np.ndarray, rows: np.ndarray, threshold: float) -> np.ndarray:
+    """Independent best match per query: (N,) gallery row, or -1 below threshold."""
+    if scores.shape[1] == 0:
+        return np.full(scores.shape[0], -1, dtype=np.int64)
+    return np.where(scores[:, 0] >= threshold, rows[:, 0], -1)
+
+
+def assign_one_to_one(scores: np.ndarray, rows: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Greedy one-to-one assignment so no two faces of a frame claim the same identity.
+
+    Candidate (face, identity) pairs at or above threshold are taken in order of
+    descending similarity; a pair is accepted only while both sides are free.
+
+    Returns:
+        (N,) gallery row per query, or -1 when the query stays unassigned.
+    """
+    assigned = np.full(scores.shape[0], -1, dtype=np.int64)
+    query_idx, rank_idx = np.nonzero(scores >= threshold)
+    if query_idx.size == 0:
+        return assigned
+
+    order = np.argsort(-scores[query_idx, rank_idx], kind="stable")
+    taken_rows = set()
+    for q, r in zip(query_idx[order], rank_idx[order]):
+        row = int(rows[q, r])
+        if assigned[q] != -1 or row in taken_rows:
+            continue
+        assigned[q] = row
+        taken_rows.add(row)
+    return assigned
@@ -0,0 +1,134 @@
+import glob
+import os.path as osp
+from typing import List, Optional
+
+from .registry import get_model_registry
+from .runtime_options import OnnxRuntimeOptions
+
+DEFAULT_MODEL_ROOT = "~/.insightface"
+
+
+def _pack_dir(name: str, root: str) -> str:
+    from insightface.utils import ensure_available
+
+    return ensure_available("models", name, root=osp.expanduser(root))
+
+
+def _model_files(model_dir: str) -> List[str]:
+    return sorted(glob.glob(osp.join(model_dir, "*.onnx")))
+
+
+# Tasks of the files shipped in InsightFace's packs (buffalo_*, antelopev2),
+# by file name; None marks their landmark and attribute models.
+KNOWN_MODEL_TASKS = {
+    "det_10g": "detection",
+    "det_2.5g": "detection",
+    "det_500m": "detection",
+    "scrfd_10g_bnkps": "detection",
+    "w600k_r50": "recognition",
+    "w600k_mbf": "recognition",
+    "glintr100": "recognition",
+    "1k3d68": None,
+    "2d106det": None,
+    "genderage": None,
+}
+
+
+def _classify(onnx_file: str) -> Optional[str]:
+    """
+    "detection", "recognition" or None for one ONNX file of a pack.
+
+    Files of the known packs are routed by name (KNOWN_MODEL_TASKS), so
+    they are never read here. Other files are routed like insightface's
+    ModelRouter does, from the graph's inputs and outputs: that parses the
+    whole file (packs store their weights inline), but creates no
+    InferenceSession, so landmark and attribute models are never loaded
+    into onnxruntime.
+    """
+    name = osp.splitext(osp.basename(onnx_file))[0]
+    if name in KNOWN_MODEL_TASKS:
+        return KNOWN_MODEL_TASKS[name]
+    return _classify_graph(onnx_file)
+
+
+def _classify_graph(onnx_file: str) -> Optional[str]:
+    """_classify for a file of unknown name: route it on its graph's signature."""
+    import onnx
+
+    graph = onnx.load(onnx_file, load_external_data=False).graph
+    initializers = {initializer.name for initializer in graph.initializer}
+    inputs = [i for i in graph.input if i.name not in initializers]
+    if len(graph.output) >= 5:
+        return "detection"
+    if len(inputs) != 1:
+        return None
+    dims = inputs[0].type.tensor_type.shape.dim
+    if len(dims) != 4:
+        return None
+    height, width = dims[2].dim_value, dims[3].dim_value
+    if (
+        height == width
+        and height not in (96, 192)  # attribute / landmark models
+        and height >= 112
+        and height % 16 == 0
+    ):
+        return "recognition"
+    return None
+
+
+def _load_model(onnx_file: str, taskname: str, options: OnnxRuntimeOptions):
+    """Build the InsightFace wrapper for an ONNX file _classify assigned to taskname."""
+    from insightface.model_zoo.arcface_onnx import ArcFaceONNX
+    from insightface.model_zoo.retinaface import RetinaFace
+
+    session = options.create_session(onnx_file)
+    if taskname == "detection":
+        return RetinaFace(model_file=onnx_file, session=session)
+    return ArcFaceONNX(model_file=onnx_file, session=session)
+
+
+class ModelPack:
+    """
+    The detection and recognition models of one InsightFace model pack.
+
+    Only the pack's first detection and recognition models are loaded, once,
+    and the resulting model handles are shared by RetinaFaceDetector and
+    ArcFaceEmbedder, instead of each of them parsing the whole pack through
+    its own FaceAnalysis.
+    """
+
+    def __init__(
+        self,
+        name: str = "buffalo_l",
+        root: str = DEFAULT_MODEL_ROOT,
+        options: OnnxRuntimeOptions = OnnxRuntimeOptions(),
+    ):
+        self.name = name
+        self.options = options
+        self.detection = None
+        self.recognition = None
+
+        for onnx_file in _model_files(_pack_dir(name, root)):
+            taskname = _classify(onnx_file)
+            if taskname is None or getattr(self, taskname) is not None:
+                continue
+            setattr(self, taskname, _load_model(onnx_file, taskname, options))
+
+    def require(self, taskname: str):
+        """Return the model for taskname, raising if the pack does not ship one."""
+        model = getattr(self, taskname, None)
+        if model is None:
+            raise ValueError(f"Model pack '{self.name}' has no {taskname} model.")
+        return model
+
+
+def get_model_pack(
+    name: str = "buffalo_l",
+    root: str = DEFAULT_MODEL_ROOT,
+    options: OnnxRuntimeOptions = OnnxRuntimeOptions(),
+) -> ModelPack:
+    """Return the process-wide ModelPack for name and options, loading it on first use."""
+    return get_model_registry().get_or_create(
+        ("model_pack", name, root, options),
+        lambda: ModelPack(name, root=root, options=options),
+    )
@@ -1,16 +1,178 @@
-from typing import List, Optional
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
 
 import numpy as np
 
-from .detectors.base import FaceDetector
-from .embedders.base import FaceEmbedder
-from .preprocessing.alignment import align_face
+from .detectors.base import DetectedFace, FaceDetector
+from .detectors.tiling import TileLayout, detect_tiled
+from .embedders.base import EMBEDDING_DIM, FaceEmbedder
+from .preprocessing.alignment import align_face, align_faces_batch
+from .preprocessing.resize import resize_for_detection
+from .quality import FaceQualityGate
+from .tracking import FaceTracker, Track
+
+
+@dataclass
+class FrameFaces:
+    """All faces found in one frame, with their embeddings as a single matrix."""
+    detections: List[DetectedFace]
+    embeddings: np.ndarray  # (N, 512) float32, L2-normalised rows; row i belongs to detections[i]
+    tracks: Optional[List[Track]] = None  # tracks[i] follows detections[i] when a tracker was used
+    # rejected[i]: why the quality gate kept detections[i] from being embedded (its row is
+    # zero), or None; None as a whole when no gate was used.
+    rejected: Optional[List[Optional[str]]] = None
+
+    def __len__(self) -> int:
+        return len(self.detections)
 
 
 class FaceRecognitionPipeline:
-    def __init__(self, detector: FaceDetector, embedder: FaceEmbedder):
+    """
+    Detection, alignment and embedding of the faces in a frame.
+
+    With detection_max_side, frames are detected on a copy downscaled so its
+    longer side is at most that many pixels; boxes and landmarks are mapped
+    back to the frame, and faces are aligned (and quality-checked) from the
+    full-resolution frame so embeddings keep their quality. Enrollment
+    (extract_embedding) always detects at full resolution.
+
+    Frames can also be detected tile by tile (see TileLayout), so small,
+    distant faces get more of the detector's input; the layout is chosen
+    per call since it depends on the camera. embed_frames and
+    process_frames handle several frames (cameras) with one detection and
+    one embedding batch.
+    """
+
+    def __init__(
+        self,
+        detector: FaceDetector,
+        embedder: FaceEmbedder,
+        quality_gate: Optional[FaceQualityGate] = None,
+        detection_max_side: int = 0,
+    ):
         self.detector = detector
         self.embedder = embedder
+        self.quality_gate = quality_gate
+        self.detection_max_side = detection_max_side
+        # Per-stage counters; streams share the pipeline across inference threads.
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.faces_detected = 0
+        self.faces_embedded = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                "frames": self.frames,
+                "faces_detected": self.faces_detected,
+                "faces_embedded": self.faces_embedded,
+            }
+        if self.quality_gate is not None:
+            stats.update(self.quality_gate.snapshot())
+        return stats
+
+    def embed_frame(
+        self,
+        frame: np.ndarray,
+        tracker: Optional[FaceTracker] = None,
+        tiling: Optional[TileLayout] = None,
+    ) -> FrameFaces:
+        """
+        Detect all faces in a frame and embed them in one batch.
+
+        With a tracker, faces are associated with tracks first and only the
+        tracks that need a fresh embedding (see FaceTracker) are aligned and
+        embedded; the others reuse their track's last embedding. With a
+        quality gate, faces it rejects are not embedded either. With a
+        tiling, the frame is detected tile by tile.
+        """
+        return self.embed_frames([frame], [tracker], [tiling])[0]
+
+    def embed_frames(
+        self,
+        frames: Sequence[np.ndarray],
+        trackers: Optional[Sequence[Optional[FaceTracker]]] = None,
+        tilings: Optional[Sequence[Optional[TileLayout]]] = None,
+    ) -> List[FrameFaces]:
+        """
+        embed_frame for several frames (e.g. one per camera) at once.
+
+        The frames are detected in one detect_batch call, and the faces of
+        all of them are embedded in one embed_batch call. trackers and
+        tilings, when given, hold each frame's (or None).
+        """
+        trackers = list(trackers) if trackers is not None else [None] * len(frames)
+        detections = self.detect_frames(frames, tilings)
+
+        selections = []
+        aligned = []
+        for frame, detected, tracker in zip(frames, detections, trackers):
+            tracks = tracker.update(detected) if tracker is not None else None
+            if tracker is None:
+                pending = list(range(len(detected)))
+            else:
+                pending = [i for i, track in enumerate(tracks) if tracker.needs_embedding(track)]
+            rejected = None
+            if self.quality_gate is not None:
+                rejected = [None] * len(detected)
+                for i in pending:
+                    rejected[i] = self.quality_gate.rejection(frame, detected[i])
+                pending = [i for i in pending if rejected[i] is None]
+            if pending:
+                aligned.append(align_faces_batch(frame, np.stack([detected[i].landmarks_5pt for i in pending])))
+            selections.append((tracks, pending, rejected))
+
+        fresh = self.embedder.embed_batch(np.concatenate(aligned)) if aligned else None
+        results = []
+        offset = 0
+        for detected, tracker, (tracks, pending, rejected) in zip(detections, trackers, selections):
+            computed = fresh[offset:offset + len(pending)] if pending else None
+            offset += len(pending)
+            if tracker is None and rejected is None:
+                embeddings = computed if computed is not None else np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+            else:
+                embeddings = np.zeros((len(detected), EMBEDDING_DIM), dtype=np.float32)
+                if pending:
+                    embeddings[pending] = computed
+                if tracker is not None:
+                    embedded_now = set(pending)
+                    for i, track in enumerate(tracks):
+                        if i in embedded_now:
+                            tracker.embedded(track, embeddings[i].copy())
+                        elif rejected is None or rejected[i] is None:
+                            embeddings[i] = tracker.reused(track)
+            self._count(len(detected), len(pending))
+            results.append(FrameFaces(detections=detected, embeddings=embeddings, tracks=tracks, rejected=rejected))
+        return results
+
+    def detect(self, frame: np.ndarray, tiling: Optional[TileLayout] = None) -> List[DetectedFace]:
+        """Detect faces (at reduced resolution, see detection_max_side) in frame coordinates."""
+        return self.detect_frames([frame], [tiling])[0]
+
+    def detect_frames(
+        self,
+        frames: Sequence[np.ndarray],
+        tilings: Optional[Sequence[Optional[TileLayout]]] = None,
+    ) -> List[List[DetectedFace]]:
+        """detect for several frames; those without a tiling go through one detect_batch call."""
+        tilings = list(tilings) if tilings is not None else [None] * len(frames)
+        detections: List[List[DetectedFace]] = [[] for _ in frames]
+        single = [i for i, tiling in enumerate(tilings) if tiling is None]
+        resized = [resize_for_detection(frames[i], self.detection_max_side) for i in single]
+        batch = self.detector.detect_batch([image for image, _ in resized]) if single else []
+        for i, (_, scale), detected in zip(single, resized, batch):
+            detections[i] = detected if scale == 1.0 else [face.scaled(scale) for face in detected]
+        for i, tiling in enumerate(tilings):
+            if tiling is not None:
+                detections[i] = detect_tiled(self.detector, frames[i], tiling, self.detection_max_side)
+        return detections
+
+    def _count(self, detected: int, embedded: int):
+        with self._lock:
+            self.frames += 1
+            self.faces_detected += detected
+            self.faces_embedded += embedded
 
     def process_frame(self, frame: np.ndarray) -> List[dict]:
         """
@@ -18,21 +180,25 @@ class FaceRecognitionPipeline:
 
         Returns:
             [{"bbox": {...}, "embedding": ndarray(512,), "det_score": float}, ...]
+            Each embedding is a row view into the frame's embedding matrix.
         """
-        detected = self.detector.detect(frame)
-        if not detected:
-            return []
-
-        aligned = [align_face(frame, d.landmarks_5pt) for d in detected]
-        embeddings = self.embedder.embed_batch(aligned)
+        return self.process_frames([frame])[0]
 
+    def process_frames(self, frames: Sequence[np.ndarray]) -> List[List[dict]]:
+        """
+        process_frame for several frames, with one detection batch and one
+        embedding batch across all of them (see embed_frames).
+        """
         return [
-            {
-                "bbox": d.bbox,
-                "embedding": emb,
-                "det_score": d.score,
-            }
-            for d, emb in zip(detected, embeddings)
+            [
+                {
+                    "bbox": d.bbox,
+                    "embedding": emb,
+                    "det_score": d.score,
+                }
+                for d, emb in zip(frame_faces.detections, frame_faces.embeddings)
+            ]
+            for frame_faces in self.embed_frames(frames)
         ]
 
     def extract_embedding(self, image: np.ndarray) -> Optional[np.ndarray]:
@@ -1,3 +1,11 @@
-from .alignment import align_face, ARCFACE_DST, ALIGNED_SIZE
+from .alignment import align_face, align_faces_batch, estimate_similarity_transforms, ARCFACE_DST, ALIGNED_SIZE
+from .resize import resize_for_detection
 
-__all__ = ["align_face", "ARCFACE_DST", "ALIGNED_SIZE"]
+__all__ = [
+    "align_face",
+    "align_faces_batch",
+    "estimate_similarity_transforms",
+    "resize_for_detection",
+    "ARCFACE_DST",
+    "ALIGNED_SIZE",
+]
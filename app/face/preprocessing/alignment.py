@@ -36,3 +36,79 @@ def align_face(image: np.ndarray, landmarks_5pt: np.ndarray) -> np.ndarray:
         borderMode=cv2.BORDER_REFLECT,
     )
     return aligned
+
+
+def estimate_similarity_transforms(landmarks: np.ndarray) -> np.ndarray:
+    """
+    Closed-form (Umeyama) least-squares similarity transforms onto ARCFACE_DST.
+
+    Args:
+        landmarks: (N, 5, 2) landmark tensor
+
+    Returns:
+        (N, 2, 3) float64 affine matrices. Rows whose landmarks are degenerate
+        (all points coincide) are NaN.
+    """
+    src = np.asarray(landmarks, dtype=np.float64).reshape(-1, 5, 2)
+    dst = ARCFACE_DST.astype(np.float64)
+
+    src_mean = src.mean(axis=1)                       # (N, 2)
+    dst_mean = dst.mean(axis=0)                       # (2,)
+    src_c = src - src_mean[:, None, :]
+    dst_c = dst - dst_mean
+
+    src_var = (src_c ** 2).sum(axis=(1, 2)) / src.shape[1]            # (N,)
+    cov = np.einsum("kd,nks->nds", dst_c, src_c) / src.shape[1]       # (N, 2, 2)
+
+    u, s, vt = np.linalg.svd(cov)
+    # Force a proper rotation: a similarity transform may not mirror the face.
+    d = np.sign(np.linalg.det(u) * np.linalg.det(vt))
+    d[d == 0] = 1.0
+    u[:, :, 1] *= d[:, None]
+    rotation = u @ vt                                                 # (N, 2, 2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = (s[:, 0] + s[:, 1] * d) / src_var                      # (N,)
+    linear = rotation * scale[:, None, None]
+    translation = dst_mean - np.einsum("nij,nj->ni", linear, src_mean)
+
+    transforms = np.concatenate([linear, translation[:, :, None]], axis=2)
+    transforms[~(src_var > 1e-12)] = np.nan
+    return transforms
+
+
+def align_faces_batch(image: np.ndarray, landmarks: np.ndarray) -> np.ndarray:
+    """
+    Align every face of one frame to the ArcFace 112x112 canonical pose.
+
+    All similarity transforms are solved in one vectorised pass and the crops
+    are warped straight into a single preallocated buffer, which the embedder
+    can consume without further copies.
+
+    Args:
+        image: BGR image (any size)
+        landmarks: (N, 5, 2) array of [re, le, nose, rm, lm] per face
+
+    Returns:
+        (N, 112, 112, 3) uint8 array of aligned BGR faces
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, 5, 2)
+    out = np.empty((landmarks.shape[0], ALIGNED_SIZE[1], ALIGNED_SIZE[0], 3), dtype=image.dtype)
+    if landmarks.shape[0] == 0:
+        return out
+
+    transforms = estimate_similarity_transforms(landmarks)
+    for i, transform in enumerate(transforms):
+        if np.isnan(transform).any():
+            # Same fallback as align_face: a plain resize of the whole frame
+            out[i] = cv2.resize(image, ALIGNED_SIZE)
+            continue
+        cv2.warpAffine(
+            image,
+            transform,
+            ALIGNED_SIZE,
+            dst=out[i],
+            flags=cv2.INTER_LINEAR,
+            borderMode=cv2.BORDER_REFLECT,
+        )
+    return out
@@ -0,0 +1,21 @@
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+
+def resize_for_detection(image: np.ndarray, max_side: int) -> Tuple[np.ndarray, float]:
+    """
+    Downscale image so its longer side is at most max_side (0 = no limit).
+
+    Returns the (possibly unchanged) image and the factor that maps its
+    coordinates back to the original's.
+    """
+    height, width = image.shape[:2]
+    longer = max(height, width)
+    if not max_side or longer <= max_side:
+        return image, 1.0
+    scale = max_side / longer
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    resized = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    return resized, width / size[0]
@@ -0,0 +1,121 @@
+import math
+import threading
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+from .detectors.base import DetectedFace
+
+# Rejection reasons, in the order they are checked (cheapest first).
+QUALITY_CHECKS = ("score", "size", "roll", "yaw", "blur")
+
+# Crops are resized to this width before measuring sharpness, so the
+# Laplacian variance of near and far faces is comparable.
+SHARPNESS_CROP_WIDTH = 64
+
+
+def eye_distance(landmarks: np.ndarray) -> float:
+    """Inter-ocular distance in pixels."""
+    return float(np.linalg.norm(landmarks[1] - landmarks[0]))
+
+
+def roll_degrees(landmarks: np.ndarray) -> float:
+    """In-plane rotation: angle of the line through the eyes."""
+    dx, dy = landmarks[1] - landmarks[0]
+    return math.degrees(math.atan2(dy, dx))
+
+
+def yaw_degrees(landmarks: np.ndarray) -> float:
+    """
+    Approximate out-of-plane rotation from the nose's offset from the eyes'
+    midpoint along the eye line, relative to half the eye distance (0 when
+    frontal, +-90 in full profile).
+    """
+    eyes = landmarks[1] - landmarks[0]
+    half_distance = np.linalg.norm(eyes) / 2
+    if half_distance < 1e-6:
+        return 90.0
+    offset = float(np.dot(landmarks[2] - (landmarks[0] + landmarks[1]) / 2, eyes / (2 * half_distance)))
+    return math.degrees(math.asin(max(-1.0, min(1.0, offset / half_distance))))
+
+
+def sharpness(frame: np.ndarray, bbox: dict) -> float:
+    """Variance of the Laplacian of the face crop (low = blurred)."""
+    height, width = frame.shape[:2]
+    x1, y1 = max(0, bbox["x"]), max(0, bbox["y"])
+    x2, y2 = min(width, bbox["x"] + bbox["width"]), min(height, bbox["y"] + bbox["height"])
+    if x2 <= x1 or y2 <= y1:
+        return 0.0
+    crop = frame[y1:y2, x1:x2]
+    if crop.ndim == 3:
+        crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    size = (SHARPNESS_CROP_WIDTH, max(1, round(crop.shape[0] * SHARPNESS_CROP_WIDTH / crop.shape[1])))
+    crop = cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+    return float(cv2.Laplacian(crop, cv2.CV_64F).var())
+
+
+class FaceQualityGate:
+    """
+    Decides which detections are worth an ArcFace pass.
+
+    Faces with a detector score under min_score, eyes closer than
+    min_eye_distance pixels, more than max_roll / max_yaw degrees of
+    rotation, or a crop sharpness (Laplacian variance) under min_sharpness
+    are rejected: they still show as detections but are not embedded. A
+    limit of 0 disables its check. Counters record why faces were rejected.
+    """
+
+    def __init__(
+        self,
+        min_score: float = 0.5,
+        min_eye_distance: float = 12.0,
+        max_roll: float = 30.0,
+        max_yaw: float = 45.0,
+        min_sharpness: float = 30.0,
+    ):
+        self.min_score = min_score
+        self.min_eye_distance = min_eye_distance
+        self.max_roll = max_roll
+        self.max_yaw = max_yaw
+        self.min_sharpness = min_sharpness
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.rejected: Dict[str, int] = {check: 0 for check in QUALITY_CHECKS}
+
+    def rejection(self, frame: np.ndarray, face: DetectedFace) -> Optional[str]:
+        """Why face should not be embedded (one of QUALITY_CHECKS), or None if it should."""
+        landmarks = face.landmarks_5pt
+        if self.min_score and face.score < self.min_score:
+            reason = "score"
+        elif self.min_eye_distance and eye_distance(landmarks) < self.min_eye_distance:
+            reason = "size"
+        elif self.max_roll and abs(roll_degrees(landmarks)) > self.max_roll:
+            reason = "roll"
+        elif self.max_yaw and abs(yaw_degrees(landmarks)) > self.max_yaw:
+            reason = "yaw"
+        elif self.min_sharpness and sharpness(frame, face.bbox) < self.min_sharpness:
+            reason = "blur"
+        else:
+            reason = None
+        with self._lock:
+            self.checked += 1
+            if reason is not None:
+                self.rejected[reason] += 1
+        return reason
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"faces_checked": self.checked, "faces_rejected": dict(self.rejected)}
+
+
+def create_quality_gate(settings) -> Optional[FaceQualityGate]:
+    if not settings.FACE_QUALITY_ENABLED:
+        return None
+    return FaceQualityGate(
+        min_score=settings.FACE_QUALITY_MIN_SCORE,
+        min_eye_distance=settings.FACE_QUALITY_MIN_EYE_DISTANCE,
+        max_roll=settings.FACE_QUALITY_MAX_ROLL,
+        max_yaw=settings.FACE_QUALITY_MAX_YAW,
+        min_sharpness=settings.FACE_QUALITY_MIN_SHARPNESS,
+    )
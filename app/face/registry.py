@@ -0,0 +1,55 @@
+import threading
+from typing import Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded inference models.
+
+    Models are keyed by whatever uniquely identifies their weights and runtime
+    configuration (e.g. detector backend + model pack). Each key is built at most
+    once; concurrent callers asking for the same key block on a per-key lock
+    while the first one loads it, so callers for other keys are never held up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[Hashable, object] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], T]) -> T:
+        """Return the model stored under key, building it with factory on first use."""
+        with self._lock:
+            if key in self._models:
+                return self._models[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._models:
+                    return self._models[key]
+
+            model = factory()
+
+            with self._lock:
+                self._models[key] = model
+                self._key_locks.pop(key, None)
+            return model
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._models
+
+    def clear(self):
+        """Drop every cached model (mainly for tests and hot reloads)."""
+        with self._lock:
+            self._models.clear()
+
+
+_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    return _registry
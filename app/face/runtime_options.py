@@ -0,0 +1,101 @@
+import os
+import os.path as osp
+from dataclasses import dataclass
+from typing import Tuple
+
+EXECUTION_MODES = ("sequential", "parallel")
+GRAPH_OPTIMIZATION_LEVELS = ("disable", "basic", "extended", "all")
+
+
+@dataclass(frozen=True)
+class OnnxRuntimeOptions:
+    """
+    ONNX Runtime configuration shared by every model session the pipeline creates.
+
+    Instances are hashable so they can be part of model-registry keys: two
+    pipelines only share sessions when they also share the runtime options.
+    """
+
+    providers: Tuple[str, ...] = ("CPUExecutionProvider",)
+    intra_op_threads: int = 0   # 0 lets ONNX Runtime pick
+    inter_op_threads: int = 0
+    execution_mode: str = "sequential"
+    graph_optimization_level: str = "all"
+    optimized_model_dir: str = ""  # empty disables the optimized-graph cache
+
+    def __post_init__(self):
+        if self.execution_mode not in EXECUTION_MODES:
+            raise ValueError(
+                f"Unknown ONNX execution mode: '{self.execution_mode}'. "
+                "Valid options are 'sequential' and 'parallel'."
+            )
+        if self.graph_optimization_level not in GRAPH_OPTIMIZATION_LEVELS:
+            raise ValueError(
+                f"Unknown ONNX graph optimization level: '{self.graph_optimization_level}'. "
+                "Valid options are 'disable', 'basic', 'extended' and 'all'."
+            )
+
+    @classmethod
+    def from_settings(cls, settings) -> "OnnxRuntimeOptions":
+        providers = tuple(p.strip() for p in settings.ONNX_PROVIDERS.split(",") if p.strip())
+        return cls(
+            providers=providers or ("CPUExecutionProvider",),
+            intra_op_threads=settings.ONNX_INTRA_OP_THREADS,
+            inter_op_threads=settings.ONNX_INTER_OP_THREADS,
+            execution_mode=settings.ONNX_EXECUTION_MODE.lower(),
+            graph_optimization_level=settings.ONNX_GRAPH_OPTIMIZATION_LEVEL.lower(),
+            optimized_model_dir=settings.ONNX_OPTIMIZED_MODEL_DIR,
+        )
+
+    def optimized_model_path(self, onnx_file: str) -> str:
+        """Cache location of the optimized graph for onnx_file (namespaced by pack dir)."""
+        pack = osp.basename(osp.dirname(osp.abspath(onnx_file)))
+        stem = osp.splitext(osp.basename(onnx_file))[0]
+        return osp.join(self.optimized_model_dir, pack, f"{stem}.{self.graph_optimization_level}.onnx")
+
+    def session_options(self, optimize: bool = True):
+        import onnxruntime as ort
+
+        levels = {
+            "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        }
+        modes = {
+            "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+            "parallel": ort.ExecutionMode.ORT_PARALLEL,
+        }
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = modes[self.execution_mode]
+        options.graph_optimization_level = (
+            levels[self.graph_optimization_level] if optimize else levels["disable"]
+        )
+        return options
+
+    def create_session(self, onnx_file: str):
+        """
+        Create an InferenceSession for onnx_file.
+
+        With an optimized-model cache configured, the first load writes the
+        optimized graph into the cache and later loads read it back with
+        graph optimization disabled, skipping the optimization pass at startup.
+        A cached graph older than its source model is regenerated.
+        """
+        import onnxruntime as ort
+
+        model_path = onnx_file
+        options = self.session_options()
+        if self.optimized_model_dir and self.graph_optimization_level != "disable":
+            cached = self.optimized_model_path(onnx_file)
+            if osp.exists(cached) and osp.getmtime(cached) >= osp.getmtime(onnx_file):
+                model_path = cached
+                options = self.session_options(optimize=False)
+            else:
+                os.makedirs(osp.dirname(cached), exist_ok=True)
+                options.optimized_model_filepath = cached
+
+        return ort.InferenceSession(model_path, sess_options=options, providers=list(self.providers))
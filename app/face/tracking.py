@@ -0,0 +1,197 @@
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from .detectors.base import DetectedFace
+
+
+def bbox_corners(bbox: dict) -> np.ndarray:
+    """{"x", "y", "width", "height"} -> [x1, y1, x2, y2] float."""
+    return np.array(
+        [bbox["x"], bbox["y"], bbox["x"] + bbox["width"], bbox["y"] + bbox["height"]],
+        dtype=np.float32,
+    )
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise intersection-over-union of (N, 4) and (M, 4) corner boxes."""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-9)
+
+
+@dataclass
+class Track:
+    """One face followed across frames; its identity and embedding stick to it."""
+    track_id: int
+    box: np.ndarray                 # [x1, y1, x2, y2] of the latest detection
+    velocity: np.ndarray = field(default_factory=lambda: np.zeros(2, dtype=np.float32))  # centre, px/frame
+    missed: int = 0                 # consecutive frames without a detection
+    embedding: Optional[np.ndarray] = None
+    embedded_box: Optional[np.ndarray] = None
+    frames_since_embedding: int = 0
+    user_id: Optional[uuid.UUID] = None
+    confidence: float = 0.0
+
+    @property
+    def centre(self) -> np.ndarray:
+        return (self.box[:2] + self.box[2:]) / 2
+
+    def identify(self, user_id: Optional[uuid.UUID], confidence: float) -> Tuple[Optional[uuid.UUID], float]:
+        """
+        The track's identity given its latest match.
+
+        A new match replaces the identity; a face that temporarily matches
+        nobody (turned away, blurred) keeps the one its track already had.
+        """
+        if user_id is not None:
+            self.user_id, self.confidence = user_id, confidence
+        return self.user_id, self.confidence
+
+    def predicted_box(self) -> np.ndarray:
+        """Constant-velocity prediction for the next frame."""
+        shift = self.velocity * (self.missed + 1)
+        return self.box + np.concatenate([shift, shift])
+
+
+class FaceTracker:
+    """
+    Lightweight multi-face tracker: gives each detected face a track id.
+
+    Detections are associated with the tracks' constant-velocity predicted
+    boxes greedily by IoU, then, for what is left, by centre distance
+    relative to the track's box size, so a face that moved more than its own
+    width between recognitions is still followed. Tracks unseen for more
+    than max_missed frames are dropped.
+
+    A tracked face is only re-embedded every reembed_interval frames or
+    when its box moved or resized so that it overlaps the box it was last
+    embedded at by less than reembed_iou; in between its last embedding is
+    reused, and so is its identity (see Track.identify).
+    """
+
+    def __init__(
+        self,
+        match_iou: float = 0.3,
+        max_centre_distance: float = 0.5,
+        max_missed: int = 5,
+        reembed_interval: int = 10,
+        reembed_iou: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.match_iou = match_iou
+        self.max_centre_distance = max_centre_distance
+        self.max_missed = max_missed
+        self.reembed_interval = reembed_interval
+        self.reembed_iou = reembed_iou
+        self._clock = clock
+        self.started_at = clock()
+        self.tracks: List[Track] = []
+        self._next_id = 1
+        self.embeddings_computed = 0
+        self.embeddings_reused = 0
+
+    def _associate(self, boxes: np.ndarray) -> List[Tuple[int, int]]:
+        """(track index, detection index) pairs."""
+        if not self.tracks or not len(boxes):
+            return []
+        predicted = np.stack([track.predicted_box() for track in self.tracks])
+        overlaps = iou_matrix(predicted, boxes)
+        pairs = []
+        free_tracks, free_detections = set(range(len(self.tracks))), set(range(len(boxes)))
+        for t, d in zip(*np.unravel_index(np.argsort(-overlaps, axis=None), overlaps.shape)):
+            if overlaps[t, d] < self.match_iou:
+                break
+            if t in free_tracks and d in free_detections:
+                pairs.append((int(t), int(d)))
+                free_tracks.discard(t)
+                free_detections.discard(d)
+
+        if free_tracks and free_detections:
+            tracks, detections = sorted(free_tracks), sorted(free_detections)
+            centres = (predicted[tracks, :2] + predicted[tracks, 2:]) / 2
+            sizes = np.linalg.norm(predicted[tracks, 2:] - predicted[tracks, :2], axis=1)
+            detection_centres = (boxes[detections, :2] + boxes[detections, 2:]) / 2
+            distances = np.linalg.norm(centres[:, None] - detection_centres[None], axis=2) / sizes[:, None]
+            for i, j in zip(*np.unravel_index(np.argsort(distances, axis=None), distances.shape)):
+                if distances[i, j] > self.max_centre_distance:
+                    break
+                t, d = tracks[i], detections[j]
+                if t in free_tracks and d in free_detections:
+                    pairs.append((t, d))
+                    free_tracks.discard(t)
+                    free_detections.discard(d)
+        return pairs
+
+    def update(self, detections: List[DetectedFace]) -> List[Track]:
+        """Associate one frame's detections with tracks; returns the track of each detection."""
+        boxes = np.stack([bbox_corners(d.bbox) for d in detections]) if detections else np.empty((0, 4), np.float32)
+        assigned: List[Optional[Track]] = [None] * len(detections)
+        matched = set()
+        for t, d in self._associate(boxes):
+            track = self.tracks[t]
+            centre = (boxes[d, :2] + boxes[d, 2:]) / 2
+            track.velocity = 0.5 * track.velocity + 0.5 * (centre - track.centre) / (track.missed + 1)
+            track.box = boxes[d]
+            track.missed = 0
+            track.frames_since_embedding += 1
+            assigned[d] = track
+            matched.add(t)
+
+        survivors = []
+        for t, track in enumerate(self.tracks):
+            if t not in matched:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    continue
+            survivors.append(track)
+        for d, track in enumerate(assigned):
+            if track is None:
+                assigned[d] = Track(track_id=self._next_id, box=boxes[d])
+                self._next_id += 1
+                survivors.append(assigned[d])
+        self.tracks = survivors
+        return assigned
+
+    def needs_embedding(self, track: Track) -> bool:
+        if track.embedding is None or track.frames_since_embedding >= self.reembed_interval:
+            return True
+        return float(iou_matrix(track.box[None], track.embedded_box[None])[0, 0]) < self.reembed_iou
+
+    def embedded(self, track: Track, embedding: np.ndarray):
+        """Record a fresh embedding of the track's current face."""
+        track.embedding = embedding
+        track.embedded_box = track.box.copy()
+        track.frames_since_embedding = 0
+        self.embeddings_computed += 1
+
+    def reused(self, track: Track) -> np.ndarray:
+        self.embeddings_reused += 1
+        return track.embedding
+
+    def snapshot(self) -> dict:
+        elapsed = max(self._clock() - self.started_at, 1e-9)
+        return {
+            "tracks": len(self.tracks),
+            "embeddings_computed": self.embeddings_computed,
+            "embeddings_reused": self.embeddings_reused,
+            "embeddings_saved_per_second": round(self.embeddings_reused / elapsed, 2),
+        }
+
+
+def create_face_tracker(settings) -> Optional[FaceTracker]:
+    if not settings.FACE_TRACKING_ENABLED:
+        return None
+    return FaceTracker(
+        match_iou=settings.TRACK_MATCH_IOU,
+        max_missed=settings.TRACK_MAX_MISSED,
+        reembed_interval=settings.TRACK_REEMBED_INTERVAL,
+        reembed_iou=settings.TRACK_REEMBED_IOU,
+    )
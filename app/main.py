@@ -9,7 +9,7 @@ from sqlalchemy import inspect
 from app.database import engine, SessionLocal
 from app.api.routes import api_router
 from app.api.routes.streaming import router as streaming_router
-from app.api.deps import init_services
+from app.api.deps import init_services, shutdown_services
 from app.config import get_settings
 
 settings = get_settings()
@@ -87,6 +87,7 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down...")
+    shutdown_services()
 
 
 app = FastAPI(
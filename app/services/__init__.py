@@ -1,6 +1,8 @@
-from app.services.face_service import FaceService
+from app.services.face_service import FaceService, ScopedFaceService
 from app.services.camera_service import CameraService
+from app.services.camera_manager import CameraManager
 from app.services.attendance_service import PresenceTracker, PresenceState, AttendanceEvent
 from app.services.live_presence_service import LivePresenceTracker
+from app.services.inference_executor import InferenceExecutor
 
-__all__ = ["FaceService", "CameraService", "PresenceTracker", "PresenceState", "AttendanceEvent", "LivePresenceTracker"]
+__all__ = ["FaceService", "ScopedFaceService", "CameraService", "CameraManager", "PresenceTracker", "PresenceState", "AttendanceEvent", "LivePresenceTracker", "InferenceExecutor"]
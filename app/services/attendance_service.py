@@ -20,6 +20,7 @@ class AttendanceEvent:
     user_id: uuid.UUID
     confidence: float
     timestamp: datetime
+    track_id: Optional[int] = None
 
 
 class PresenceTracker:
@@ -33,6 +34,10 @@ class PresenceTracker:
     - ENTERING -> PRESENT: Face detected for entry_threshold consecutive frames (fires event once)
     - ENTERING -> ABSENT: Face not detected (reset counter)
     - PRESENT: no further transitions
+
+    When detections carry a "track_id" (face tracking enabled), the
+    consecutive frames must all come from the same track: a user matched
+    on a different face than the one being confirmed starts over.
     """
 
     def __init__(self, entry_threshold: int = None):
@@ -42,12 +47,14 @@ class PresenceTracker:
         self.counters: Dict[uuid.UUID, int] = {}
         self.confidences: Dict[uuid.UUID, float] = {}
         self.confirmed_ids: Set[uuid.UUID] = set()
+        self.track_ids: Dict[uuid.UUID, int] = {}
 
     def reset(self):
         self.states.clear()
         self.counters.clear()
         self.confidences.clear()
         self.confirmed_ids.clear()
+        self.track_ids.clear()
 
     def get_confirmed_ids(self) -> Set[uuid.UUID]:
         return self.confirmed_ids.copy()
@@ -61,11 +68,14 @@ class PresenceTracker:
         now = datetime.now(timezone.utc)
 
         detected_ids = set()
+        detected_tracks: Dict[uuid.UUID, int] = {}
         for det in detections:
             user_id = det.get("user_id")
             if user_id is not None:
                 detected_ids.add(user_id)
                 self.confidences[user_id] = det.get("confidence", 0.0)
+                if det.get("track_id") is not None:
+                    detected_tracks[user_id] = det["track_id"]
 
         for user_id in detected_ids:
             # Already confirmed this session — skip
@@ -73,12 +83,19 @@ class PresenceTracker:
                 continue
 
             current_state = self.states.get(user_id, PresenceState.ABSENT)
+            track_id = detected_tracks.get(user_id)
+            previous_track_id = self.track_ids.get(user_id)
+            if track_id is not None:
+                self.track_ids[user_id] = track_id
 
             if current_state == PresenceState.ABSENT:
                 self.states[user_id] = PresenceState.ENTERING
                 self.counters[user_id] = 1
 
             elif current_state == PresenceState.ENTERING:
+                if track_id is not None and previous_track_id is not None and track_id != previous_track_id:
+                    self.counters[user_id] = 1
+                    continue
                 self.counters[user_id] += 1
                 if self.counters[user_id] >= self.entry_threshold:
                     self.states[user_id] = PresenceState.PRESENT
@@ -86,7 +103,8 @@ class PresenceTracker:
                     events.append(AttendanceEvent(
                         user_id=user_id,
                         confidence=self.confidences.get(user_id, 0.0),
-                        timestamp=now
+                        timestamp=now,
+                        track_id=track_id,
                     ))
 
         # Reset entering state for users not detected this frame
@@ -0,0 +1,217 @@
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+from app.services.camera_service import CameraService
+from app.services.stream_scheduler import StreamScheduler
+
+logger = logging.getLogger(__name__)
+
+CameraSource = Union[int, str]
+
+_URL_CREDENTIALS = re.compile(r"//[^/@]*@")
+
+# Per-camera options trailing a camera_connection: "rtsp://cam/stream#tiles=3x2&...".
+_CAMERA_OPTIONS = re.compile(r"#(\w+=[^#&]*(?:&\w+=[^#&]*)*)\s*$")
+
+
+def _split_camera_options(connection: str) -> Tuple[str, Dict[str, str]]:
+    match = _CAMERA_OPTIONS.search(connection)
+    if match is None:
+        return connection, {}
+    options = dict(option.split("=", 1) for option in match.group(1).split("&"))
+    return connection[:match.start()], {name.lower(): value.strip() for name, value in options.items()}
+
+
+def parse_camera_options(connection: Optional[str]) -> Dict[str, str]:
+    """
+    Per-camera options of a camera_connection, given as a trailing
+    "#name=value&name=value" fragment (e.g. "#tiles=3x2").
+    """
+    if connection is None:
+        return {}
+    return _split_camera_options(connection.strip())[1]
+
+
+def parse_camera_source(connection: Optional[str]) -> Optional[CameraSource]:
+    """
+    Capture source from a room's camera_connection.
+
+    A bare integer is a local device index; anything else (an RTSP/HTTP URL or
+    a video file path) is handed to OpenCV as is, without its trailing
+    options (see parse_camera_options). Returns None when empty.
+    """
+    if connection is None:
+        return None
+    connection = _split_camera_options(connection.strip())[0].strip()
+    if not connection:
+        return None
+    if connection.isdigit():
+        return int(connection)
+    return connection
+
+
+def redact_source(source: CameraSource) -> str:
+    """Source for logs and API responses, without URL credentials."""
+    return _URL_CREDENTIALS.sub("//***@", str(source))
+
+
+@dataclass
+class _SharedCamera:
+    service: CameraService
+    leases: int = 0
+    opened: threading.Event = field(default_factory=threading.Event)  # set once start() returned
+    started: bool = False
+
+    @property
+    def ended(self) -> bool:
+        return self.opened.is_set() and self.service.health()["state"] != "running"
+
+
+class CameraLease:
+    """
+    One stream's handle on a shared camera.
+
+    Duck-types the parts of CameraService a StreamPipeline uses, so a
+    pipeline does not know whether it owns its camera: start() joins the
+    source (opening it if this is its first lease), stop() leaves it.
+    """
+
+    def __init__(self, manager: "CameraManager", source: CameraSource, scheduler: Optional[StreamScheduler] = None):
+        self.manager = manager
+        self.source = source
+        self.scheduler = scheduler
+        self.late_ticks = 0
+        self._shared: Optional[_SharedCamera] = None
+
+    @property
+    def dropped_frames(self) -> int:
+        return self._shared.service.dropped_frames if self._shared else 0
+
+    def start(self) -> bool:
+        if self._shared is None:
+            self._shared = self.manager._acquire(self.source, self.scheduler)
+        return self._shared is not None
+
+    def stop(self):
+        if self._shared is not None:
+            shared, self._shared = self._shared, None
+            self.manager._release(shared, self.scheduler)
+
+    async def get_frames(self, fps: Optional[float] = None):
+        if self._shared is None:
+            return
+        async for frame in self._shared.service.get_frames(fps=fps, ticks=self):
+            yield frame
+
+    encode_frame = staticmethod(CameraService.encode_frame)
+
+
+class CameraManager:
+    """
+    Process-wide registry of open capture sources.
+
+    Each source (device index, RTSP/HTTP URL or file) is opened once, on a
+    capture thread, however many streams lease it, and closed when its last
+    lease is released. At most max_active sources are open at a time.
+
+    Streams that lease a camera with their scheduler share
+    recognition_fps_budget recognitions per second between them: every
+    running stream gets an equal share, capped at its own configured rate,
+    and the shares are recomputed whenever a stream starts or stops. 0
+    leaves every stream at its configured rate.
+    """
+
+    def __init__(self, max_active: int = 0, recognition_fps_budget: float = 0.0):
+        self.max_active = max_active
+        self.recognition_fps_budget = recognition_fps_budget
+        self._cameras: Dict[CameraSource, _SharedCamera] = {}
+        self._schedulers: Dict[StreamScheduler, float] = {}  # scheduler -> configured recognition FPS
+        self._lock = threading.Lock()
+
+    def lease(self, source: CameraSource, scheduler: Optional[StreamScheduler] = None) -> CameraLease:
+        return CameraLease(self, source, scheduler)
+
+    def _acquire(self, source: CameraSource, scheduler: Optional[StreamScheduler]) -> Optional[_SharedCamera]:
+        """
+        Lease source, opening it if needed. The device is opened outside the
+        lock: other sources are not held up, and leases of the same source
+        wait for the one opening.
+        """
+        with self._lock:
+            shared = self._cameras.get(source)
+            if shared is not None and shared.ended:
+                # The source ran out (end of file, dropped stream): new leases get a
+                # fresh capture, and the leases of the ended one release it as they leave.
+                del self._cameras[source]
+                shared = None
+            opening = shared is None
+            if opening:
+                if self.max_active and len(self._cameras) >= self.max_active:
+                    logger.warning(
+                        "Not opening camera %s: %d sources already active",
+                        redact_source(source), len(self._cameras),
+                    )
+                    return None
+                shared = self._cameras[source] = _SharedCamera(CameraService(camera_id=source, threaded=True))
+            shared.leases += 1
+
+        if opening:
+            shared.started = shared.service.start()
+            if not shared.started:
+                logger.warning("Failed to open camera %s", redact_source(source))
+                shared.service.stop()
+                with self._lock:
+                    if self._cameras.get(source) is shared:
+                        del self._cameras[source]
+            shared.opened.set()
+        else:
+            shared.opened.wait()
+
+        with self._lock:
+            if not shared.started:
+                shared.leases -= 1
+                return None
+            if scheduler is not None:
+                self._schedulers[scheduler] = scheduler.recognition_fps
+                self._rebalance()
+            return shared
+
+    def _release(self, shared: _SharedCamera, scheduler: Optional[StreamScheduler]):
+        with self._lock:
+            if scheduler is not None and scheduler in self._schedulers:
+                scheduler.set_recognition_fps(self._schedulers.pop(scheduler))
+                self._rebalance()
+            shared.leases -= 1
+            if shared.leases:
+                return
+            source = shared.service.camera_id
+            if self._cameras.get(source) is shared:
+                del self._cameras[source]
+        # stop() joins the capture thread: keep it out of the lock.
+        shared.service.stop()
+
+    def _rebalance(self):
+        if not self.recognition_fps_budget or not self._schedulers:
+            return
+        share = self.recognition_fps_budget / len(self._schedulers)
+        for scheduler, configured in self._schedulers.items():
+            scheduler.set_recognition_fps(min(configured, share))
+
+    def health(self) -> List[dict]:
+        """Per-source capture health: state, leases, achieved capture FPS, dropped frames."""
+        with self._lock:
+            cameras = list(self._cameras.items())
+        return [
+            {"source": redact_source(source), "leases": shared.leases, **shared.service.health()}
+            for source, shared in cameras
+        ]
+
+
+def create_camera_manager(settings) -> CameraManager:
+    return CameraManager(
+        max_active=settings.CAMERA_MAX_ACTIVE,
+        recognition_fps_budget=settings.RECOGNITION_FPS_BUDGET,
+    )
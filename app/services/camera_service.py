@@ -1,27 +1,71 @@
 import cv2
 import asyncio
+import logging
+import threading
+import time
 import numpy as np
-from typing import AsyncGenerator, Optional
+from typing import AsyncGenerator, Optional, Union
 from app.config import get_settings
+from app.services.frame_slot import LatestFrameSlot
+from app.services.replay_capture import is_replay_source, open_replay_capture
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# How long stop() waits for the capture thread to finish its in-flight read and release the device.
+CAPTURE_JOIN_TIMEOUT_SECONDS = 2.0
 
 
 class CameraService:
     """Service for webcam capture and frame encoding."""
 
-    def __init__(self, camera_id: int = 0):
+    def __init__(self, camera_id: Union[int, str] = 0, threaded: Optional[bool] = None):
         """
         Initialize camera service.
 
         Args:
-            camera_id: Camera device ID (0 for default webcam)
+            camera_id: Camera device ID (0 for default webcam), a stream
+                       URL (RTSP/HTTP), or a replay source: video file,
+                       image directory or synthetic:// (see replay_capture)
+            threaded: read frames on a dedicated capture thread into a
+                      latest-frame slot (defaults to settings.CAMERA_THREADED_CAPTURE)
         """
         self.camera_id = camera_id
         self.target_fps = settings.PROCESSING_FPS
         self.frame_interval = 1.0 / self.target_fps
+        self.threaded = settings.CAMERA_THREADED_CAPTURE if threaded is None else threaded
         self.cap: Optional[cv2.VideoCapture] = None
         self.is_running = False
+        self._slot: Optional[LatestFrameSlot] = None
+        self._capture_thread: Optional[threading.Thread] = None
+        self.late_ticks = 0  # output ticks skipped because the consumer overran its slot
+        self.frames_captured = 0
+        self.started_at: Optional[float] = None
+        self.last_frame_at: Optional[float] = None
+
+    @property
+    def dropped_frames(self) -> int:
+        """Frames the capture thread replaced before anyone read them."""
+        return self._slot.dropped if self._slot else 0
+
+    def health(self) -> dict:
+        """Capture counters: state, achieved capture FPS and age of the newest frame."""
+        now = time.monotonic()
+        uptime = now - self.started_at if self.started_at else 0.0
+        if not self.is_running:
+            state = "stopped"
+        elif self._slot and self._slot.closed:
+            state = "ended"  # the source ran out (end of file, dropped stream)
+        else:
+            state = "running"
+        return {
+            "state": state,
+            "uptime_seconds": round(uptime, 1),
+            "frames_captured": self.frames_captured,
+            "capture_fps": round(self.frames_captured / uptime, 2) if uptime else 0.0,
+            "frames_dropped": self.dropped_frames,
+            "last_frame_age_seconds": round(now - self.last_frame_at, 2) if self.last_frame_at else None,
+        }
 
     def start(self) -> bool:
         """
@@ -30,51 +74,135 @@ class CameraService:
         Returns:
             True if camera started successfully
         """
-        self.cap = cv2.VideoCapture(self.camera_id)
+        try:
+            replay = is_replay_source(self.camera_id)
+        except ValueError as e:
+            logger.error("Cannot open camera: %s", e)
+            return False
+        if replay:
+            self.cap = open_replay_capture(
+                self.camera_id,
+                open_video=cv2.VideoCapture,
+                pacing=settings.CAMERA_REPLAY_PACING,
+                fps=settings.CAMERA_REPLAY_FPS,
+                loop=settings.CAMERA_REPLAY_LOOP,
+            )
+        else:
+            self.cap = cv2.VideoCapture(self.camera_id)
 
         if not self.cap.isOpened():
             return False
 
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, settings.FRAME_WIDTH)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, settings.FRAME_HEIGHT)
+        if isinstance(self.camera_id, int):
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, settings.FRAME_WIDTH)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, settings.FRAME_HEIGHT)
         self.is_running = True
+        self.started_at = time.monotonic()
+
+        if self.threaded:
+            self._slot = LatestFrameSlot()
+            self._capture_thread = threading.Thread(
+                target=self._capture_loop,
+                args=(self.cap, self._slot),
+                name=f"camera-{self.camera_id}",
+                daemon=True,
+            )
+            self._capture_thread.start()
         return True
 
     def stop(self):
         """Release camera."""
         self.is_running = False
-        if self.cap:
+        if self._slot:
+            self._slot.close()
+        if self._capture_thread:
+            # The capture thread releases its device itself once its last read()
+            # returns: releasing under an in-flight read() can crash the driver.
+            self._capture_thread.join(timeout=CAPTURE_JOIN_TIMEOUT_SECONDS)
+            if self._capture_thread.is_alive():
+                logger.warning(
+                    "Capture thread for camera %s did not stop in time; "
+                    "it releases the device when its read returns", self.camera_id
+                )
+            self._capture_thread = None
+        elif self.cap:
             self.cap.release()
-            self.cap = None
+        self.cap = None
+
+    def _capture_loop(self, cap: cv2.VideoCapture, slot: LatestFrameSlot):
+        """Capture thread: keep the slot filled with the newest frame until stopped, then release cap."""
+        try:
+            while self.is_running:
+                frame = self._read_device(cap)
+                if frame is None:
+                    break
+                slot.put(frame)
+        finally:
+            slot.close()
+            cap.release()
+
+    def _read_device(self, cap: cv2.VideoCapture) -> Optional[np.ndarray]:
+        ret, frame = cap.read()
+        if not ret:
+            return None
+        self.frames_captured += 1
+        self.last_frame_at = time.monotonic()
+        return frame
 
     def read_frame(self) -> Optional[np.ndarray]:
         """
         Read a single frame from camera.
 
+        In threaded mode this never blocks and returns the latest captured frame.
+
         Returns:
             Frame as numpy array or None if failed
         """
         if not self.cap or not self.is_running:
             return None
+        if self._slot:
+            return self._slot.latest()[1]
+        return self._read_device(self.cap)
 
-        ret, frame = self.cap.read()
-        if not ret:
-            return None
-        return frame
-
-    async def get_frames(self) -> AsyncGenerator[np.ndarray, None]:
+    async def get_frames(self, fps: Optional[float] = None, ticks=None) -> AsyncGenerator[np.ndarray, None]:
         """
         Async generator yielding frames at target FPS.
 
+        Pacing is deadline-based: time the consumer spends on a frame counts
+        towards the interval, and whole ticks it overran are skipped
+        (late_ticks) rather than made up in a burst. In threaded mode each frame is the
+        freshest one captured, awaited without blocking the event loop.
+
+        Args:
+            fps: output rate (defaults to settings.PROCESSING_FPS)
+            ticks: object whose late_ticks counts the skipped ticks (defaults
+                   to this camera; consumers sharing a camera pass their own)
+
         Yields:
             Frames as numpy arrays
         """
+        interval = 1.0 / fps if fps else self.frame_interval
+        ticks = ticks or self
+        seq = 0
+        next_due = time.monotonic()
         while self.is_running:
-            frame = self.read_frame()
+            if self._slot:
+                seq, frame = await self._slot.get(after=seq)
+            else:
+                frame = self.read_frame()
             if frame is None:
                 break
             yield frame
-            await asyncio.sleep(self.frame_interval)
+            if interval <= 0:
+                await asyncio.sleep(0)
+                continue
+
+            next_due += interval
+            now = time.monotonic()
+            if next_due < now:
+                ticks.late_ticks += int((now - next_due) // interval)
+                next_due = now
+            await asyncio.sleep(next_due - now)
 
     @staticmethod
     def encode_frame(frame: np.ndarray, quality: int = None) -> bytes:
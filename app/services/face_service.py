@@ -1,48 +1,85 @@
+import threading
 import uuid
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from typing import Iterable, List, Dict, Tuple, Optional
 
 from app.config import get_settings
-from app.face import FaceRecognitionPipeline, create_pipeline
+from app.face import FaceRecognitionPipeline, FaceTracker, FrameFaces, TileLayout, create_pipeline
+from app.face.gallery import EmbeddingGallery, GalleryIndex, GalleryScope, create_gallery_index
+from app.face.gallery.quantization import gallery_dtype
+from app.face.matching import assign_one_to_one, best_matches
 
 settings = get_settings()
 
+# Candidates considered per face when resolving one-to-one assignments, so a
+# face that loses its best identity can still fall back to its runner-up.
+ASSIGNMENT_CANDIDATES = 5
+
 
 class FaceService:
     """Service for face detection and recognition."""
 
     def __init__(self, known_encodings: Dict[uuid.UUID, np.ndarray] = None):
-        self.known_encodings = known_encodings or {}
         self.threshold = settings.SIMILARITY_THRESHOLD
+        self.one_to_one = settings.MATCH_ONE_TO_ONE
         self._pipeline: FaceRecognitionPipeline = create_pipeline(settings)
-        self._known_ids: List[uuid.UUID] = []
-        self._known_matrix: Optional[np.ndarray] = None
-        self._rebuild_matrix()
-
-    def _rebuild_matrix(self):
-        """Rebuild the cached known IDs list and encoding matrix."""
-        if self.known_encodings:
-            self._known_ids = list(self.known_encodings.keys())
-            self._known_matrix = np.stack(list(self.known_encodings.values()))
-        else:
-            self._known_ids = []
-            self._known_matrix = None
+        self._index: GalleryIndex = create_gallery_index(settings.GALLERY_INDEX, settings)
+        self._dtype = gallery_dtype(settings.GALLERY_PRECISION)
+        # Enrollment (REST) and matching (streams) can run on different threads.
+        self._lock = threading.RLock()
+        self._gallery = EmbeddingGallery(dtype=self._dtype)
+        self.update_known_encodings(known_encodings or {})
+
+    @property
+    def known_encodings(self) -> Dict[uuid.UUID, np.ndarray]:
+        """Snapshot of enrolled encodings (row views into the gallery matrix)."""
+        with self._lock:
+            return dict(self._gallery.items())
+
+    @property
+    def size(self) -> int:
+        """Number of enrolled encodings."""
+        with self._lock:
+            return len(self._gallery)
 
     def update_known_encodings(self, known_encodings: Dict[uuid.UUID, np.ndarray]):
-        """Update the known encodings dictionary."""
-        self.known_encodings = known_encodings
-        self._rebuild_matrix()
+        """Replace every known encoding, rebuilding the gallery with one copy."""
+        with self._lock:
+            self._gallery = EmbeddingGallery(capacity=max(16, len(known_encodings)), dtype=self._dtype)
+            if known_encodings:
+                self._gallery.extend(list(known_encodings), np.stack(list(known_encodings.values())))
+            self._index.build(self._gallery.matrix, self._gallery.scales)
+
+    def load_gallery(self, user_ids: List[uuid.UUID], matrix: np.ndarray):
+        """
+        Replace every known encoding with an (N, 512) float32 matrix. At full
+        precision it is used as-is (no copy); otherwise it is quantized once.
+        """
+        with self._lock:
+            if matrix.dtype == self._dtype:
+                self._gallery = EmbeddingGallery.from_matrix(user_ids, matrix)
+            else:
+                self._gallery = EmbeddingGallery(dim=matrix.shape[1], capacity=len(user_ids), dtype=self._dtype)
+                self._gallery.extend(user_ids, matrix)
+            self._index.build(self._gallery.matrix, self._gallery.scales)
 
     def add_encoding(self, user_id: uuid.UUID, encoding: np.ndarray):
-        """Add a single encoding to known faces."""
-        self.known_encodings[user_id] = encoding
-        self._rebuild_matrix()
+        """Add (or replace) a single encoding in amortised O(1)."""
+        with self._lock:
+            row = self._gallery.add(user_id, encoding)
+            self._index.add(np.array([row]), self._gallery.matrix, self._gallery.scales)
+            self._maybe_compact()
 
     def remove_encoding(self, user_id: uuid.UUID):
-        """Remove an encoding from known faces."""
-        if user_id in self.known_encodings:
-            del self.known_encodings[user_id]
-            self._rebuild_matrix()
+        """Remove an encoding from known faces (tombstoned until the next compaction)."""
+        with self._lock:
+            if self._gallery.remove(user_id):
+                self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self._gallery.needs_compaction():
+            mapping = self._gallery.compact()
+            self._index.compact(mapping, self._gallery.matrix, self._gallery.scales)
 
     def extract_face_encoding(self, image: np.ndarray) -> Optional[np.ndarray]:
         """
@@ -56,45 +93,206 @@ class FaceService:
         """
         return self._pipeline.extract_embedding(image)
 
-    def process_frame(self, frame: np.ndarray) -> List[dict]:
+    def scoped(self, user_ids: Iterable[uuid.UUID]) -> "ScopedFaceService":
+        """View of this service that only recognises user_ids, sharing its gallery."""
+        return ScopedFaceService(self, GalleryScope(user_ids))
+
+    def process_frame(
+        self,
+        frame: np.ndarray,
+        top_k: int = 1,
+        scope: Optional[GalleryScope] = None,
+        tracker: Optional[FaceTracker] = None,
+        tiling: Optional[TileLayout] = None,
+    ) -> List[dict]:
         """
         Process a single frame and return detected faces with identities.
 
         Args:
             frame: BGR frame from webcam
+            top_k: when > 1, each result also carries a "candidates" list of the
+                   top_k (user_id, similarity) pairs, best first
+            scope: restrict matching to these users (e.g. one class)
+            tracker: the stream's face tracker; results then carry a
+                     "track_id" and tracked faces skip re-embedding
+            tiling: the camera's detection tile layout, if any
 
         Returns:
             List of face detection results with bounding boxes and identities.
         """
-        face_results = self._pipeline.process_frame(frame)
+        frame_faces = self._pipeline.embed_frame(frame, tracker=tracker, tiling=tiling)
+        return self.match_frame(frame_faces, top_k=top_k, scope=scope)
+
+    def embed_frame(
+        self,
+        frame: np.ndarray,
+        tracker: Optional[FaceTracker] = None,
+        tiling: Optional[TileLayout] = None,
+    ) -> FrameFaces:
+        """Detect and embed every face of a frame, without matching."""
+        return self._pipeline.embed_frame(frame, tracker=tracker, tiling=tiling)
+
+    def pipeline_stats(self) -> dict:
+        """Frames, detected and embedded faces, and quality-gate rejections so far."""
+        return self._pipeline.stats()
+
+    def match_frame(
+        self,
+        frame_faces: FrameFaces,
+        top_k: int = 1,
+        scope: Optional[GalleryScope] = None,
+    ) -> List[dict]:
+        """
+        Identify the faces of an already embedded frame (see process_frame).
+
+        Tracked faces keep their track's identity while they match nobody.
+        Faces the quality gate rejected carry a "quality" reason.
+        """
+        matches = self.match_embeddings(frame_faces.embeddings, top_k=top_k, scope=scope)
+        tracks = frame_faces.tracks or [None] * len(frame_faces)
+        rejected = frame_faces.rejected or [None] * len(frame_faces)
 
         results = []
-        for face in face_results:
-            user_id, confidence = self._match_face(face["embedding"])
-            results.append({
+        for detection, track, reason, (user_id, confidence, candidates) in zip(
+            frame_faces.detections, tracks, rejected, matches
+        ):
+            if reason is not None:
+                # Not embedded: shown as an unknown face unless its track is known.
+                user_id, confidence, candidates = None, 0.0, []
+            if track is not None:
+                user_id, confidence = track.identify(user_id, confidence)
+            result = {
                 "user_id": user_id,
                 "confidence": confidence,
-                "bbox": face["bbox"],
-            })
+                "bbox": detection.bbox,
+            }
+            if track is not None:
+                result["track_id"] = track.track_id
+            if reason is not None:
+                result["quality"] = reason
+            if top_k > 1:
+                result["candidates"] = candidates
+            results.append(result)
 
         return results
 
-    def _match_face(self, encoding: np.ndarray) -> Tuple[Optional[uuid.UUID], float]:
+    def match_embeddings(
+        self,
+        embeddings: np.ndarray,
+        top_k: int = 1,
+        one_to_one: Optional[bool] = None,
+        scope: Optional[GalleryScope] = None,
+    ) -> List[Tuple[Optional[uuid.UUID], float, List[Tuple[uuid.UUID, float]]]]:
         """
-        Match a 512-dim unit-vector embedding against known faces using cosine similarity.
+        Match every face of a frame against known faces with a single matrix product.
+
+        Args:
+            embeddings: (N, 512) unit-vector embeddings
+            top_k: candidates to return per face
+            one_to_one: prevent two faces from claiming the same user
+                        (defaults to settings.MATCH_ONE_TO_ONE)
+            scope: restrict matching to these users (e.g. one class)
 
         Returns:
-            Tuple of (user_id or None, confidence score)
+            Per face: (user_id or None, confidence, [(user_id, similarity), ...] top_k)
         """
-        if self._known_matrix is None:
-            return None, 0.0
+        one_to_one = self.one_to_one if one_to_one is None else one_to_one
+        search_k = max(top_k, ASSIGNMENT_CANDIDATES) if one_to_one else top_k
+
+        # Only take a consistent snapshot under the lock, so streams match
+        # concurrently and enrollments do not wait behind a search.
+        with self._lock:
+            if len(self._gallery) == 0 or len(embeddings) == 0:
+                return [(None, 0.0, []) for _ in range(len(embeddings))]
+            index = self._index.snapshot()
+            mask = self._search_mask(scope)
+            row_ids = self._gallery.row_ids()
 
         # Cosine similarity: dot product of unit vectors
-        similarities = self._known_matrix @ encoding  # (N,)
-        best_idx = int(np.argmax(similarities))
-        best_similarity = float(similarities[best_idx])
+        scores, rows = index.search(embeddings, search_k, mask=mask)
+        if one_to_one:
+            chosen = assign_one_to_one(scores, rows, self.threshold)
+        else:
+            chosen = best_matches(scores, rows, self.threshold)
+
+        matches = []
+        for face_idx, row in enumerate(chosen):
+            candidates = [
+                (row_ids[r], round(float(s), 3))
+                for r, s in zip(rows[face_idx, :top_k], scores[face_idx, :top_k])
+                if r >= 0 and row_ids[r] is not None
+            ]
+            # A user removed since the snapshot was taken reads None: no match.
+            if row < 0 or row_ids[row] is None:
+                matches.append((None, 0.0, candidates))
+                continue
+            similarity = float(scores[face_idx][rows[face_idx] == row][0])
+            matches.append((row_ids[row], round(similarity, 3), candidates))
+        return matches
+
+    def _search_mask(self, scope: Optional[GalleryScope] = None) -> Optional[np.ndarray]:
+        """Rows eligible for matching, or None when every stored row is."""
+        if scope is not None:
+            return scope.mask(self._gallery)
+        if self._gallery.tombstones == 0:
+            return None
+        return self._gallery.alive
+
+
+class ScopedFaceService:
+    """
+    A FaceService restricted to a subset of users, e.g. the roster of one class.
+
+    Scopes share the parent's pipeline, gallery and index, so opening a class
+    stream costs an id list rather than a copy of every member's encoding, and
+    enrollments made through the parent are visible to every scope at once.
+    """
+
+    def __init__(self, face_service: FaceService, scope: GalleryScope):
+        self.face_service = face_service
+        self.scope = scope
+
+    @property
+    def threshold(self) -> float:
+        return self.face_service.threshold
+
+    @property
+    def known_encodings(self) -> Dict[uuid.UUID, np.ndarray]:
+        """Enrolled encodings of the scope's users, looked up by id rather than filtered from the gallery."""
+        parent = self.face_service
+        with parent._lock:
+            encodings = {user_id: parent._gallery.get(user_id) for user_id in self.scope.item_ids}
+        return {user_id: encoding for user_id, encoding in encodings.items() if encoding is not None}
+
+    def extract_face_encoding(self, image: np.ndarray) -> Optional[np.ndarray]:
+        return self.face_service.extract_face_encoding(image)
+
+    def process_frame(
+        self,
+        frame: np.ndarray,
+        top_k: int = 1,
+        tracker: Optional[FaceTracker] = None,
+        tiling: Optional[TileLayout] = None,
+    ) -> List[dict]:
+        return self.face_service.process_frame(frame, top_k=top_k, scope=self.scope, tracker=tracker, tiling=tiling)
+
+    def embed_frame(
+        self,
+        frame: np.ndarray,
+        tracker: Optional[FaceTracker] = None,
+        tiling: Optional[TileLayout] = None,
+    ) -> FrameFaces:
+        return self.face_service.embed_frame(frame, tracker=tracker, tiling=tiling)
 
-        if best_similarity >= self.threshold:
-            return self._known_ids[best_idx], round(best_similarity, 3)
+    def match_frame(self, frame_faces: FrameFaces, top_k: int = 1) -> List[dict]:
+        return self.face_service.match_frame(frame_faces, top_k=top_k, scope=self.scope)
 
-        return None, 0.0
+    def match_embeddings(
+        self,
+        embeddings: np.ndarray,
+        top_k: int = 1,
+        one_to_one: Optional[bool] = None,
+    ) -> List[Tuple[Optional[uuid.UUID], float, List[Tuple[uuid.UUID, float]]]]:
+        return self.face_service.match_embeddings(
+            embeddings, top_k=top_k, one_to_one=one_to_one, scope=self.scope
+        )
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class LatestFrameSlot:
+    """
+    Single-slot frame buffer between a capture thread and asyncio consumers.
+
+    The writer never blocks: each new frame overwrites the previous one, so
+    consumers always get the freshest image and frames nobody read in time
+    are dropped (and counted). Frames carry a sequence number so several
+    consumers can each wait for "a frame newer than the one I had".
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frame: Optional[np.ndarray] = None
+        self._seq = 0
+        self._read_seq = 0
+        self._closed = False
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self.dropped = 0
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, frame: np.ndarray):
+        """Publish a frame (from any thread), replacing the current one."""
+        with self._lock:
+            if self._closed:
+                return
+            if self._seq > self._read_seq:
+                self.dropped += 1
+            self._frame = frame
+            self._seq += 1
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def close(self):
+        """Mark the source as finished and wake every waiting consumer."""
+        with self._lock:
+            self._closed = True
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def latest(self) -> Tuple[int, Optional[np.ndarray]]:
+        """(sequence number, frame) of the current frame without waiting."""
+        with self._lock:
+            self._read_seq = self._seq
+            return self._seq, self._frame
+
+    async def get(self, after: int = 0) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Wait for a frame newer than sequence number after.
+
+        Returns:
+            (seq, frame), or (seq, None) once the slot is closed.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._seq > after:
+                    self._read_seq = self._seq
+                    return self._seq, self._frame
+                if self._closed:
+                    return self._seq, None
+                future = loop.create_future()
+                self._waiters.append((loop, future))
+            await future
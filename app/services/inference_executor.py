@@ -0,0 +1,124 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from app.config import get_settings
+
+EXECUTOR_KINDS = ("thread", "process")
+
+# Pipeline of a process-pool worker, created once by the pool initializer.
+_worker_pipeline = None
+
+
+def _init_worker_pipeline():
+    global _worker_pipeline
+    from app.face import create_pipeline
+
+    _worker_pipeline = create_pipeline(get_settings())
+
+
+def _embed_frame_in_worker(frame: np.ndarray, tiling=None):
+    return _worker_pipeline.embed_frame(frame, tiling=tiling)
+
+
+class InferenceExecutor:
+    """
+    Runs the blocking per-frame work of video streams (ONNX inference, box
+    drawing, JPEG encoding) off the event loop, so one busy stream cannot
+    stall the REST requests served by the same worker.
+
+    Admission is bounded: at most max_pending frames are in flight across all
+    streams. When full, process_frame returns None at once and the caller
+    drops the frame, so a saturated pool sheds load instead of queueing
+    frames that are stale by the time they run.
+
+    In "process" mode detection and embedding run in worker processes that
+    each load their own pipeline; matching stays in this process so every
+    stream keeps sharing one gallery.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 0, kind: str = "thread"):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(
+                f"Unknown inference executor: '{kind}'. "
+                "Valid options are 'thread' and 'process'."
+            )
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending or 2 * self.max_workers
+        self._threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        self._processes: Optional[ProcessPoolExecutor] = None
+        if kind == "process":
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                # fork would copy ONNX Runtime's threads' locks in whatever state they are in
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker_pipeline,
+            )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.dropped = 0
+        self.completed = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _try_admit(self) -> bool:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending += 1
+            return True
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    async def run(self, fn: Callable, *args):
+        """Run fn(*args) on the pool's threads and await its result."""
+        return await asyncio.get_running_loop().run_in_executor(self._threads, functools.partial(fn, *args))
+
+    async def process_frame(self, face_service, frame: np.ndarray, tracker=None, tiling=None) -> Optional[List[dict]]:
+        """
+        face_service.process_frame(frame, tracker=tracker, tiling=tiling) off the event loop.
+
+        Tracking only applies in "thread" mode: process workers keep no
+        per-stream state, so they embed every face. The tile layout (plain
+        data) is sent along to them.
+
+        Returns:
+            The recognised faces, or None if the executor is saturated and the
+            frame was not admitted.
+        """
+        if not self._try_admit():
+            return None
+        try:
+            if self._processes is None:
+                options = {name: value for name, value in (("tracker", tracker), ("tiling", tiling)) if value is not None}
+                return await self.run(functools.partial(face_service.process_frame, **options), frame)
+            loop = asyncio.get_running_loop()
+            frame_faces = await loop.run_in_executor(self._processes, _embed_frame_in_worker, frame, tiling)
+            return await self.run(face_service.match_frame, frame_faces)
+        finally:
+            self._release()
+
+    def shutdown(self, wait: bool = True):
+        self._threads.shutdown(wait=wait)
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait)
+
+
+def create_inference_executor(settings) -> InferenceExecutor:
+    return InferenceExecutor(
+        max_workers=settings.INFERENCE_WORKERS,
+        max_pending=settings.INFERENCE_MAX_PENDING,
+        kind=settings.INFERENCE_EXECUTOR.lower(),
+    )
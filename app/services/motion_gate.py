@@ -0,0 +1,87 @@
+import time
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+
+# Motion is measured on a blurred greyscale thumbnail this wide, split into a grid of regions.
+THUMBNAIL_WIDTH = 160
+GRID = (6, 8)  # rows, columns
+
+
+class MotionGate:
+    """
+    Cheap scene-change test in front of recognition.
+
+    Each frame is reduced to a small blurred greyscale thumbnail and compared
+    with the thumbnail of the last frame that was recognised. If the share
+    of changed pixels (grey level moved by more than pixel_threshold) stays
+    under region_fraction in every grid region, nothing entered, left or
+    moved and the recognition is skipped. Comparing against the last
+    recognised frame rather than the previous one means slow drift still
+    triggers eventually, and a full recognition is forced every
+    refresh_seconds regardless (0 disables the forced refresh).
+    """
+
+    def __init__(
+        self,
+        pixel_threshold: int = 25,
+        region_fraction: float = 0.02,
+        refresh_seconds: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.pixel_threshold = pixel_threshold
+        self.region_fraction = region_fraction
+        self.refresh_seconds = refresh_seconds
+        self._clock = clock
+        self._reference: Optional[np.ndarray] = None
+        self._refreshed_at = 0.0
+        self.passed = 0  # recognitions allowed through
+        self.saved = 0   # recognitions skipped on a static scene
+        self.forced = 0  # recognitions run only because the refresh interval elapsed
+
+    @staticmethod
+    def _thumbnail(frame: np.ndarray) -> np.ndarray:
+        grey = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        height, width = grey.shape
+        size = (THUMBNAIL_WIDTH, max(GRID[0], round(height * THUMBNAIL_WIDTH / width)))
+        # Blur so sensor noise and JPEG artefacts do not count as motion.
+        return cv2.GaussianBlur(cv2.resize(grey, size, interpolation=cv2.INTER_AREA), (5, 5), 0)
+
+    def changed_regions(self, thumbnail: np.ndarray) -> int:
+        """Grid regions of thumbnail that changed since the last recognised frame."""
+        rows, cols = GRID
+        changed = cv2.absdiff(thumbnail, self._reference) > self.pixel_threshold
+        height = changed.shape[0] - changed.shape[0] % rows
+        width = changed.shape[1] - changed.shape[1] % cols
+        regions = changed[:height, :width].reshape(rows, height // rows, cols, width // cols).mean(axis=(1, 3))
+        return int(np.count_nonzero(regions > self.region_fraction))
+
+    def should_recognise(self, frame: np.ndarray) -> bool:
+        """Whether frame differs enough from the last recognised one (or a refresh is due)."""
+        now = self._clock()
+        thumbnail = self._thumbnail(frame)
+        static = (
+            self._reference is not None
+            and self._reference.shape == thumbnail.shape
+            and not self.changed_regions(thumbnail)
+        )
+        if static:
+            if not self.refresh_seconds or now - self._refreshed_at < self.refresh_seconds:
+                self.saved += 1
+                return False
+            self.forced += 1
+        self._reference = thumbnail
+        self._refreshed_at = now
+        self.passed += 1
+        return True
+
+
+def create_motion_gate(settings) -> Optional[MotionGate]:
+    if not settings.MOTION_GATE_ENABLED:
+        return None
+    return MotionGate(
+        pixel_threshold=settings.MOTION_GATE_PIXEL_THRESHOLD,
+        region_fraction=settings.MOTION_GATE_REGION_FRACTION,
+        refresh_seconds=settings.MOTION_GATE_REFRESH_SECONDS,
+    )
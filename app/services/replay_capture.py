@@ -0,0 +1,229 @@
+"""
+Recorded and synthetic frame sources for offline runs and benchmarks.
+
+Each source stands in for cv2.VideoCapture (isOpened/read/get/set/release),
+so CameraService, its capture thread and everything downstream run exactly
+as with a live camera:
+
+- a video file path (decoded by OpenCV; one of VIDEO_EXTENSIONS),
+- a directory of JPEG/PNG images, replayed in name order,
+- "synthetic://WIDTHxHEIGHT?frames=N": generated frames (a box moving over
+  a noisy gradient), endless when frames is 0 or omitted.
+
+"realtime" pacing delivers frames at the source's frame rate, like a
+camera; "fast" delivers them as fast as they can be read, so the
+pipeline's own throughput is the limit.
+"""
+import os
+import time
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+import numpy as np
+
+REPLAY_PACINGS = ("realtime", "fast")
+SYNTHETIC_SCHEME = "synthetic"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+VIDEO_EXTENSIONS = (".mp4", ".m4v", ".mov", ".avi", ".mkv", ".webm", ".mpg", ".mpeg", ".ts")
+DEFAULT_SYNTHETIC_SIZE = (640, 480)
+DEFAULT_REPLAY_FPS = 10.0  # for sources without a frame rate of their own
+
+
+def check_replay_pacing(pacing: str) -> str:
+    pacing = pacing.lower()
+    if pacing not in REPLAY_PACINGS:
+        raise ValueError(
+            f"Unknown replay pacing: '{pacing}'. "
+            "Valid options are 'realtime' and 'fast'."
+        )
+    return pacing
+
+
+def _image_paths(directory: str) -> List[str]:
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def is_replay_source(source) -> bool:
+    """
+    Whether source is a replay source (synthetic://, a video file or a
+    directory of images) rather than a device or stream URL.
+
+    Raises ValueError for a local directory without images or a local file
+    that is not a video, rather than handing them to OpenCV as a camera.
+    """
+    if not isinstance(source, str):
+        return False
+    if source.startswith(f"{SYNTHETIC_SCHEME}://"):
+        return True
+    if os.path.isdir(source):
+        if not _image_paths(source):
+            raise ValueError(f"Invalid replay source: '{source}'. The directory holds no JPEG/PNG images.")
+        return True
+    if os.path.isfile(source):
+        if not source.lower().endswith(VIDEO_EXTENSIONS):
+            raise ValueError(
+                f"Invalid replay source: '{source}'. Valid options are a video file "
+                f"({', '.join(VIDEO_EXTENSIONS)}), a directory of JPEG/PNG images "
+                "or synthetic://WIDTHxHEIGHT?frames=N."
+            )
+        return True
+    return False
+
+
+class SyntheticCapture:
+    """Generated frames: a bright box sweeping over a fixed noisy gradient."""
+
+    def __init__(self, width: int = 640, height: int = 480, frames: int = 0):
+        self.width = width
+        self.height = height
+        self.frames = frames
+        self._index = 0
+        rng = np.random.default_rng(0)
+        gradient = np.linspace(0, 200, width, dtype=np.float32)[None, :, None]
+        self._background = np.clip(gradient + rng.normal(0, 12, size=(height, width, 3)), 0, 255).astype(np.uint8)
+
+    def isOpened(self) -> bool:
+        return True
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self.frames and self._index >= self.frames:
+            return False, None
+        frame = self._background.copy()
+        box = max(8, self.height // 4)
+        x = (self._index * 8) % max(1, self.width - box)
+        y = (self.height - box) // 2
+        frame[y:y + box, x:x + box] = 255
+        self._index += 1
+        return True, frame
+
+    def get(self, prop) -> float:
+        return 0.0
+
+    def set(self, prop, value) -> bool:
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self._index = int(value)
+            return True
+        return False
+
+    def release(self):
+        pass
+
+
+class ImageDirectoryCapture:
+    """Images of a directory (JPEG/PNG), read in file-name order."""
+
+    def __init__(self, directory: str):
+        self.paths: List[str] = _image_paths(directory)
+        self._index = 0
+
+    def isOpened(self) -> bool:
+        return bool(self.paths)
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        while self._index < len(self.paths):
+            frame = cv2.imread(self.paths[self._index])
+            self._index += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def get(self, prop) -> float:
+        return 0.0
+
+    def set(self, prop, value) -> bool:
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self._index = int(value)
+            return True
+        return False
+
+    def release(self):
+        pass
+
+
+class ReplayCapture:
+    """
+    Paces (and optionally loops) a finite capture.
+
+    With "realtime" pacing read() blocks until the next frame is due at fps;
+    frames are never burst to catch up after a slow reader.
+    """
+
+    def __init__(self, capture, fps: float, pacing: str = "realtime", loop: bool = False):
+        self.capture = capture
+        self.fps = fps
+        self.pacing = check_replay_pacing(pacing)
+        self.loop = loop
+        self._next_due: Optional[float] = None
+
+    def isOpened(self) -> bool:
+        return self.capture.isOpened()
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self.pacing == "realtime" and self.fps > 0:
+            now = time.monotonic()
+            if self._next_due is not None and self._next_due > now:
+                time.sleep(self._next_due - now)
+            self._next_due = max(self._next_due or now, now) + 1.0 / self.fps
+        ret, frame = self.capture.read()
+        if not ret and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.capture.read()
+        return ret, frame
+
+    def get(self, prop) -> float:
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        return self.capture.get(prop)
+
+    def set(self, prop, value) -> bool:
+        return self.capture.set(prop, value)
+
+    def release(self):
+        self.capture.release()
+
+
+def _synthetic_capture(source: str) -> SyntheticCapture:
+    url = urlparse(source)
+    width, height = DEFAULT_SYNTHETIC_SIZE
+    if url.netloc:
+        try:
+            width, height = (int(part) for part in url.netloc.lower().split("x"))
+        except ValueError:
+            raise ValueError(
+                f"Invalid synthetic source: '{source}'. Expected synthetic://WIDTHxHEIGHT?frames=N."
+            ) from None
+    frames = int(parse_qs(url.query).get("frames", ["0"])[0])
+    return SyntheticCapture(width=width, height=height, frames=frames)
+
+
+def open_replay_capture(
+    source: str,
+    open_video: Callable[[str], object] = cv2.VideoCapture,
+    pacing: str = "realtime",
+    fps: float = 0,
+    loop: bool = False,
+) -> ReplayCapture:
+    """
+    Open a replay source (see is_replay_source).
+
+    Args:
+        source: synthetic:// URL, image directory or video file path
+        open_video: opens a video file (cv2.VideoCapture)
+        pacing: "realtime" or "fast"
+        fps: replay rate; 0 uses the video's own frame rate (image
+             directories and synthetic frames: DEFAULT_REPLAY_FPS)
+        loop: restart from the first frame at the end instead of ending
+    """
+    if source.startswith(f"{SYNTHETIC_SCHEME}://"):
+        capture = _synthetic_capture(source)
+    elif os.path.isdir(source):
+        capture = ImageDirectoryCapture(source)
+    else:
+        capture = open_video(source)
+    native_fps = capture.get(cv2.CAP_PROP_FPS) or DEFAULT_REPLAY_FPS
+    return ReplayCapture(capture, fps=fps or native_fps, pacing=pacing, loop=loop)
@@ -0,0 +1,503 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Callable, Deque, Dict, Hashable, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from app.face.detectors.tiling import TileLayout
+from app.face.tracking import FaceTracker
+from app.services.attendance_service import AttendanceEvent
+from app.services.camera_service import CameraService
+from app.services.inference_executor import InferenceExecutor
+from app.services.motion_gate import MotionGate
+from app.services.stream_scheduler import StreamScheduler
+from app.utils.drawing import draw_face_boxes
+from app.utils.stream_protocol import (
+    FLAG_THUMBNAIL,
+    faces_message,
+    json_faces_message,
+    json_frame_message,
+    json_thumbnail_message,
+    pack_frame,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StreamFrame:
+    """
+    One frame tick, encoded once and shared by every viewer.
+
+    jpeg (the annotated frame) is only rendered when a viewer wants full
+    images, and thumbnail only on the ticks a thumbnail is due.
+    faces_version changes whenever new results were applied, so viewers
+    that only get metadata can skip unchanged face lists.
+    """
+    seq: int
+    jpeg: Optional[bytes]
+    faces: List[dict]
+    timestamp: datetime
+    frame_size: Optional[Tuple[int, int]] = None  # (width, height) of the source frame
+    thumbnail: Optional[bytes] = None
+    faces_version: int = 0
+
+    @cached_property
+    def json_message(self) -> dict:
+        return json_frame_message(self.jpeg, self.faces, self.timestamp)
+
+    @cached_property
+    def binary_messages(self) -> tuple:
+        return faces_message(self.seq, self.faces, self.timestamp), pack_frame(self.jpeg, self.seq, self.timestamp)
+
+    @cached_property
+    def json_faces_message(self) -> dict:
+        return json_faces_message(self.faces, self.timestamp, self.frame_size)
+
+    @cached_property
+    def binary_faces_message(self) -> str:
+        return faces_message(self.seq, self.faces, self.timestamp, frame_size=self.frame_size)
+
+    @cached_property
+    def json_thumbnail_message(self) -> dict:
+        return json_thumbnail_message(self.thumbnail, self.timestamp)
+
+    @cached_property
+    def binary_thumbnail_message(self) -> bytes:
+        return pack_frame(self.thumbnail, self.seq, self.timestamp, flags=FLAG_THUMBNAIL)
+
+
+StreamMessage = Union[StreamFrame, dict]
+
+
+class StreamSubscriber:
+    """
+    One viewer's outbox.
+
+    Frames are lossy: at most max_frames wait in the outbox, and a viewer
+    that falls behind loses its oldest queued frame, so one slow client never
+    delays the pipeline or the other viewers. Control messages (attendance
+    updates, stats, errors) are always delivered.
+    """
+
+    def __init__(self, max_frames: int = 2, image: str = "full"):
+        self.max_frames = max(1, max_frames)
+        self.image = image  # "full", "thumbnail" or "none" (see app.utils.stream_protocol)
+        self._messages: Deque[StreamMessage] = deque()
+        self._frames_queued = 0
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.dropped_frames = 0
+
+    def publish(self, message: StreamMessage):
+        if self.closed:
+            return
+        if isinstance(message, StreamFrame):
+            if self._frames_queued >= self.max_frames:
+                for i, queued in enumerate(self._messages):
+                    if isinstance(queued, StreamFrame):
+                        del self._messages[i]
+                        break
+                self._frames_queued -= 1
+                self.dropped_frames += 1
+            self._frames_queued += 1
+        self._messages.append(message)
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    async def get(self) -> Optional[StreamMessage]:
+        """Next message, or None once the subscriber is closed and drained."""
+        while not self._messages:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        message = self._messages.popleft()
+        if isinstance(message, StreamFrame):
+            self._frames_queued -= 1
+        return message
+
+
+def _render_frame(camera: CameraService, frame: np.ndarray, faces: List[dict], user_names) -> bytes:
+    """Draw the face overlay and JPEG-encode it (blocking; runs on the inference executor)."""
+    return camera.encode_frame(draw_face_boxes(frame, faces, user_names))
+
+
+def _render_thumbnail(camera: CameraService, frame: np.ndarray, width: int) -> bytes:
+    """Downscale (without overlay) and JPEG-encode a thumbnail."""
+    height, frame_width = frame.shape[:2]
+    if frame_width > width:
+        size = (width, max(1, round(height * width / frame_width)))
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    return camera.encode_frame(frame)
+
+
+async def _timed(awaitable):
+    """Await awaitable and return (result, seconds it took)."""
+    start = time.monotonic()
+    result = await awaitable
+    return result, time.monotonic() - start
+
+
+class StreamPipeline:
+    """
+    Capture, recognition and encoding for one camera and recognition scope,
+    run once no matter how many viewers are watching.
+
+    runtime is a RecognitionRuntime (face service, presence trackers and
+    names). record_attendance persists a confirmed AttendanceEvent, and
+    on_stop callbacks release whatever the creator opened for the pipeline
+    (e.g. its database session). Annotated frames are only drawn and
+    encoded while a viewer wants full images; thumbnail viewers get a plain
+    thumbnail_width-pixel JPEG at thumbnail_fps (0: none). With a motion_gate, a due recognition of a
+    frame in which nothing changed is skipped and the previous results are
+    applied again. With a tracker, faces keep a track id (and identity)
+    across recognitions and are only re-embedded when their track needs it.
+    With a tiling, the camera's frames are detected tile by tile.
+    """
+
+    def __init__(
+        self,
+        key: Hashable,
+        camera: CameraService,
+        runtime,
+        executor: InferenceExecutor,
+        scheduler: StreamScheduler,
+        record_attendance: Callable[[AttendanceEvent], None],
+        shared_live_presence_tracker=None,
+        stats_interval: float = 0.0,
+        on_stop: Optional[List[Callable[[], None]]] = None,
+        motion_gate: Optional[MotionGate] = None,
+        thumbnail_fps: float = 1.0,
+        thumbnail_width: int = 320,
+        tracker: Optional[FaceTracker] = None,
+        tiling: Optional[TileLayout] = None,
+    ):
+        self.key = key
+        self.camera = camera
+        self.runtime = runtime
+        self.executor = executor
+        self.scheduler = scheduler
+        self.record_attendance = record_attendance
+        self.shared_live_presence_tracker = shared_live_presence_tracker
+        self.stats_interval = stats_interval
+        self._on_stop = list(on_stop or [])
+        self.motion_gate = motion_gate
+        self.thumbnail_fps = thumbnail_fps
+        self.thumbnail_width = thumbnail_width
+        self._faces_version = 0
+        self.tracker = tracker
+        self.tiling = tiling
+        self._subscribers: List[StreamSubscriber] = []
+        self._task: Optional[asyncio.Task] = None
+        self.finished = False
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, max_frames: int = 2, image: str = "full") -> StreamSubscriber:
+        subscriber = StreamSubscriber(max_frames=max_frames, image=image)
+        self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: StreamSubscriber):
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
+        subscriber.close()
+
+    def _wanted(self, image: str) -> bool:
+        return any(subscriber.image == image for subscriber in self._subscribers)
+
+    def broadcast(self, message: StreamMessage):
+        for subscriber in self._subscribers:
+            subscriber.publish(message)
+
+    def snapshot(self) -> dict:
+        self.scheduler.stats.late_ticks = self.camera.late_ticks
+        snapshot = {
+            **self.scheduler.snapshot(),
+            "viewers": self.subscriber_count,
+            "captured_frames_dropped": self.camera.dropped_frames,
+        }
+        if self.motion_gate is not None:
+            snapshot["recognitions_forced"] = self.motion_gate.forced
+        if self.tracker is not None:
+            snapshot.update(self.tracker.snapshot())
+        return snapshot
+
+    async def start(self) -> bool:
+        """Open the camera (off the event loop) and start the pipeline task."""
+        started = await asyncio.get_running_loop().run_in_executor(None, self.camera.start)
+        if not started:
+            await self._release()
+            return False
+        self._task = asyncio.create_task(self._run())
+        return True
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._release()
+
+    async def _release(self):
+        self.finished = True
+        for subscriber in self._subscribers:
+            subscriber.close()
+        # stop() joins the capture thread, so keep it off the event loop.
+        await asyncio.get_running_loop().run_in_executor(None, self.camera.stop)
+        for callback in self._on_stop:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Stream pipeline cleanup failed")
+        self._on_stop = []
+        logger.info("Stream %s stopped; stats: %s", self.key, self.snapshot())
+
+    def _apply_recognition(self, results: List[dict], fresh: bool = True) -> List[dict]:
+        """
+        Label recognition results, update presence and publish attendance events.
+
+        Results are not fresh when a gated recognition applies the previous
+        ones again. That is no new observation: only labels and live presence
+        are refreshed, while the presence tracker (and so attendance) only
+        counts fresh recognitions. The results were already published, so
+        faces whose label is unchanged are kept as they are, and
+        faces_version only changes when a label did.
+
+        Returns:
+            The labelled faces.
+        """
+        runtime = self.runtime
+        labelled = []
+        for face in results:
+            user_id = face.get("user_id")
+            if user_id:
+                name = runtime.user_names.get(user_id, f"ID: {user_id}")
+                status = runtime.presence_tracker.get_status_for_display(user_id)
+            else:
+                name, status = None, "unknown"
+            if "status" in face and face["name"] == name and face["status"] == status:
+                labelled.append(face)
+            else:
+                labelled.append({**face, "name": name, "status": status})
+        if fresh or any(new is not old for new, old in zip(labelled, results)):
+            self._faces_version += 1
+        results = labelled
+
+        seen_user_ids = [face["user_id"] for face in results if face.get("user_id") is not None]
+        if runtime.live_presence_tracker is not None:
+            runtime.live_presence_tracker.mark_seen(seen_user_ids)
+        if (
+            self.shared_live_presence_tracker is not None
+            and self.shared_live_presence_tracker is not runtime.live_presence_tracker
+        ):
+            self.shared_live_presence_tracker.mark_seen(seen_user_ids)
+
+        if not fresh:
+            return results
+        for event in runtime.presence_tracker.update(results):
+            self.record_attendance(event)
+            self.broadcast({
+                "type": "attendance_update",
+                "user_id": str(event.user_id),
+                "name": runtime.user_names.get(event.user_id, f"ID: {event.user_id}"),
+                "confidence": event.confidence,
+                "timestamp": event.timestamp.isoformat(),
+            })
+        return results
+
+    async def _run(self):
+        scheduler = self.scheduler
+        recognition: Optional[asyncio.Task] = None
+        faces: List[dict] = []
+        seq = 0
+        next_stats_at = time.monotonic() + self.stats_interval
+        next_thumbnail_at = 0.0
+
+        try:
+            async for frame in self.camera.get_frames(fps=scheduler.preview_fps):
+                try:
+                    if recognition is not None and recognition.done():
+                        task, recognition = recognition, None
+                        try:
+                            results, elapsed = task.result()
+                        except Exception:
+                            scheduler.recognition_finished(completed=False)
+                            raise
+                        # None: executor saturated by other streams; keep showing the last results.
+                        scheduler.recognition_finished(elapsed, completed=results is not None)
+                        if results is not None:
+                            faces = self._apply_recognition(results)
+
+                    if scheduler.recognition_due():
+                        if self.motion_gate is not None and not self.motion_gate.should_recognise(frame):
+                            # Static scene: the same faces are still there.
+                            scheduler.recognition_gated()
+                            faces = self._apply_recognition(faces, fresh=False)
+                        else:
+                            scheduler.recognition_started()
+                            recognition = asyncio.create_task(
+                                _timed(self.executor.process_frame(
+                                    self.runtime.face_service, frame, self.tracker, self.tiling
+                                ))
+                            )
+
+                    jpeg_bytes, render_seconds = None, None
+                    if self._wanted("full"):
+                        jpeg_bytes, render_seconds = await _timed(self.executor.run(
+                            _render_frame, self.camera, frame, faces, self.runtime.user_names
+                        ))
+                    thumbnail = None
+                    thumbnail_due = self.thumbnail_fps > 0 and time.monotonic() >= next_thumbnail_at
+                    if thumbnail_due and self._wanted("thumbnail"):
+                        next_thumbnail_at = time.monotonic() + 1.0 / self.thumbnail_fps
+                        thumbnail = await self.executor.run(
+                            _render_thumbnail, self.camera, frame, self.thumbnail_width
+                        )
+                    seq += 1
+                    height, width = frame.shape[:2]
+                    self.broadcast(StreamFrame(
+                        seq,
+                        jpeg_bytes,
+                        faces,
+                        datetime.now(timezone.utc),
+                        frame_size=(width, height),
+                        thumbnail=thumbnail,
+                        faces_version=self._faces_version,
+                    ))
+                    scheduler.frame_sent(render_seconds)
+
+                    if self.stats_interval and time.monotonic() >= next_stats_at:
+                        next_stats_at += self.stats_interval
+                        self.broadcast({"type": "stats", **self.snapshot()})
+
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error("Frame processing error: %s", str(e), exc_info=True)
+                    continue
+        finally:
+            if recognition is not None:
+                recognition.cancel()
+            # Source ended on its own: let every viewer's connection finish.
+            self.finished = True
+            for subscriber in self._subscribers:
+                subscriber.close()
+
+
+class StreamHub:
+    """
+    Process-wide registry of running stream pipelines, keyed by source and
+    recognition scope. The first viewer of a key starts its pipeline, later
+    viewers share it, and the last one to leave stops it.
+
+    Pipelines are built and started off the event loop and outside the hub
+    lock; concurrent first viewers of one key wait for the same opening
+    rather than each building a pipeline.
+    """
+
+    def __init__(self):
+        self._pipelines: Dict[Hashable, StreamPipeline] = {}
+        self._opening: Dict[Hashable, asyncio.Future] = {}
+        self._lock = asyncio.Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._pipelines
+
+    async def subscribe(
+        self,
+        key: Hashable,
+        create_pipeline: Callable[[], StreamPipeline],
+        max_frames: int = 2,
+        image: str = "full",
+    ) -> Optional[StreamSubscriber]:
+        """
+        Join the pipeline for key, creating and starting it if needed.
+
+        create_pipeline runs on a worker thread (it may query the database).
+
+        Returns:
+            The viewer's subscriber, or None if the pipeline's camera failed to start.
+        """
+        while True:
+            async with self._lock:
+                pipeline = self._pipelines.get(key)
+                if pipeline is not None and not pipeline.finished:
+                    return pipeline.subscribe(max_frames=max_frames, image=image)
+                opening = self._opening.get(key)
+                if opening is None:
+                    # This viewer opens the pipeline; a finished one is stopped first.
+                    finished = self._pipelines.pop(key, None)
+                    opening = self._opening[key] = asyncio.get_running_loop().create_future()
+                    break
+            if await asyncio.shield(opening) is None:
+                return None
+
+        pipeline = None
+        try:
+            if finished is not None:
+                await finished.stop()
+            pipeline = await self._open(create_pipeline)
+        finally:
+            async with self._lock:
+                del self._opening[key]
+                subscriber = None
+                if pipeline is not None:
+                    self._pipelines[key] = pipeline
+                    subscriber = pipeline.subscribe(max_frames=max_frames, image=image)
+            opening.set_result(pipeline)
+        return subscriber
+
+    @staticmethod
+    async def _open(create_pipeline: Callable[[], StreamPipeline]) -> Optional[StreamPipeline]:
+        """Build (on a worker thread) and start a pipeline; None if its camera failed to start."""
+        build = asyncio.get_running_loop().run_in_executor(None, create_pipeline)
+        try:
+            pipeline = await asyncio.shield(build)
+        except asyncio.CancelledError:
+            # The viewer left mid-build: release the pipeline once it exists.
+            def stop_built(done: asyncio.Future):
+                if done.exception() is None:
+                    asyncio.ensure_future(done.result().stop())
+
+            build.add_done_callback(stop_built)
+            raise
+        try:
+            started = await pipeline.start()
+        except BaseException:
+            await pipeline.stop()
+            raise
+        return pipeline if started else None
+
+    async def unsubscribe(self, key: Hashable, subscriber: StreamSubscriber):
+        """Leave the pipeline for key, stopping it if this was its last viewer."""
+        async with self._lock:
+            pipeline = self._pipelines.get(key)
+            if pipeline is None or subscriber not in pipeline._subscribers:
+                # Its pipeline finished and was already replaced (and stopped).
+                subscriber.close()
+                return
+            pipeline.unsubscribe(subscriber)
+            if pipeline.subscriber_count and not pipeline.finished:
+                return
+            del self._pipelines[key]
+        # Camera teardown joins the capture thread: other viewers must not wait for it.
+        await pipeline.stop()
+
+    def stats(self) -> Dict[Hashable, dict]:
+        return {key: pipeline.snapshot() for key, pipeline in self._pipelines.items()}
@@ -0,0 +1,142 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass
+class StreamStats:
+    """Per-stream counters; rates are averaged since the stream started."""
+    started_at: float
+    frames_sent: int = 0
+    frames_rendered: int = 0       # annotated and JPEG-encoded (only while a viewer wants full images)
+    recognitions: int = 0
+    recognitions_skipped: int = 0  # due while the previous one was still running
+    recognitions_dropped: int = 0  # refused by a saturated executor, or failed
+    recognitions_gated: int = 0    # skipped by the motion gate: the scene had not changed
+    late_ticks: int = 0            # preview ticks lost because a frame overran its slot
+    inference_seconds: float = 0.0
+    last_inference_seconds: float = 0.0
+    render_seconds: float = 0.0    # drawing + JPEG encoding of sent frames
+
+    def snapshot(self, now: float) -> dict:
+        elapsed = max(now - self.started_at, 1e-9)
+        return {
+            "uptime_seconds": round(elapsed, 1),
+            "preview_fps": round(self.frames_sent / elapsed, 2),
+            "recognition_fps": round(self.recognitions / elapsed, 2),
+            "frames_sent": self.frames_sent,
+            "frames_rendered": self.frames_rendered,
+            "recognitions": self.recognitions,
+            "recognitions_skipped": self.recognitions_skipped,
+            "recognitions_dropped": self.recognitions_dropped,
+            "recognitions_gated": self.recognitions_gated,
+            "late_ticks": self.late_ticks,
+            "avg_inference_ms": round(1000 * self.inference_seconds / max(self.recognitions, 1), 1),
+            "last_inference_ms": round(1000 * self.last_inference_seconds, 1),
+            "avg_render_ms": round(1000 * self.render_seconds / max(self.frames_rendered, 1), 1),
+        }
+
+
+class StreamScheduler:
+    """
+    Decouples a stream's preview rate from its recognition rate.
+
+    Preview frames go out at preview_fps (paced by the frame source); a
+    recognition is started at most every 1 / recognition_fps seconds and
+    only when the previous one has finished, so slow inference lowers the
+    achieved recognition rate instead of the preview rate. Frames sent
+    between recognitions reuse the last results.
+    """
+
+    def __init__(
+        self,
+        preview_fps: float,
+        recognition_fps: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if preview_fps <= 0 or recognition_fps <= 0:
+            raise ValueError("Stream preview and recognition rates must be positive.")
+        self.preview_fps = preview_fps
+        self.recognition_fps = min(recognition_fps, preview_fps)
+        self.recognition_interval = 1.0 / self.recognition_fps
+        self._clock = clock
+        self.stats = StreamStats(started_at=clock())
+        self._next_recognition = self.stats.started_at
+        # A recognition is due on the preview tick nearest its deadline, not the one after.
+        self._tolerance = 0.5 / preview_fps
+        self._started_at: Optional[float] = None
+
+    @classmethod
+    def from_settings(cls, settings) -> "StreamScheduler":
+        return cls(
+            preview_fps=settings.STREAM_PREVIEW_FPS or settings.PROCESSING_FPS,
+            recognition_fps=settings.STREAM_RECOGNITION_FPS or settings.PROCESSING_FPS,
+        )
+
+    def set_recognition_fps(self, recognition_fps: float):
+        """Change the recognition rate of a running stream (capped at the preview rate)."""
+        if recognition_fps <= 0:
+            raise ValueError("Stream recognition rate must be positive.")
+        self.recognition_fps = min(recognition_fps, self.preview_fps)
+        self.recognition_interval = 1.0 / self.recognition_fps
+
+    @property
+    def recognition_in_flight(self) -> bool:
+        return self._started_at is not None
+
+    def recognition_due(self) -> bool:
+        """Whether the current frame should be sent for recognition."""
+        if self._clock() + self._tolerance < self._next_recognition:
+            return False
+        if self.recognition_in_flight:
+            self.stats.recognitions_skipped += 1
+            return False
+        return True
+
+    def _advance(self, now: float):
+        # Deadline-based, but a missed deadline restarts the cadence from now:
+        # slow inference lowers the rate instead of causing a catch-up burst.
+        self._next_recognition += self.recognition_interval
+        if self._next_recognition <= now:
+            self._next_recognition = now + self.recognition_interval
+
+    def recognition_started(self):
+        now = self._clock()
+        self._started_at = now
+        self._advance(now)
+
+    def recognition_gated(self):
+        """Record a due recognition that was skipped because the scene had not changed."""
+        self.stats.recognitions_gated += 1
+        self._advance(self._clock())
+
+    def recognition_finished(self, elapsed: Optional[float] = None, completed: bool = True):
+        """
+        Record the end of a recognition.
+
+        Args:
+            elapsed: inference time (defaults to the time since recognition_started)
+            completed: False if the executor refused the frame or inference failed
+        """
+        if elapsed is None:
+            elapsed = self._clock() - self._started_at
+        self._started_at = None
+        if not completed:
+            self.stats.recognitions_dropped += 1
+            return
+        self.stats.recognitions += 1
+        self.stats.inference_seconds += elapsed
+        self.stats.last_inference_seconds = elapsed
+
+    def frame_sent(self, render_seconds: Optional[float] = None):
+        """Record a published frame; render_seconds if it was annotated and encoded."""
+        self.stats.frames_sent += 1
+        if render_seconds is not None:
+            self.stats.frames_rendered += 1
+            self.stats.render_seconds += render_seconds
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats.snapshot(self._clock()),
+            "target_recognition_fps": round(self.recognition_fps, 2),
+        }
@@ -0,0 +1,143 @@
+"""
+Wire formats of the /ws/stream video feed.
+
+"json" (default, the original format): one text message per frame with the
+JPEG base64-encoded inside a JSON object.
+
+"binary" (negotiated with ?protocol=binary): per frame, a compact text
+message with the face metadata followed by a binary message holding a fixed
+FRAME_HEADER and the raw JPEG. Both carry the same sequence number, so a
+client can pair them. Attendance updates and errors stay JSON in both modes.
+
+Binary frame header (network byte order, 16 bytes):
+    version u8 | message type u8 | flags u16 | sequence u32 | timestamp ms u64
+
+Independently, ?image= selects what a viewer receives for the picture:
+"full" (default) the annotated frame as above; "thumbnail" a small plain
+JPEG at a low rate (a "thumbnail" JSON message, or a binary frame with
+FLAG_THUMBNAIL set); "none" no image at all. In the last two modes the
+server draws nothing: the faces message (sent whenever the results change)
+carries the source frame's width and height so the client can scale the
+boxes onto the thumbnail or its own video.
+"""
+import base64
+import json
+import struct
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+PROTOCOLS = ("json", "binary")
+IMAGE_MODES = ("full", "thumbnail", "none")
+PROTOCOL_VERSION = 1
+MESSAGE_FRAME = 1
+FLAG_THUMBNAIL = 1
+
+FRAME_HEADER = struct.Struct("!BBHIQ")
+
+
+def check_protocol(protocol: str) -> str:
+    protocol = protocol.lower()
+    if protocol not in PROTOCOLS:
+        raise ValueError(
+            f"Unknown stream protocol: '{protocol}'. "
+            "Valid options are 'json' and 'binary'."
+        )
+    return protocol
+
+
+def check_image_mode(image: str) -> str:
+    image = image.lower()
+    if image not in IMAGE_MODES:
+        raise ValueError(
+            f"Unknown stream image mode: '{image}'. "
+            "Valid options are 'full', 'thumbnail' and 'none'."
+        )
+    return image
+
+
+def _timestamp_ms(timestamp: datetime) -> int:
+    return int(timestamp.timestamp() * 1000)
+
+
+def serialize_faces(faces: List[dict]) -> List[dict]:
+    """Faces with user ids as strings, as the JSON protocol sends them."""
+    return [
+        {**face, "user_id": str(face["user_id"]) if face.get("user_id") else None}
+        for face in faces
+    ]
+
+
+def json_frame_message(jpeg_bytes: bytes, faces: List[dict], timestamp: datetime) -> dict:
+    """The original frame message: base64 JPEG and faces in one JSON object."""
+    return {
+        "type": "frame",
+        "image": base64.b64encode(jpeg_bytes).decode("utf-8"),
+        "faces": serialize_faces(faces),
+        "timestamp": timestamp.isoformat(),
+    }
+
+
+def json_faces_message(faces: List[dict], timestamp: datetime, frame_size: Tuple[int, int]) -> dict:
+    """Face metadata without an image, for JSON viewers that draw their own overlay."""
+    return {
+        "type": "faces",
+        "faces": serialize_faces(faces),
+        "width": frame_size[0],
+        "height": frame_size[1],
+        "timestamp": timestamp.isoformat(),
+    }
+
+
+def json_thumbnail_message(jpeg_bytes: bytes, timestamp: datetime) -> dict:
+    return {
+        "type": "thumbnail",
+        "image": base64.b64encode(jpeg_bytes).decode("utf-8"),
+        "timestamp": timestamp.isoformat(),
+    }
+
+
+def faces_message(
+    seq: int,
+    faces: List[dict],
+    timestamp: datetime,
+    frame_size: Optional[Tuple[int, int]] = None,
+) -> str:
+    """
+    Compact metadata message of the binary protocol.
+
+    Each face is [x, y, width, height, user_id, name, confidence, status];
+    frame_size adds the source frame's "w" and "h".
+    """
+    rows = []
+    for face in faces:
+        bbox = face["bbox"]
+        user_id = face.get("user_id")
+        rows.append([
+            bbox["x"], bbox["y"], bbox["width"], bbox["height"],
+            str(user_id) if user_id else None,
+            face.get("name"),
+            face.get("confidence", 0.0),
+            face.get("status"),
+        ])
+    message = {"type": "faces", "seq": seq, "ts": _timestamp_ms(timestamp), "faces": rows}
+    if frame_size is not None:
+        message["w"], message["h"] = frame_size
+    return json.dumps(message, separators=(",", ":"))
+
+
+def pack_frame(jpeg_bytes: bytes, seq: int, timestamp: Optional[datetime] = None, flags: int = 0) -> bytes:
+    """Binary frame message: FRAME_HEADER followed by the raw JPEG."""
+    timestamp = timestamp or datetime.now(timezone.utc)
+    header = FRAME_HEADER.pack(PROTOCOL_VERSION, MESSAGE_FRAME, flags, seq & 0xFFFFFFFF, _timestamp_ms(timestamp))
+    return header + jpeg_bytes
+
+
+def unpack_frame(message: bytes) -> Tuple[int, datetime, bytes]:
+    """Inverse of pack_frame: (seq, timestamp, jpeg_bytes)."""
+    if len(message) < FRAME_HEADER.size:
+        raise ValueError("Binary frame message is shorter than its header.")
+    version, message_type, _, seq, timestamp_ms = FRAME_HEADER.unpack_from(message)
+    if version != PROTOCOL_VERSION or message_type != MESSAGE_FRAME:
+        raise ValueError(f"Unsupported binary frame message (version {version}, type {message_type}).")
+    timestamp = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
+    return seq, timestamp, message[FRAME_HEADER.size:]
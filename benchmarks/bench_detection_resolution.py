@@ -0,0 +1,103 @@
+"""
+Latency and recall of face detection at reduced resolutions.
+
+Replays frames from a recorded clip, image directory or synthetic source
+through the configured pipeline once per DETECTION_MAX_SIDE value. Full
+resolution (0) is the reference: recall is the share of its faces found
+again (IoU >= --match-iou), and embedding agreement the mean cosine
+similarity of their embeddings, which stays near 1 because faces are
+aligned from the full-resolution frame whatever the detection resolution.
+
+    python -m benchmarks.bench_detection_resolution --source lecture_1080p.mp4 --frames 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+
+def read_frames(source: str, count: int):
+    from app.services.replay_capture import open_replay_capture
+
+    capture = open_replay_capture(source, pacing="fast")
+    frames = []
+    try:
+        while len(frames) < count:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frames.append(frame)
+    finally:
+        capture.release()
+    return frames
+
+
+def run(pipeline, frames):
+    """Per-frame detection and total seconds, and each frame's FrameFaces."""
+    pipeline.embed_frame(frames[0])  # warm-up
+    detect_seconds, total_seconds, results = [], [], []
+    for frame in frames:
+        start = time.perf_counter()
+        pipeline.detect(frame)
+        detect_seconds.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        results.append(pipeline.embed_frame(frame))
+        total_seconds.append(time.perf_counter() - start)
+    return detect_seconds, total_seconds, results
+
+
+def compare(reference, results, match_iou: float):
+    """(recall, mean cosine similarity of matched faces) against the reference results."""
+    from app.face.tracking import bbox_corners, iou_matrix
+
+    expected = found = 0
+    similarities = []
+    for ref, res in zip(reference, results):
+        expected += len(ref)
+        if not len(ref) or not len(res):
+            continue
+        overlaps = iou_matrix(
+            np.stack([bbox_corners(d.bbox) for d in ref.detections]),
+            np.stack([bbox_corners(d.bbox) for d in res.detections]),
+        )
+        for i, j in enumerate(overlaps.argmax(axis=1)):
+            if overlaps[i, j] >= match_iou:
+                found += 1
+                similarities.append(float(ref.embeddings[i] @ res.embeddings[j]))
+    recall = found / expected if expected else 1.0
+    return recall, float(np.mean(similarities)) if similarities else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", required=True, help="video file, image directory or synthetic://WxH")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--sides", default="0,1280,960,640,480,320", help="DETECTION_MAX_SIDE values; 0 first")
+    parser.add_argument("--match-iou", type=float, default=0.5)
+    args = parser.parse_args()
+
+    from app.config import get_settings
+    from app.face import create_pipeline
+
+    frames = read_frames(args.source, args.frames)
+    if not frames:
+        raise SystemExit(f"No frames could be read from {args.source}")
+    height, width = frames[0].shape[:2]
+    settings = get_settings()
+    print(f"{args.source}: {len(frames)} frames of {width}x{height}, {settings.DETECTOR_BACKEND}")
+    print(f"{'max side':>8} {'detect ms':>10} {'p95 ms':>8} {'frame ms':>9} {'faces':>6} {'recall':>7} {'cosine':>7}")
+
+    reference = None
+    for side in (int(value) for value in args.sides.split(",")):
+        pipeline = create_pipeline(settings.model_copy(update={"DETECTION_MAX_SIDE": side}))
+        detect_seconds, total_seconds, results = run(pipeline, frames)
+        if reference is None:
+            reference = results
+        recall, cosine = compare(reference, results, args.match_iou)
+        print(f"{side or 'full':>8} {1000 * np.mean(detect_seconds):>10.1f} "
+              f"{1000 * np.percentile(detect_seconds, 95):>8.1f} {1000 * np.mean(total_seconds):>9.1f} "
+              f"{sum(len(r) for r in results):>6} {recall:>7.3f} {cosine:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Recall and cost of tiled face detection vs. single-pass detection.
+
+Replays frames from a recorded clip, image directory or synthetic source
+and detects them once per tile layout (see DETECTION_TILES). Without
+labels, the reference is the union of every layout's faces (merged by
+IoU >= --match-iou): recall is the share of those a layout finds, overall
+and for faces narrower than --small pixels, the back rows tiling is for.
+
+    python -m benchmarks.bench_detection_tiling --source hall_4k.mp4 --layouts 1x1,2x2,3x2,4x3
+"""
+import argparse
+import time
+
+import numpy as np
+
+
+def union_of(detections, match_iou: float) -> np.ndarray:
+    """Corner boxes of the distinct faces among several layouts' detections of one frame."""
+    from app.face.tracking import iou_matrix
+
+    union = np.empty((0, 4), dtype=np.float32)
+    for boxes in detections:
+        for box in boxes:
+            if not len(union) or iou_matrix(box[None], union).max() < match_iou:
+                union = np.vstack([union, box[None]])
+    return union
+
+
+def found(boxes: np.ndarray, reference: np.ndarray, match_iou: float) -> np.ndarray:
+    """Which reference boxes a layout's boxes matched."""
+    from app.face.tracking import iou_matrix
+
+    if not len(reference):
+        return np.zeros(0, dtype=bool)
+    if not len(boxes):
+        return np.zeros(len(reference), dtype=bool)
+    return iou_matrix(reference, boxes).max(axis=1) >= match_iou
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", required=True, help="video file, image directory or synthetic://WxH")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--layouts", default="1x1,2x2,3x2,4x3", help="COLUMNSxROWS values; 1x1 is single-pass")
+    parser.add_argument("--overlap", type=float, default=0.2)
+    parser.add_argument("--small", type=int, default=32, help="faces narrower than this many pixels are 'small'")
+    parser.add_argument("--match-iou", type=float, default=0.4)
+    args = parser.parse_args()
+
+    from app.config import get_settings
+    from app.face import create_pipeline, parse_tile_layout
+    from app.face.tracking import bbox_corners
+    from benchmarks.bench_detection_resolution import read_frames
+
+    frames = read_frames(args.source, args.frames)
+    if not frames:
+        raise SystemExit(f"No frames could be read from {args.source}")
+    settings = get_settings()
+    pipeline = create_pipeline(settings)
+    pipeline.detect(frames[0])  # warm-up
+    layouts = args.layouts.split(",")
+
+    seconds = {layout: [] for layout in layouts}
+    boxes = {layout: [] for layout in layouts}
+    for layout in layouts:
+        tiling = parse_tile_layout(layout, overlap=args.overlap)
+        for frame in frames:
+            start = time.perf_counter()
+            faces = pipeline.detect(frame, tiling)
+            seconds[layout].append(time.perf_counter() - start)
+            boxes[layout].append(
+                np.stack([bbox_corners(f.bbox) for f in faces]) if faces else np.empty((0, 4), np.float32)
+            )
+
+    references = [union_of([boxes[layout][i] for layout in layouts], args.match_iou) for i in range(len(frames))]
+    total = sum(len(r) for r in references)
+    small = [(r[:, 2] - r[:, 0]) < args.small for r in references]
+    height, width = frames[0].shape[:2]
+    print(f"{args.source}: {len(frames)} frames of {width}x{height}, {settings.DETECTOR_BACKEND}, "
+          f"DETECTION_MAX_SIDE={settings.DETECTION_MAX_SIDE}; {total} distinct faces, "
+          f"{sum(int(s.sum()) for s in small)} under {args.small} px")
+    print(f"{'layout':>7} {'ms/frame':>9} {'p95 ms':>8} {'faces':>7} {'recall':>7} {'small':>7}")
+    for layout in layouts:
+        matched = [found(b, r, args.match_iou) for b, r in zip(boxes[layout], references)]
+        hits = sum(int(m.sum()) for m in matched)
+        small_hits = sum(int(m[s].sum()) for m, s in zip(matched, small))
+        small_total = sum(int(s.sum()) for s in small)
+        print(f"{layout:>7} {1000 * np.mean(seconds[layout]):>9.1f} {1000 * np.percentile(seconds[layout], 95):>8.1f} "
+              f"{sum(len(b) for b in boxes[layout]):>7} {hits / max(total, 1):>7.3f} "
+              f"{small_hits / max(small_total, 1):>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Cost of sequential enrollments: re-stacking the whole gallery per add (the
+previous FaceService behaviour) vs. the growable EmbeddingGallery.
+
+    python -m benchmarks.bench_gallery_enrollment --count 10000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.face.gallery import EmbeddingGallery
+
+
+def enroll_restack(vectors: np.ndarray) -> float:
+    known = {}
+    start = time.perf_counter()
+    for i, vector in enumerate(vectors):
+        known[i] = vector
+        np.stack(list(known.values()))
+    return time.perf_counter() - start
+
+
+def enroll_gallery(vectors: np.ndarray) -> float:
+    gallery = EmbeddingGallery()
+    start = time.perf_counter()
+    for i, vector in enumerate(vectors):
+        gallery.add(i, vector)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=512)
+    args = parser.parse_args()
+
+    vectors = np.random.default_rng(0).normal(size=(args.count, args.dim)).astype(np.float32)
+    for name, run in (("re-stack", enroll_restack), ("gallery", enroll_gallery)):
+        seconds = run(vectors)
+        print(f"{name:>9}: {args.count} enrollments in {seconds:8.3f} s "
+              f"({seconds / args.count * 1e6:8.1f} us/enrollment)")
+
+
+if __name__ == "__main__":
+    main()
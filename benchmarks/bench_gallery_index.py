@@ -0,0 +1,72 @@
+"""
+Recall and latency of the gallery indexes on synthetic identities.
+
+Identities are drawn from a low-rank Gaussian so the gallery has the cluster
+structure real face embeddings have; each query is a noisy re-capture of an
+enrolled identity. Recall@1 is measured against exact dense search.
+
+    python -m benchmarks.bench_gallery_index --sizes 1000 10000 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.face.gallery import DenseIndex, IVFIndex
+
+
+def unit_rows(x: np.ndarray) -> np.ndarray:
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+def synthetic_gallery(rng: np.random.Generator, size: int, dim: int = 512, rank: int = 48) -> np.ndarray:
+    basis = rng.normal(size=(rank, dim))
+    return unit_rows(rng.normal(size=(size, rank)) @ basis + 0.5 * rng.normal(size=(size, dim)))
+
+
+def time_search(index, queries: np.ndarray, faces_per_frame: int, k: int):
+    latencies = []
+    rows = []
+    for start in range(0, len(queries), faces_per_frame):
+        batch = queries[start:start + faces_per_frame]
+        t0 = time.perf_counter()
+        _, batch_rows = index.search(batch, k)
+        latencies.append(time.perf_counter() - t0)
+        rows.append(batch_rows[:, 0])
+    return np.concatenate(rows), np.array(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--faces-per-frame", type=int, default=40)
+    parser.add_argument("--noise", type=float, default=0.03)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'size':>7} {'index':>12} {'build s':>8} {'p50 ms':>8} {'p99 ms':>8} {'recall@1':>9}")
+    for size in args.sizes:
+        gallery = synthetic_gallery(rng, size)
+        picked = rng.choice(size, args.queries, replace=size < args.queries)
+        queries = unit_rows(gallery[picked] + args.noise * rng.normal(size=(args.queries, gallery.shape[1])))
+
+        dense = DenseIndex()
+        dense.build(gallery)
+        truth, latency = time_search(dense, queries, args.faces_per_frame, 1)
+        print(f"{size:>7} {'dense':>12} {0.0:>8.2f} {np.percentile(latency, 50):>8.2f} "
+              f"{np.percentile(latency, 99):>8.2f} {1.0:>9.3f}")
+
+        for nprobe in args.nprobe:
+            ivf = IVFIndex(nprobe=nprobe)
+            t0 = time.perf_counter()
+            ivf.build(gallery)
+            build_s = time.perf_counter() - t0
+            found, latency = time_search(ivf, queries, args.faces_per_frame, 1)
+            print(f"{size:>7} {f'ivf/{nprobe}':>12} {build_s:>8.2f} {np.percentile(latency, 50):>8.2f} "
+                  f"{np.percentile(latency, 99):>8.2f} {(found == truth).mean():>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
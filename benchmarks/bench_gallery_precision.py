@@ -0,0 +1,80 @@
+"""
+Memory, matching latency and accuracy of reduced-precision galleries.
+
+Each precision stores the same identities; top-1 agreement and the largest
+score error are measured against the float32 gallery. Synthetic identities are
+always benchmarked; pass --snapshot to also run on enrolled embeddings from a
+gallery snapshot (queries are then lightly perturbed copies of enrolled rows).
+
+    python -m benchmarks.bench_gallery_precision --sizes 10000 100000
+    python -m benchmarks.bench_gallery_precision --snapshot data/gallery
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.face.gallery import DenseIndex, EmbeddingGallery
+from app.face.gallery.quantization import GALLERY_PRECISIONS
+from app.face.gallery.snapshot import load_snapshot
+from benchmarks.bench_gallery_index import synthetic_gallery, unit_rows
+
+
+def run(label: str, gallery: np.ndarray, queries: np.ndarray, faces_per_frame: int, k: int):
+    reference = None
+    for precision in GALLERY_PRECISIONS:
+        store = EmbeddingGallery(dim=gallery.shape[1], capacity=len(gallery), dtype=precision)
+        store.extend(list(range(len(gallery))), gallery)
+        index = DenseIndex()
+        index.build(store.matrix, store.scales)
+
+        latencies, scores, rows = [], [], []
+        for start in range(0, len(queries), faces_per_frame):
+            t0 = time.perf_counter()
+            batch_scores, batch_rows = index.search(queries[start:start + faces_per_frame], k)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            scores.append(batch_scores)
+            rows.append(batch_rows)
+        scores, rows = np.concatenate(scores), np.concatenate(rows)
+        if reference is None:
+            reference = (scores, rows)
+
+        agreement = (rows[:, 0] == reference[1][:, 0]).mean()
+        score_error = np.abs(scores[:, 0] - reference[0][:, 0]).max()
+        print(f"{label:>12} {len(gallery):>7} {precision:>8} {store.nbytes / 2**20:>8.1f} "
+              f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 99):>8.2f} "
+              f"{agreement:>9.4f} {score_error:>9.5f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--faces-per-frame", type=int, default=40)
+    parser.add_argument("--noise", type=float, default=0.03)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--snapshot", default="", help="gallery snapshot directory with enrolled embeddings")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'gallery':>12} {'size':>7} {'dtype':>8} {'MiB':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'top1 agr':>9} {'max err':>9}")
+
+    def perturbed_queries(gallery):
+        picked = rng.choice(len(gallery), args.queries, replace=len(gallery) < args.queries)
+        return unit_rows(gallery[picked] + args.noise * rng.normal(size=(args.queries, gallery.shape[1])))
+
+    for size in args.sizes:
+        gallery = synthetic_gallery(rng, size)
+        run("synthetic", gallery, perturbed_queries(gallery), args.faces_per_frame, args.top_k)
+
+    if args.snapshot:
+        snapshot = load_snapshot(args.snapshot)
+        if snapshot is None or len(snapshot.ids) == 0:
+            raise SystemExit(f"No usable gallery snapshot in {args.snapshot}")
+        gallery = np.asarray(snapshot.matrix, dtype=np.float32)
+        run("enrolled", gallery, perturbed_queries(gallery), args.faces_per_frame, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
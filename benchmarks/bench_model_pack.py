@@ -0,0 +1,61 @@
+"""
+Compare startup time and peak RSS of loading the InsightFace model pack.
+
+"legacy" reproduces the previous behaviour (one FaceAnalysis per detector and
+embedder); "shared" builds both from the shared ModelPack. Each mode runs in a
+fresh interpreter so the measurements do not contaminate each other.
+
+    python -m benchmarks.bench_model_pack --model-pack buffalo_l
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+_MEASURE = r"""
+import json, resource, sys, time
+mode, pack = sys.argv[1], sys.argv[2]
+baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if mode == "legacy":
+    from insightface.app import FaceAnalysis
+    det = FaceAnalysis(name=pack, allowed_modules=["detection"])
+    det.prepare(ctx_id=-1, det_size=(640, 640))
+    rec = FaceAnalysis(name=pack, allowed_modules=["detection", "recognition"])
+    rec.prepare(ctx_id=-1)
+else:
+    from app.face.detectors.retinaface import RetinaFaceDetector
+    from app.face.embedders.arcface import ArcFaceEmbedder
+    RetinaFaceDetector(model_pack=pack)
+    ArcFaceEmbedder(model_pack=pack)
+elapsed = time.perf_counter() - start
+peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": elapsed, "rss_mb": (peak_kb - baseline_kb) / 1024}))
+"""
+
+
+def measure(mode: str, model_pack: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _MEASURE, mode, model_pack],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model-pack", default="buffalo_l")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for mode in ("legacy", "shared"):
+        runs = [measure(mode, args.model_pack) for _ in range(args.repeat)]
+        seconds = min(r["seconds"] for r in runs)
+        rss_mb = min(r["rss_mb"] for r in runs)
+        print(f"{mode:>7}: startup {seconds:6.2f} s   RSS +{rss_mb:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
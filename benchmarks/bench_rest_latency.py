@@ -0,0 +1,119 @@
+"""
+REST latency while /ws/stream streams run, with and without the inference executor.
+
+Starts the backend in-process (against the configured DATABASE_URL), points
+its default camera at a recorded clip, an image directory or a synthetic://
+source, and opens --streams /ws/stream clients, each with its own
+recognition scope so every client runs its own pipeline. Meanwhile a client
+on its own thread polls a REST endpoint and records each request's latency.
+"executor" is the configured InferenceExecutor; "inline" runs inference and
+rendering on the event loop, as the server did before the executor, which
+is what the executor's REST p99 is measured against.
+
+    python -m benchmarks.bench_rest_latency --source lecture.mp4 --streams 4 --duration 20
+    python -m benchmarks.bench_rest_latency --source "synthetic://1280x720" --endpoint /api/cameras/
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+import urllib.request
+import uuid
+
+from benchmarks.bench_stream_e2e import drain, free_port, percentile_ms
+
+
+def poll(url: str, duration: float, interval: float, stop: threading.Event):
+    """Latency (seconds) of GET url every interval seconds, until duration elapses or stop is set."""
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline and not stop.is_set():
+        start = time.perf_counter()
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+        latencies.append(time.perf_counter() - start)
+        time.sleep(interval)
+    return latencies
+
+
+def inline_executor():
+    """An InferenceExecutor that runs everything on the calling (event loop) thread."""
+    from app.services.inference_executor import InferenceExecutor
+
+    class InlineExecutor(InferenceExecutor):
+        async def run(self, fn, *args):
+            return fn(*args)
+
+    return InlineExecutor(max_workers=1)
+
+
+async def run(mode: str, args):
+    import uvicorn
+
+    from app.api import deps
+    from app.main import app
+
+    if mode == "inline":
+        deps.inference_executor = inline_executor()
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        if serving.done():
+            serving.result()
+        await asyncio.sleep(0.05)
+
+    stop = threading.Event()
+    try:
+        streams = [
+            asyncio.create_task(drain(
+                f"ws://127.0.0.1:{port}/ws/stream?protocol=binary&image=none&class_id={uuid.uuid4()}",
+                args.duration,
+                image_less=True,
+            ))
+            for _ in range(args.streams)
+        ]
+        await asyncio.sleep(args.warmup)
+        latencies = await asyncio.to_thread(
+            poll, f"http://127.0.0.1:{port}{args.endpoint}", args.duration - args.warmup, args.interval, stop
+        )
+        frames = sum(result[0] for result in await asyncio.gather(*streams))
+    finally:
+        stop.set()
+        server.should_exit = True
+        await serving
+        deps.shutdown_services()
+        deps.stream_hub = None  # its lock belongs to this run's event loop
+    return latencies, frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", required=True, help="video file, image directory or synthetic://WxH")
+    parser.add_argument("--pacing", choices=("realtime", "fast"), default="realtime")
+    parser.add_argument("--streams", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per mode")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds of streaming before REST is measured")
+    parser.add_argument("--endpoint", default="/health", help="REST path to poll")
+    parser.add_argument("--interval", type=float, default=0.02, help="seconds between REST requests")
+    parser.add_argument("--modes", default="executor,inline")
+    args = parser.parse_args()
+
+    # Configure the server before the app (and its settings) is imported.
+    os.environ["CAMERA_DEFAULT_SOURCE"] = args.source
+    os.environ["CAMERA_REPLAY_PACING"] = args.pacing
+    os.environ["CAMERA_REPLAY_LOOP"] = "true"
+
+    print(f"{args.source} ({args.pacing}): {args.streams} streams, GET {args.endpoint} every {args.interval * 1000:.0f} ms")
+    print(f"{'mode':>9} {'requests':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'stream fps':>11}")
+    for mode in args.modes.split(","):
+        latencies, frames = asyncio.run(run(mode, args))
+        print(f"{mode:>9} {len(latencies):>9} {percentile_ms(latencies, 50):>8.1f} "
+              f"{percentile_ms(latencies, 99):>8.1f} {1000 * max(latencies, default=0):>8.1f} "
+              f"{frames / args.duration:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
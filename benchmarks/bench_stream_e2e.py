@@ -0,0 +1,148 @@
+"""
+End-to-end throughput and per-stage latency of /ws/stream on a replayed source.
+
+Starts the backend in-process (against the configured DATABASE_URL, with the
+global roster as gallery), points its default camera at a recorded clip, an
+image directory or a synthetic:// source, and drains /ws/stream with one
+client. Reports frames/s and bytes/s at the client, the server's capture,
+recognition and render rates and latencies, and the delivery latency from a
+frame being published to it being decoded by the client. --image thumbnail
+or none measures the metadata-only modes (frames are then thumbnails, or
+face messages).
+
+    python -m benchmarks.bench_stream_e2e --source lecture.mp4 --duration 30
+    python -m benchmarks.bench_stream_e2e --source "synthetic://1280x720" --pacing fast
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import websockets
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile_ms(seconds, q) -> float:
+    return float(np.percentile(seconds, q) * 1000) if seconds else 0.0
+
+
+async def drain(url: str, duration: float, image_less: bool = False):
+    """Receive frames (face messages when image_less) until duration elapses or the source ends."""
+    from app.utils.stream_protocol import unpack_frame
+
+    frames = 0
+    received_bytes = 0
+    delivery = []
+    stats = {}
+    async with websockets.connect(url, max_size=None) as client:
+        start = time.perf_counter()
+        deadline = start + duration
+        while time.perf_counter() < deadline:
+            try:
+                message = await asyncio.wait_for(client.recv(), timeout=deadline - time.perf_counter())
+            except (asyncio.TimeoutError, websockets.ConnectionClosed):
+                break
+            received_bytes += len(message)
+            if isinstance(message, bytes):
+                _, timestamp, _ = unpack_frame(message)
+            else:
+                payload = json.loads(message)
+                kind = payload.get("type")
+                if kind == "error":
+                    raise RuntimeError(payload["message"])
+                if kind == "stats":
+                    stats = payload
+                if kind not in ("frame", "thumbnail") and not (kind == "faces" and image_less):
+                    continue
+                if "ts" in payload:  # binary protocol's compact faces message
+                    timestamp = datetime.fromtimestamp(payload["ts"] / 1000, tz=timezone.utc)
+                else:
+                    timestamp = datetime.fromisoformat(payload["timestamp"])
+                if "image" in payload:
+                    base64.b64decode(payload["image"])
+            frames += 1
+            delivery.append(max(0.0, datetime.now(timezone.utc).timestamp() - timestamp.timestamp()))
+        elapsed = time.perf_counter() - start
+    return frames, received_bytes, elapsed, delivery, stats
+
+
+async def run(args):
+    import uvicorn
+
+    from app.api.deps import get_camera_manager
+    from app.main import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        if serving.done():
+            serving.result()
+        await asyncio.sleep(0.05)
+
+    try:
+        url = f"ws://127.0.0.1:{port}/ws/stream?protocol={args.protocol}&image={args.image}"
+        drained = asyncio.create_task(drain(url, args.duration, image_less=args.image == "none"))
+        cameras = []
+        while not drained.done():
+            cameras = get_camera_manager().health() or cameras  # last reading before the source closes
+            await asyncio.sleep(0.5)
+        frames, received_bytes, elapsed, delivery, stats = drained.result()
+    finally:
+        server.should_exit = True
+        await serving
+    return frames, received_bytes, elapsed, delivery, stats, cameras
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", required=True, help="video file, image directory or synthetic://WxH")
+    parser.add_argument("--pacing", choices=("realtime", "fast"), default="realtime")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds (the clip may end sooner)")
+    parser.add_argument("--protocol", choices=("json", "binary"), default="binary")
+    parser.add_argument("--image", choices=("full", "thumbnail", "none"), default="full")
+    parser.add_argument("--preview-fps", type=float, default=0, help="0: server setting (unpaced with --pacing fast)")
+    parser.add_argument("--recognition-fps", type=float, default=0, help="0: server setting")
+    args = parser.parse_args()
+
+    # Configure the server before the app (and its settings) is imported.
+    os.environ["CAMERA_DEFAULT_SOURCE"] = args.source
+    os.environ["CAMERA_REPLAY_PACING"] = args.pacing
+    os.environ["STREAM_STATS_INTERVAL_SECONDS"] = "1"
+    preview_fps = args.preview_fps or (1000 if args.pacing == "fast" else 0)
+    if preview_fps:
+        os.environ["STREAM_PREVIEW_FPS"] = str(preview_fps)
+    if args.recognition_fps:
+        os.environ["STREAM_RECOGNITION_FPS"] = str(args.recognition_fps)
+
+    frames, received_bytes, elapsed, delivery, stats, cameras = asyncio.run(run(args))
+    camera = cameras[0] if cameras else {}
+
+    print(f"{args.source} ({args.pacing}, {args.protocol}, image={args.image}): {frames} frames in {elapsed:.1f} s, "
+          f"{received_bytes / max(elapsed, 1e-9) / 1024:.1f} KiB/s")
+    print(f"{'stage':>12} {'rate/s':>8} {'avg ms':>8} {'p50 ms':>8} {'p95 ms':>8}  notes")
+    print(f"{'capture':>12} {camera.get('capture_fps', 0):>8.1f} {'':>8} {'':>8} {'':>8}  "
+          f"{camera.get('frames_dropped', 0)} frames replaced before they were read")
+    print(f"{'recognition':>12} {stats.get('recognition_fps', 0):>8.1f} {stats.get('avg_inference_ms', 0):>8.1f} "
+          f"{'':>8} {'':>8}  {stats.get('recognitions_skipped', 0)} skipped, "
+          f"{stats.get('recognitions_dropped', 0)} dropped")
+    print(f"{'render':>12} {stats.get('preview_fps', 0):>8.1f} {stats.get('avg_render_ms', 0):>8.1f} "
+          f"{'':>8} {'':>8}  draw + JPEG encode, {stats.get('frames_rendered', 0)} frames")
+    print(f"{'delivery':>12} {frames / max(elapsed, 1e-9):>8.1f} "
+          f"{1000 * sum(delivery) / max(len(delivery), 1):>8.1f} "
+          f"{percentile_ms(delivery, 50):>8.1f} {percentile_ms(delivery, 95):>8.1f}  "
+          f"{stats.get('viewer_dropped_frames', 0)} frames skipped by this viewer")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Throughput of the JSON/base64 and binary /ws/stream frame protocols.
+
+A loopback WebSocket server streams the same annotated JPEG frame in each
+protocol as fast as the client drains it; the client decodes every message
+the way a dashboard would. Reports server-side serialisation cost, bytes on
+the wire per frame and end-to-end frames per second.
+
+    python -m benchmarks.bench_stream_protocol --frames 500 --faces 20
+"""
+import argparse
+import asyncio
+import base64
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+
+import cv2
+import numpy as np
+import websockets
+
+from app.utils.stream_protocol import faces_message, json_frame_message, pack_frame, unpack_frame
+
+
+def synthetic_frame(width: int, height: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    frame = gradient + rng.normal(0, 12, size=(height, width, 3))
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def synthetic_faces(count: int):
+    return [
+        {
+            "user_id": uuid.uuid4(),
+            "confidence": 0.8,
+            "bbox": {"x": 20 * i, "y": 40, "width": 60, "height": 60},
+            "name": f"Student {i}",
+            "status": "present",
+        }
+        for i in range(count)
+    ]
+
+
+def messages_for(protocol: str, jpeg: bytes, faces, seq: int):
+    timestamp = datetime.now(timezone.utc)
+    if protocol == "binary":
+        return [faces_message(seq, faces, timestamp), pack_frame(jpeg, seq, timestamp)]
+    return [json.dumps(json_frame_message(jpeg, faces, timestamp))]
+
+
+def decode(protocol: str, message) -> int:
+    if protocol == "binary":
+        if isinstance(message, bytes):
+            return len(unpack_frame(message)[2])
+        json.loads(message)
+        return 0
+    return len(base64.b64decode(json.loads(message)["image"]))
+
+
+async def run(protocol: str, jpeg: bytes, faces, frames: int):
+    serialise_seconds = 0.0
+    wire_bytes = 0
+
+    async def serve(websocket):
+        nonlocal serialise_seconds, wire_bytes
+        for seq in range(1, frames + 1):
+            t0 = time.perf_counter()
+            messages = messages_for(protocol, jpeg, faces, seq)
+            serialise_seconds += time.perf_counter() - t0
+            for message in messages:
+                wire_bytes += len(message)
+                await websocket.send(message)
+        await websocket.close()
+
+    async with websockets.serve(serve, "127.0.0.1", 0, max_size=None) as server:
+        port = server.sockets[0].getsockname()[1]
+        t0 = time.perf_counter()
+        async with websockets.connect(f"ws://127.0.0.1:{port}", max_size=None) as client:
+            decoded = 0
+            async for message in client:
+                decoded += decode(protocol, message)
+        elapsed = time.perf_counter() - t0
+
+    assert decoded == len(jpeg) * frames
+    return serialise_seconds / frames * 1000, wire_bytes / frames, frames / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--faces", type=int, default=20)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--quality", type=int, default=70)
+    args = parser.parse_args()
+
+    frame = synthetic_frame(args.width, args.height)
+    jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, args.quality])[1].tobytes()
+    faces = synthetic_faces(args.faces)
+
+    print(f"JPEG {len(jpeg) / 1024:.1f} KiB, {args.faces} faces, {args.frames} frames")
+    print(f"{'protocol':>9} {'serialise ms':>13} {'KiB/frame':>10} {'frames/s':>9}")
+    for protocol in ("json", "binary"):
+        serialise_ms, frame_bytes, fps = asyncio.run(run(protocol, jpeg, faces, args.frames))
+        print(f"{protocol:>9} {serialise_ms:>13.3f} {frame_bytes / 1024:>10.1f} {fps:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Face pipeline and model-loading tests.
@@ -0,0 +1,68 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from app.face.preprocessing.alignment import (
+    ARCFACE_DST,
+    align_face,
+    align_faces_batch,
+    estimate_similarity_transforms,
+)
+
+
+def synthetic_landmarks(rng, count):
+    faces = []
+    for _ in range(count):
+        scale = rng.uniform(1.0, 2.5)
+        angle = rng.uniform(-0.4, 0.4)
+        rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+        offset = rng.uniform([100, 100], [500, 350])
+        faces.append((ARCFACE_DST - 56.0) @ rotation.T * scale + offset + rng.normal(0, 0.5, (5, 2)))
+    return np.array(faces, dtype=np.float32)
+
+
+def opencv_transform(points):
+    """Reference transform, or None when LMEDS rejected a landmark as an outlier."""
+    transform, inliers = cv2.estimateAffinePartial2D(points, ARCFACE_DST, method=cv2.LMEDS)
+    # The closed-form solve is least squares over all five points, so parity
+    # only holds when LMEDS keeps every point as an inlier.
+    return transform if inliers.all() else None
+
+
+class AlignFacesBatchTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.image = cv2.GaussianBlur(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8), (0, 0), 3)
+        self.landmarks = synthetic_landmarks(rng, 12)
+
+    def test_transforms_match_opencv_estimate(self):
+        transforms = estimate_similarity_transforms(self.landmarks)
+
+        compared = 0
+        for points, transform in zip(self.landmarks, transforms):
+            expected = opencv_transform(points)
+            if expected is None:
+                continue
+            compared += 1
+            self.assertTrue(np.allclose(transform, expected, atol=1e-6))
+        self.assertGreater(compared, len(self.landmarks) // 2)
+
+    def test_batch_crops_match_per_face_alignment(self):
+        batch = align_faces_batch(self.image, self.landmarks)
+
+        self.assertEqual(batch.shape, (12, 112, 112, 3))
+        self.assertEqual(batch.dtype, np.uint8)
+        for crop, points in zip(batch, self.landmarks):
+            if opencv_transform(points) is None:
+                continue
+            expected = align_face(self.image, points)
+            self.assertLessEqual(np.abs(crop.astype(int) - expected).max(), 1)
+
+    def test_degenerate_landmarks_fall_back_to_resize(self):
+        landmarks = np.zeros((1, 5, 2), dtype=np.float32)
+
+        batch = align_faces_batch(self.image, landmarks)
+
+        self.assertTrue(np.array_equal(batch[0], cv2.resize(self.image, (112, 112))))
+        self.assertEqual(align_faces_batch(self.image, np.empty((0, 5, 2))).shape, (0, 112, 112, 3))
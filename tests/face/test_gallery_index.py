@@ -0,0 +1,73 @@
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.face.gallery import DenseIndex, IVFIndex, create_gallery_index
+from app.face.gallery.ivf import spherical_kmeans
+
+
+def unit_rows(x):
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+def clustered_gallery(rng, size, dim=64):
+    basis = rng.normal(size=(16, dim))
+    return unit_rows(rng.normal(size=(size, 16)) @ basis + 0.5 * rng.normal(size=(size, dim)))
+
+
+class ScriptedRng:
+    """Returns the given index arrays from successive choice() calls."""
+
+    def __init__(self, *choices):
+        self.choices = list(choices)
+
+    def choice(self, n, size, replace=True):
+        return np.array(self.choices.pop(0))
+
+
+class GalleryIndexTests(unittest.TestCase):
+    def test_kmeans_sums_every_row_when_the_last_cluster_is_empty(self):
+        eye = np.eye(4, dtype=np.float32)
+        data = unit_rows(np.stack([eye[0], eye[0], eye[0], eye[1], eye[2], eye[2] + 0.5 * eye[3]]))
+        # Clusters 2 and 3 start on the same row, so 3 ends up empty: counts [3, 1, 2, 0].
+        rng = ScriptedRng([0, 3, 4, 4], [1])
+
+        centroids = spherical_kmeans(data, nlist=4, iterations=1, rng=rng)
+
+        self.assertTrue(np.allclose(centroids[2], unit_rows(data[4:6].sum(axis=0, keepdims=True))[0]))
+        self.assertTrue(np.allclose(centroids[3], data[1]))
+
+    def test_ivf_top1_agrees_with_dense_for_near_duplicate_queries(self):
+        rng = np.random.default_rng(11)
+        gallery = clustered_gallery(rng, 4000)
+        queries = unit_rows(gallery[:100] + 0.05 * rng.normal(size=(100, gallery.shape[1])))
+        dense, ivf = DenseIndex(), IVFIndex(nprobe=8)
+        dense.build(gallery)
+        ivf.build(gallery)
+
+        _, exact_rows = dense.search(queries, 1)
+        scores, rows = ivf.search(queries, 3)
+
+        self.assertTrue(ivf.trained)
+        self.assertEqual(rows.shape, (100, 3))
+        self.assertGreaterEqual((rows[:, 0] == exact_rows[:, 0]).mean(), 0.95)
+        self.assertTrue(np.all(np.diff(scores, axis=1) <= 0))
+
+    def test_small_gallery_is_searched_exactly(self):
+        gallery = np.eye(4, dtype=np.float32)
+        ivf = IVFIndex()
+        ivf.build(gallery)
+
+        scores, rows = ivf.search(gallery[[2]], 2)
+
+        self.assertFalse(ivf.trained)
+        self.assertEqual(rows[0, 0], 2)
+        self.assertAlmostEqual(float(scores[0, 0]), 1.0)
+
+    def test_factory_rejects_unknown_index(self):
+        settings = SimpleNamespace(GALLERY_IVF_NLIST=0, GALLERY_IVF_NPROBE=4)
+
+        self.assertIsInstance(create_gallery_index("IVF", settings), IVFIndex)
+        with self.assertRaises(ValueError):
+            create_gallery_index("hnsw", settings)
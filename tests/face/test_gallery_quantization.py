@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+
+from app.face.gallery import DenseIndex, EmbeddingGallery, IVFIndex
+from app.face.gallery.quantization import dequantize_rows, gallery_dtype, quantize_rows
+from app.face.matching import similarities
+
+
+def unit_rows(x):
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+def clustered_gallery(rng, size, dim=128):
+    basis = rng.normal(size=(16, dim))
+    return unit_rows(rng.normal(size=(size, 16)) @ basis + 0.5 * rng.normal(size=(size, dim)))
+
+
+class QuantizationTests(unittest.TestCase):
+    def test_int8_round_trip_error_is_within_half_a_step(self):
+        vectors = clustered_gallery(np.random.default_rng(0), 50)
+        codes, scales = quantize_rows(vectors, np.int8)
+
+        self.assertEqual(codes.dtype, np.int8)
+        error = np.abs(dequantize_rows(codes, scales) - vectors)
+        self.assertTrue(np.all(error <= scales[:, None] / 2 + 1e-7))
+
+    def test_blockwise_similarities_match_float32(self):
+        rng = np.random.default_rng(1)
+        gallery = clustered_gallery(rng, 300)
+        queries = gallery[:5]
+        codes, scales = quantize_rows(gallery, np.float16)
+
+        expected = queries @ gallery.T
+        self.assertLess(np.abs(similarities(queries, codes, scales) - expected).max(), 1e-3)
+
+    def test_unknown_precision_is_rejected(self):
+        with self.assertRaises(ValueError):
+            gallery_dtype("int4")
+
+
+class ReducedPrecisionGalleryTests(unittest.TestCase):
+    def test_reduced_precision_top1_agrees_with_float32(self):
+        rng = np.random.default_rng(2)
+        gallery = clustered_gallery(rng, 3000)
+        queries = unit_rows(gallery[:200] + 0.05 * rng.normal(size=(200, gallery.shape[1])))
+        exact = DenseIndex()
+        exact.build(gallery)
+        _, truth = exact.search(queries, 1)
+
+        for dtype in ("float16", "int8"):
+            store = EmbeddingGallery(dim=gallery.shape[1], dtype=dtype)
+            store.extend(list(range(len(gallery))), gallery)
+            for index in (DenseIndex(), IVFIndex(nprobe=16)):
+                index.build(store.matrix, store.scales)
+                scores, rows = index.search(queries, 1)
+                self.assertGreaterEqual((rows[:, 0] == truth[:, 0]).mean(), 0.95, f"{dtype} {type(index).__name__}")
+                self.assertLess(np.abs(scores[:, 0] - np.sum(queries * gallery[rows[:, 0]], axis=1)).max(), 0.02)
+
+    def test_int8_gallery_keeps_scales_through_compaction(self):
+        vectors = clustered_gallery(np.random.default_rng(3), 4)
+        store = EmbeddingGallery(dim=vectors.shape[1], dtype=np.int8)
+        store.extend(["a", "b", "c", "d"], vectors)
+        store.remove("a")
+        store.remove("c")
+        store.compact()
+
+        self.assertEqual(store.nbytes, 16 * vectors.shape[1] + 16 * 4)
+        self.assertEqual(store.get("d").dtype, np.float32)
+        np.testing.assert_allclose(store.get("d"), vectors[3], atol=0.01)
+        np.testing.assert_allclose(store.get("b"), vectors[1], atol=0.01)
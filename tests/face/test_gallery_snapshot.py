@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+import unittest
+import uuid
+
+import numpy as np
+
+from app.face.gallery.snapshot import MANIFEST_NAME, load_snapshot, write_snapshot
+
+
+class GallerySnapshotTests(unittest.TestCase):
+    def test_round_trip_memory_maps_the_matrix(self):
+        ids = [uuid.uuid4(), uuid.uuid4()]
+        matrix = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            write_snapshot(tmp, ids, matrix, fingerprint="abc123")
+            snapshot = load_snapshot(tmp)
+
+            self.assertEqual(snapshot.ids, [str(i) for i in ids])
+            self.assertEqual(snapshot.fingerprint, "abc123")
+            self.assertIsInstance(snapshot.matrix, np.memmap)
+            self.assertFalse(snapshot.matrix.flags.writeable)
+            self.assertTrue(np.array_equal(snapshot.matrix, matrix))
+            del snapshot
+
+    def test_new_snapshot_replaces_superseded_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_snapshot(tmp, ["a"], np.ones((1, 2), dtype=np.float32), fingerprint="first")
+            write_snapshot(tmp, [], np.empty((0, 2), dtype=np.float32), fingerprint="second")
+            snapshot = load_snapshot(tmp)
+
+            self.assertEqual(snapshot.fingerprint, "second")
+            self.assertEqual(snapshot.matrix.shape, (0, 2))
+            self.assertEqual(sorted(os.listdir(tmp)), ["gallery-second.ids.json", "gallery-second.npy", MANIFEST_NAME])
+
+    def test_missing_or_incompatible_snapshot_loads_as_none(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertIsNone(load_snapshot(tmp))
+
+            write_snapshot(tmp, ["a"], np.ones((1, 2), dtype=np.float32), fingerprint="abc")
+            manifest_path = os.path.join(tmp, MANIFEST_NAME)
+            with open(manifest_path) as handle:
+                manifest = json.load(handle)
+            manifest["version"] = 0
+            with open(manifest_path, "w") as handle:
+                json.dump(manifest, handle)
+
+            self.assertIsNone(load_snapshot(tmp))
@@ -0,0 +1,110 @@
+import unittest
+
+import numpy as np
+
+from app.face.gallery import EmbeddingGallery, GalleryScope, IVFIndex
+from app.face.gallery import store
+
+
+class EmbeddingGalleryTests(unittest.TestCase):
+    def test_add_grows_capacity_by_doubling_without_losing_rows(self):
+        gallery = EmbeddingGallery(capacity=2)
+
+        for i in range(9):
+            gallery.add(f"user-{i}", np.full(3, i, dtype=np.float32))
+
+        self.assertEqual(len(gallery), 9)
+        self.assertEqual(gallery._capacity, 16)
+        self.assertEqual(gallery.matrix.shape, (9, 3))
+        self.assertTrue(np.array_equal(gallery.get("user-7"), np.full(3, 7, dtype=np.float32)))
+
+    def test_reenroll_and_remove_leave_tombstones(self):
+        gallery = EmbeddingGallery()
+        gallery.extend(["a", "b"], np.eye(2, dtype=np.float32))
+
+        new_row = gallery.add("a", np.array([0.5, 0.5], dtype=np.float32))
+        removed = gallery.remove("b")
+
+        self.assertTrue(removed)
+        self.assertFalse(gallery.remove("missing"))
+        self.assertEqual(new_row, 2)
+        self.assertEqual(gallery.alive.tolist(), [False, False, True])
+        self.assertEqual(gallery.ids(), ["a"])
+        self.assertIsNone(gallery.id_at(0))
+
+    def test_compact_drops_tombstones_and_reports_row_mapping(self):
+        gallery = EmbeddingGallery()
+        gallery.extend(["a", "b", "c", "d"], np.arange(8, dtype=np.float32).reshape(4, 2))
+        gallery.remove("a")
+        gallery.remove("c")
+
+        mapping = gallery.compact()
+
+        self.assertEqual(mapping.tolist(), [-1, 0, -1, 1])
+        self.assertEqual(gallery.ids(), ["b", "d"])
+        self.assertEqual(gallery.row_of("d"), 1)
+        self.assertTrue(np.array_equal(gallery.get("d"), [6.0, 7.0]))
+        self.assertEqual(gallery.tombstones, 0)
+
+    def test_needs_compaction_after_enough_tombstones(self):
+        gallery = EmbeddingGallery()
+        gallery.extend(list(range(100)), np.zeros((100, 2), dtype=np.float32))
+
+        for i in range(store.MIN_COMPACT_ROWS):
+            gallery.remove(i)
+
+        self.assertTrue(gallery.needs_compaction())
+
+
+class GalleryScopeTests(unittest.TestCase):
+    def test_mask_follows_reenrollment_and_compaction(self):
+        gallery = EmbeddingGallery(dim=2)
+        gallery.extend(["a", "b", "c"], np.eye(3, 2, dtype=np.float32))
+        scope = GalleryScope(["a", "c", "missing"])
+
+        self.assertEqual(scope.mask(gallery).tolist(), [True, False, True])
+        self.assertIs(scope.mask(gallery), scope.mask(gallery))
+
+        gallery.add("a", np.array([0.0, 1.0], dtype=np.float32))
+        self.assertEqual(scope.mask(gallery).tolist(), [False, False, True, True])
+
+        gallery.compact()
+        self.assertEqual(scope.mask(gallery).tolist(), [False, True, True])
+
+
+class IVFIncrementalTests(unittest.TestCase):
+    def test_ivf_follows_adds_and_compaction(self):
+        rng = np.random.default_rng(5)
+        vectors = rng.normal(size=(1500, 16)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        gallery = EmbeddingGallery()
+        gallery.extend(list(range(1200)), vectors[:1200])
+        index = IVFIndex(nprobe=64)
+        index.build(gallery.matrix)
+
+        rows = gallery.extend(list(range(1200, 1500)), vectors[1200:])
+        index.add(rows, gallery.matrix)
+        for i in range(0, 600):
+            gallery.remove(i)
+        index.compact(gallery.compact(), gallery.matrix)
+        _, found = index.search(vectors[[1400, 10]], 1, mask=gallery.alive)
+
+        self.assertEqual(gallery.id_at(found[0, 0]), 1400)
+        self.assertNotEqual(gallery.id_at(found[1, 0]), 10)
+
+    def test_snapshot_searches_the_gallery_as_it_was(self):
+        rng = np.random.default_rng(6)
+        vectors = rng.normal(size=(1200, 16)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        gallery = EmbeddingGallery()
+        gallery.extend(list(range(1200)), vectors)
+        index = IVFIndex(nprobe=64)
+        index.build(gallery.matrix)
+        snapshot, row_ids = index.snapshot(), gallery.row_ids()
+
+        for i in range(0, 600):
+            gallery.remove(i)
+        index.compact(gallery.compact(), gallery.matrix)
+        _, found = snapshot.search(vectors[[900]], 1)
+
+        self.assertEqual(row_ids[found[0, 0]], 900)
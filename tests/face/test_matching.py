@@ -0,0 +1,31 @@
+import unittest
+
+import numpy as np
+
+from app.face.matching import assign_one_to_one, best_matches, top_k_similarities
+
+
+class MatchingTests(unittest.TestCase):
+    def test_top_k_matches_full_sort_of_similarities(self):
+        rng = np.random.default_rng(3)
+        gallery = rng.normal(size=(50, 8)).astype(np.float32)
+        queries = rng.normal(size=(6, 8)).astype(np.float32)
+
+        scores, rows = top_k_similarities(queries, gallery, k=4)
+
+        expected_rows = np.argsort(-(queries @ gallery.T), axis=1)[:, :4]
+        self.assertEqual(scores.shape, (6, 4))
+        self.assertTrue(np.array_equal(rows, expected_rows))
+        self.assertTrue(np.all(np.diff(scores, axis=1) <= 0))
+
+    def test_top_k_larger_than_gallery_returns_every_row(self):
+        scores, rows = top_k_similarities(np.eye(2, dtype=np.float32), np.eye(2, dtype=np.float32), k=5)
+
+        self.assertEqual(rows.tolist(), [[0, 1], [1, 0]])
+
+    def test_assignment_falls_back_to_runner_up_and_respects_threshold(self):
+        scores = np.array([[0.9, 0.7], [0.95, 0.2], [0.3, 0.1]], dtype=np.float32)
+        rows = np.array([[0, 1], [0, 2], [1, 0]])
+
+        self.assertEqual(best_matches(scores, rows, 0.5).tolist(), [0, 0, -1])
+        self.assertEqual(assign_one_to_one(scores, rows, 0.5).tolist(), [1, 0, -1])
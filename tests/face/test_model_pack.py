@@ -0,0 +1,106 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.face.detectors.retinaface import RetinaFaceDetector
+from app.face.embedders.arcface import ArcFaceEmbedder
+from app.face.model_pack import ModelPack, _classify
+from app.face.registry import ModelRegistry
+
+PACK_FILES = ["1k3d68.onnx", "2d106det.onnx", "det_10g.onnx", "genderage.onnx", "w600k_r50.onnx"]
+TASKS = {"det_10g.onnx": "detection", "w600k_r50.onnx": "recognition"}
+
+
+class ModelPackTests(unittest.TestCase):
+    def setUp(self):
+        self.loaded = []
+
+        def fake_load(onnx_file, taskname, options):
+            self.loaded.append(onnx_file)
+            return SimpleNamespace(taskname=taskname, file=onnx_file)
+
+        registry = ModelRegistry()
+        self.patches = [
+            patch("app.face.model_pack._pack_dir", return_value="/models/buffalo_l"),
+            patch("app.face.model_pack._model_files", return_value=list(PACK_FILES)),
+            patch("app.face.model_pack._classify", side_effect=TASKS.get),
+            patch("app.face.model_pack._load_model", side_effect=fake_load),
+            patch("app.face.model_pack.get_model_registry", return_value=registry),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_detector_and_embedder_share_a_single_pack_load(self):
+        detector = RetinaFaceDetector(model_pack="buffalo_l")
+        embedder = ArcFaceEmbedder(model_pack="buffalo_l")
+
+        # The two FaceAnalysis instances used previously parsed the pack twice;
+        # the landmark and attribute models are not loaded at all.
+        self.assertEqual(self.loaded, ["det_10g.onnx", "w600k_r50.onnx"])
+        self.assertEqual(detector._det.file, "det_10g.onnx")
+        self.assertEqual(embedder._rec.file, "w600k_r50.onnx")
+
+    def test_require_raises_for_missing_module(self):
+        with patch("app.face.model_pack._model_files", return_value=["det_10g.onnx"]):
+            pack = ModelPack("det_only")
+
+        self.assertEqual(pack.require("detection").file, "det_10g.onnx")
+        with self.assertRaises(ValueError):
+            pack.require("recognition")
+
+
+def fake_graph(input_shapes, outputs):
+    def value(name, shape):
+        dims = [SimpleNamespace(dim_value=d if isinstance(d, int) else 0) for d in shape]
+        return SimpleNamespace(name=name, type=SimpleNamespace(tensor_type=SimpleNamespace(shape=SimpleNamespace(dim=dims))))
+
+    return SimpleNamespace(
+        input=[value(f"in{i}", shape) for i, shape in enumerate(input_shapes)] + [value("weight", [512])],
+        initializer=[SimpleNamespace(name="weight")],
+        output=[value(f"out{i}", [1]) for i in range(outputs)],
+    )
+
+
+class ClassifyTests(unittest.TestCase):
+    def test_known_pack_files_are_classified_by_name_without_reading_them(self):
+        def load(path, load_external_data=True):
+            raise AssertionError(f"{path} was read")
+
+        with patch.dict("sys.modules", {"onnx": SimpleNamespace(load=load)}):
+            tasks = {name: _classify(f"/models/buffalo_l/{name}") for name in PACK_FILES}
+
+        self.assertEqual(tasks, {
+            "1k3d68.onnx": None,
+            "2d106det.onnx": None,
+            "det_10g.onnx": "detection",
+            "genderage.onnx": None,
+            "w600k_r50.onnx": "recognition",
+        })
+
+    def test_unknown_models_are_classified_from_their_graph(self):
+        graphs = {
+            "custom_det.onnx": fake_graph([["None", 3, "?", "?"]], outputs=9),
+            "custom_rec.onnx": fake_graph([["None", 3, 112, 112]], outputs=1),
+            "custom_landmarks.onnx": fake_graph([["None", 3, 192, 192]], outputs=1),
+            "custom_attributes.onnx": fake_graph([["None", 3, 96, 96]], outputs=1),
+        }
+        calls = []
+
+        def load(path, load_external_data=True):
+            calls.append(load_external_data)
+            return SimpleNamespace(graph=graphs[path])
+
+        with patch.dict("sys.modules", {"onnx": SimpleNamespace(load=load)}):
+            tasks = {name: _classify(name) for name in graphs}
+
+        self.assertEqual(tasks, {
+            "custom_det.onnx": "detection",
+            "custom_rec.onnx": "recognition",
+            "custom_landmarks.onnx": None,
+            "custom_attributes.onnx": None,
+        })
+        self.assertEqual(set(calls), {False})
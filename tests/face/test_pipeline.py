@@ -0,0 +1,160 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+from app.face.detectors.base import DetectedFace, FaceDetector
+from app.face.detectors.factory import retinaface_det_size
+from app.face.embedders.arcface import ArcFaceEmbedder
+from app.face.pipeline import FaceRecognitionPipeline
+from app.face.preprocessing.alignment import ARCFACE_DST, align_faces_batch
+
+
+class FakeRecognition:
+    def __init__(self):
+        self.batches = []
+
+    def get_feat(self, imgs):
+        self.batches.append(imgs)
+        feats = np.zeros((len(imgs), 512), dtype=np.float32)
+        feats[:, 0] = 3.0
+        feats[:, 1] = 4.0
+        return feats
+
+
+class FakeDetector(FaceDetector):
+    def __init__(self, count):
+        self.count = count
+
+    def detect(self, image):
+        return [
+            DetectedFace(
+                bbox={"x": 10 * i, "y": 0, "width": 10, "height": 10},
+                landmarks_5pt=ARCFACE_DST + 10 * i,
+                score=0.9,
+            )
+            for i in range(self.count)
+        ]
+
+
+class RecordingDetector(FaceDetector):
+    """Finds one face at fixed coordinates of whatever image it is given."""
+
+    def __init__(self):
+        self.shapes = []
+
+    def detect(self, image):
+        self.shapes.append(image.shape)
+        return [DetectedFace(
+            bbox={"x": 40, "y": 20, "width": 30, "height": 36},
+            landmarks_5pt=ARCFACE_DST / 4 + [40, 20],
+            score=0.8,
+        )]
+
+
+class BatchCountingDetector(FakeDetector):
+    def __init__(self, count):
+        super().__init__(count)
+        self.batches = []
+
+    def detect_batch(self, images):
+        self.batches.append(len(images))
+        return super().detect_batch(images)
+
+
+def make_embedder():
+    rec = FakeRecognition()
+    pack = SimpleNamespace(require=lambda taskname: rec)
+    with patch("app.face.embedders.arcface.get_model_pack", return_value=pack):
+        return ArcFaceEmbedder(), rec
+
+
+class ArcFaceEmbedderTests(unittest.TestCase):
+    def test_embed_batch_returns_one_normalised_matrix(self):
+        embedder, rec = make_embedder()
+        faces = np.zeros((3, 112, 112, 3), dtype=np.uint8)
+
+        embeddings = embedder.embed_batch(faces)
+
+        self.assertEqual(embeddings.shape, (3, 512))
+        self.assertEqual(embeddings.dtype, np.float32)
+        self.assertTrue(embeddings.flags.c_contiguous)
+        self.assertTrue(np.allclose(embeddings[:, :2], [0.6, 0.8]))
+        self.assertEqual(len(rec.batches), 1)
+        self.assertIsInstance(rec.batches[0], list)
+
+    def test_embed_batch_handles_empty_input(self):
+        embedder, rec = make_embedder()
+
+        self.assertEqual(embedder.embed_batch([]).shape, (0, 512))
+        self.assertEqual(rec.batches, [])
+
+
+class FaceRecognitionPipelineTests(unittest.TestCase):
+    def test_embed_frame_carries_matrix_and_process_frame_uses_row_views(self):
+        embedder, rec = make_embedder()
+        pipeline = FaceRecognitionPipeline(detector=FakeDetector(count=4), embedder=embedder)
+        frame = np.zeros((120, 200, 3), dtype=np.uint8)
+
+        frame_faces = pipeline.embed_frame(frame)
+        results = pipeline.process_frame(frame)
+
+        self.assertEqual(len(frame_faces), 4)
+        self.assertEqual(frame_faces.embeddings.shape, (4, 512))
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[2]["bbox"]["x"], 20)
+        self.assertIsNotNone(results[0]["embedding"].base)
+
+    def test_embed_frame_without_faces_returns_empty_matrix(self):
+        embedder, rec = make_embedder()
+        pipeline = FaceRecognitionPipeline(detector=FakeDetector(count=0), embedder=embedder)
+
+        frame_faces = pipeline.embed_frame(np.zeros((10, 10, 3), dtype=np.uint8))
+
+        self.assertEqual(frame_faces.embeddings.shape, (0, 512))
+        self.assertEqual(pipeline.process_frame(np.zeros((10, 10, 3), dtype=np.uint8)), [])
+
+    def test_detection_runs_downscaled_and_alignment_uses_the_full_frame(self):
+        embedder, rec = make_embedder()
+        detector = RecordingDetector()
+        pipeline = FaceRecognitionPipeline(detector=detector, embedder=embedder, detection_max_side=320)
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+        with patch("app.face.pipeline.align_faces_batch", wraps=align_faces_batch) as align:
+            frame_faces = pipeline.embed_frame(frame)
+
+        self.assertEqual(detector.shapes, [(240, 320, 3)])
+        self.assertEqual(frame_faces.detections[0].bbox, {"x": 80, "y": 40, "width": 60, "height": 72})
+        self.assertTrue(np.allclose(frame_faces.detections[0].landmarks_5pt, ARCFACE_DST / 2 + [80, 40]))
+        self.assertIs(align.call_args[0][0], frame)
+
+    def test_small_frames_are_detected_as_they_are(self):
+        embedder, rec = make_embedder()
+        detector = RecordingDetector()
+        pipeline = FaceRecognitionPipeline(detector=detector, embedder=embedder, detection_max_side=640)
+
+        frame_faces = pipeline.embed_frame(np.zeros((480, 640, 3), dtype=np.uint8))
+
+        self.assertEqual(detector.shapes, [(480, 640, 3)])
+        self.assertEqual(frame_faces.detections[0].bbox["x"], 40)
+
+    def test_retinaface_input_follows_the_detection_resolution(self):
+        self.assertEqual(retinaface_det_size(SimpleNamespace(DETECTION_MAX_SIDE=0)), (640, 640))
+        self.assertEqual(retinaface_det_size(SimpleNamespace(DETECTION_MAX_SIDE=360)), (384, 384))
+
+    def test_embed_frames_batches_detection_and_embedding_across_frames(self):
+        embedder, rec = make_embedder()
+        detector = BatchCountingDetector(count=2)
+        pipeline = FaceRecognitionPipeline(detector=detector, embedder=embedder)
+        frames = [np.zeros((120, 200, 3), dtype=np.uint8) for _ in range(3)]
+
+        per_frame = pipeline.embed_frames(frames)
+        results = pipeline.process_frames(frames[:2])
+
+        self.assertEqual([len(frame_faces) for frame_faces in per_frame], [2, 2, 2])
+        self.assertEqual([frame_faces.embeddings.shape for frame_faces in per_frame], [(2, 512)] * 3)
+        self.assertEqual(detector.batches, [3, 2])
+        self.assertEqual([len(batch) for batch in rec.batches], [6, 4])
+        self.assertEqual([len(faces) for faces in results], [2, 2])
+        self.assertEqual(pipeline.stats()["frames"], 5)
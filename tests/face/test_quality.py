@@ -0,0 +1,81 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from app.face.detectors.base import DetectedFace
+from app.face.pipeline import FaceRecognitionPipeline
+from app.face.preprocessing.alignment import ARCFACE_DST
+from app.face.quality import FaceQualityGate, roll_degrees, sharpness, yaw_degrees
+from tests.face.test_pipeline import FakeDetector, make_embedder
+
+
+def rotated(landmarks, degrees):
+    centre = landmarks.mean(axis=0)
+    theta = np.radians(degrees)
+    rotation = np.array([[np.cos(theta), -np.sin(theta)], [np.sin(theta), np.cos(theta)]], dtype=np.float32)
+    return (landmarks - centre) @ rotation.T + centre
+
+
+def textured_frame(blur=False):
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, size=(112, 112, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(frame, (15, 15), 6) if blur else frame
+
+
+def face(landmarks=ARCFACE_DST, score=0.9):
+    return DetectedFace(bbox={"x": 0, "y": 0, "width": 112, "height": 112}, landmarks_5pt=landmarks, score=score)
+
+
+class LandmarkGeometryTests(unittest.TestCase):
+    def test_frontal_face_has_no_roll_or_yaw(self):
+        self.assertAlmostEqual(roll_degrees(ARCFACE_DST), 0.0, delta=1.0)
+        self.assertAlmostEqual(yaw_degrees(ARCFACE_DST), 0.0, delta=3.0)
+
+    def test_roll_follows_the_eye_line_and_yaw_the_nose(self):
+        self.assertAlmostEqual(roll_degrees(rotated(ARCFACE_DST, 40)), 40.0, delta=1.0)
+        self.assertAlmostEqual(yaw_degrees(rotated(ARCFACE_DST, 40)), 0.0, delta=3.0)
+
+        turned = ARCFACE_DST.copy()
+        turned[2, 0] = turned[1, 0] - 2  # nose almost under the left eye
+        self.assertGreater(abs(yaw_degrees(turned)), 60)
+
+
+class FaceQualityGateTests(unittest.TestCase):
+    def test_each_check_rejects_and_is_counted(self):
+        gate = FaceQualityGate(min_score=0.5, min_eye_distance=12, max_roll=30, max_yaw=45, min_sharpness=30)
+        frame = textured_frame()
+        turned = ARCFACE_DST.copy()
+        turned[2, 0] = turned[1, 0] - 2
+
+        self.assertIsNone(gate.rejection(frame, face()))
+        self.assertEqual(gate.rejection(frame, face(score=0.3)), "score")
+        self.assertEqual(gate.rejection(frame, face(ARCFACE_DST * 0.2)), "size")
+        self.assertEqual(gate.rejection(frame, face(rotated(ARCFACE_DST, 50))), "roll")
+        self.assertEqual(gate.rejection(frame, face(turned)), "yaw")
+        self.assertEqual(gate.rejection(textured_frame(blur=True), face()), "blur")
+
+        snapshot = gate.snapshot()
+        self.assertEqual(snapshot["faces_checked"], 6)
+        self.assertEqual(snapshot["faces_rejected"], {"score": 1, "size": 1, "roll": 1, "yaw": 1, "blur": 1})
+
+    def test_sharpness_of_a_box_outside_the_frame_is_zero(self):
+        self.assertEqual(sharpness(textured_frame(), {"x": 200, "y": 0, "width": 10, "height": 10}), 0.0)
+
+    def test_rejected_faces_are_kept_as_detections_but_not_embedded(self):
+        embedder, rec = make_embedder()
+        gate = FaceQualityGate(min_score=0.95, min_sharpness=0)
+        pipeline = FaceRecognitionPipeline(detector=FakeDetector(count=3), embedder=embedder, quality_gate=gate)
+
+        frame_faces = pipeline.embed_frame(np.zeros((64, 64, 3), dtype=np.uint8))
+
+        self.assertEqual(len(frame_faces), 3)
+        self.assertEqual(frame_faces.rejected, ["score"] * 3)
+        self.assertFalse(frame_faces.embeddings.any())
+        self.assertEqual(rec.batches, [])
+        self.assertEqual(pipeline.stats()["faces_embedded"], 0)
+        self.assertEqual(pipeline.stats()["faces_detected"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.face import create_pipeline
+from app.face.registry import ModelRegistry
+
+
+def make_settings(**overrides):
+    values = {
+        "DETECTOR_BACKEND": "retinaface",
+        "ARCFACE_MODEL_PACK": "buffalo_l",
+        "YUNET_MODEL_PATH": "models/face_detection_yunet_2023mar.onnx",
+        "ONNX_PROVIDERS": "CPUExecutionProvider",
+        "ONNX_INTRA_OP_THREADS": 0,
+        "ONNX_INTER_OP_THREADS": 0,
+        "ONNX_EXECUTION_MODE": "sequential",
+        "ONNX_GRAPH_OPTIMIZATION_LEVEL": "all",
+        "ONNX_OPTIMIZED_MODEL_DIR": "",
+        "FACE_QUALITY_ENABLED": False,
+        "DETECTION_MAX_SIDE": 0,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+class ModelRegistryTests(unittest.TestCase):
+    def test_get_or_create_builds_each_key_once(self):
+        registry = ModelRegistry()
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return object()
+
+        first = registry.get_or_create("a", factory)
+        second = registry.get_or_create("a", factory)
+        other = registry.get_or_create("b", factory)
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(len(calls), 2)
+
+    def test_concurrent_callers_share_a_single_load(self):
+        registry = ModelRegistry()
+        calls = []
+        results = []
+
+        def slow_factory():
+            calls.append(1)
+            time.sleep(0.05)
+            return object()
+
+        threads = [
+            threading.Thread(target=lambda: results.append(registry.get_or_create("pack", slow_factory)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len({id(result) for result in results}), 1)
+
+
+class CreatePipelineRegistryTests(unittest.TestCase):
+    def test_pipelines_with_same_settings_reuse_loaded_models(self):
+        registry = ModelRegistry()
+        settings = make_settings()
+
+        with patch("app.face.create_detector", side_effect=lambda name, s: object()) as detector_mock:
+            with patch("app.face.ArcFaceEmbedder", side_effect=lambda **kwargs: object()) as embedder_mock:
+                first = create_pipeline(settings, registry=registry)
+                second = create_pipeline(settings, registry=registry)
+                yunet = create_pipeline(make_settings(DETECTOR_BACKEND="yunet"), registry=registry)
+
+        self.assertIsNot(first, second)
+        self.assertIs(first.detector, second.detector)
+        self.assertIs(first.embedder, second.embedder)
+        self.assertIsNot(first.detector, yunet.detector)
+        self.assertIs(first.embedder, yunet.embedder)
+        self.assertEqual(detector_mock.call_count, 2)
+        self.assertEqual(embedder_mock.call_count, 1)
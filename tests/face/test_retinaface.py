@@ -0,0 +1,85 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+from app.face.detectors.retinaface import RetinaFaceDetector
+
+DET_SIZE = (64, 64)
+STRIDES = (8, 16, 32)
+
+
+class FakeSession:
+    """SCRFD-style outputs flattened over the batch, as exported in the model packs: (N * K, C)."""
+
+    def __init__(self, hits):
+        self.hits = hits  # {(image, stride): (anchor, score)}
+        self.runs = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(shape=["None", 3, "?", "?"])]
+
+    def run(self, names, feeds):
+        batch = feeds["input.1"]
+        self.runs.append(batch.shape)
+        count = batch.shape[0]
+        scores, boxes, keypoints = [], [], []
+        for stride in STRIDES:
+            anchors = (DET_SIZE[0] // stride) * (DET_SIZE[1] // stride) * 2
+            score = np.zeros((count, anchors, 1), dtype=np.float32)
+            box = np.ones((count, anchors, 4), dtype=np.float32)  # 1 stride on every side
+            kps = np.zeros((count, anchors, 10), dtype=np.float32)
+            for (image, hit_stride), (anchor, value) in self.hits.items():
+                if hit_stride == stride:
+                    score[image, anchor] = value
+            scores.append(score.reshape(-1, 1))
+            boxes.append(box.reshape(-1, 4))
+            keypoints.append(kps.reshape(-1, 10))
+        return scores + boxes + keypoints
+
+
+def make_detector(session):
+    model = SimpleNamespace(
+        session=session,
+        input_name="input.1",
+        output_names=[str(i) for i in range(9)],
+        input_mean=127.5,
+        input_std=128.0,
+        fmc=3,
+        _feat_stride_fpn=list(STRIDES),
+        _num_anchors=2,
+        use_kps=True,
+        det_thresh=0.5,
+        nms=lambda dets: list(range(len(dets))),
+        detect=lambda *args, **kwargs: (np.empty((0, 5), np.float32), np.empty((0, 5, 2), np.float32)),
+    )
+    pack = SimpleNamespace(require=lambda taskname: model)
+    with patch("app.face.detectors.retinaface.get_model_pack", return_value=pack):
+        return RetinaFaceDetector(det_size=DET_SIZE)
+
+
+class RetinaFaceBatchTests(unittest.TestCase):
+    def test_detect_batch_runs_one_stacked_inference_and_decodes_each_image(self):
+        # Anchor 2 * 9 + 1 at stride 8 is the second anchor of cell (row 1, column 1): centre (8, 8).
+        session = FakeSession({(1, 8): (2 * 9 + 1, 0.9)})
+        detector = make_detector(session)
+        images = [np.zeros((64, 64, 3), np.uint8), np.zeros((32, 32, 3), np.uint8), np.zeros((64, 32, 3), np.uint8)]
+
+        detections = detector.detect_batch(images)
+
+        self.assertEqual(session.runs, [(3, 3, 64, 64)])
+        self.assertEqual([len(faces) for faces in detections], [0, 1, 0])
+        face = detections[1][0]
+        # The 32 px image was upscaled 2x into the 64 px input: centre (8, 8) -> (4, 4), 1 stride -> 4 px.
+        self.assertEqual(face.bbox, {"x": 0, "y": 0, "width": 8, "height": 8})
+        self.assertTrue(np.allclose(face.landmarks_5pt, 4.0))
+        self.assertAlmostEqual(face.score, 0.9, places=5)
+
+    def test_models_with_a_fixed_batch_of_one_fall_back_to_single_calls(self):
+        session = FakeSession({})
+        session.get_inputs = lambda: [SimpleNamespace(shape=[1, 3, 64, 64])]
+        detector = make_detector(session)
+
+        self.assertEqual(detector.detect_batch([np.zeros((64, 64, 3), np.uint8)] * 2), [[], []])
+        self.assertEqual(session.runs, [])
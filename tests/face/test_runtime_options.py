@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.face.runtime_options import OnnxRuntimeOptions
+
+
+class FakeSessionOptions:
+    def __init__(self):
+        self.optimized_model_filepath = ""
+
+
+class FakeInferenceSession:
+    def __init__(self, path, sess_options=None, providers=None):
+        self.path = path
+        self.sess_options = sess_options
+        self.providers = providers
+
+
+FAKE_ORT = SimpleNamespace(
+    SessionOptions=FakeSessionOptions,
+    InferenceSession=FakeInferenceSession,
+    GraphOptimizationLevel=SimpleNamespace(
+        ORT_DISABLE_ALL="disable", ORT_ENABLE_BASIC="basic", ORT_ENABLE_EXTENDED="extended", ORT_ENABLE_ALL="all"
+    ),
+    ExecutionMode=SimpleNamespace(ORT_SEQUENTIAL="sequential", ORT_PARALLEL="parallel"),
+)
+
+
+def make_settings(**overrides):
+    values = {
+        "ONNX_PROVIDERS": "CUDAExecutionProvider, CPUExecutionProvider",
+        "ONNX_INTRA_OP_THREADS": 4,
+        "ONNX_INTER_OP_THREADS": 1,
+        "ONNX_EXECUTION_MODE": "Parallel",
+        "ONNX_GRAPH_OPTIMIZATION_LEVEL": "extended",
+        "ONNX_OPTIMIZED_MODEL_DIR": "",
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+class OnnxRuntimeOptionsTests(unittest.TestCase):
+    def test_from_settings_parses_provider_list_and_modes(self):
+        options = OnnxRuntimeOptions.from_settings(make_settings())
+
+        self.assertEqual(options.providers, ("CUDAExecutionProvider", "CPUExecutionProvider"))
+        self.assertEqual(options.intra_op_threads, 4)
+        self.assertEqual(options.execution_mode, "parallel")
+        self.assertEqual(hash(options), hash(OnnxRuntimeOptions.from_settings(make_settings())))
+
+    def test_rejects_unknown_graph_optimization_level(self):
+        with self.assertRaises(ValueError):
+            OnnxRuntimeOptions.from_settings(make_settings(ONNX_GRAPH_OPTIMIZATION_LEVEL="max"))
+
+    def test_create_session_writes_then_reuses_optimized_model_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "buffalo_l", "det_10g.onnx")
+            os.makedirs(os.path.dirname(source))
+            open(source, "wb").close()
+            options = OnnxRuntimeOptions(intra_op_threads=2, optimized_model_dir=os.path.join(tmp, "cache"))
+
+            with patch.dict("sys.modules", {"onnxruntime": FAKE_ORT}):
+                first = options.create_session(source)
+                open(first.sess_options.optimized_model_filepath, "wb").close()
+                second = options.create_session(source)
+
+        self.assertEqual(first.path, source)
+        self.assertEqual(first.sess_options.graph_optimization_level, "all")
+        self.assertEqual(first.sess_options.intra_op_num_threads, 2)
+        self.assertTrue(second.path.endswith(os.path.join("cache", "buffalo_l", "det_10g.all.onnx")))
+        self.assertEqual(second.sess_options.graph_optimization_level, "disable")
@@ -0,0 +1,97 @@
+import unittest
+
+import numpy as np
+
+from app.face.detectors.base import DetectedFace, FaceDetector
+from app.face.detectors.tiling import TileLayout, detect_tiled, merge_detections, parse_tile_layout
+
+
+def face(x, y, size, score=0.9):
+    landmarks = np.array([[x + 0.3 * size, y + 0.4 * size]] * 5, dtype=np.float32)
+    return DetectedFace(bbox={"x": x, "y": y, "width": size, "height": size}, landmarks_5pt=landmarks, score=score)
+
+
+class SquareDetector(FaceDetector):
+    """
+    Finds the filled squares ("faces") of a test scene by their grey level,
+    like a network with a fixed input_width: a square is missed when it is
+    smaller than min_size pixels at that input resolution.
+    """
+
+    def __init__(self, levels, input_width=640, min_size=16):
+        self.levels = levels
+        self.input_width = input_width
+        self.min_size = min_size
+        self.calls = 0
+
+    def detect(self, image):
+        self.calls += 1
+        scale = self.input_width / image.shape[1]
+        found = []
+        for level in self.levels:
+            ys, xs = np.nonzero(image[:, :, 0] == level)
+            if len(xs) and (xs.max() - xs.min() + 1) * scale >= self.min_size:
+                x, y = int(xs.min()), int(ys.min())
+                found.append(face(x, y, int(max(xs.max() - x, ys.max() - y)) + 1, score=0.9))
+        return found
+
+
+# Grey levels no blend of another level with the black background can produce when downscaled.
+LEVELS = (250, 170, 110)
+
+
+def scene(width, height, squares):
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    for level, (x, y, size) in zip(LEVELS, squares):
+        frame[y:y + size, x:x + size] = level
+    return frame, LEVELS[:len(squares)]
+
+
+class TileLayoutTests(unittest.TestCase):
+    def test_tiles_cover_the_frame_with_overlap(self):
+        tiles = TileLayout(columns=3, rows=2, overlap=0.25).tiles(1200, 600)
+
+        self.assertEqual(len(tiles), 6)
+        self.assertEqual(tiles[0], (0, 0, 500, 375))
+        self.assertEqual(tiles[1], (300, 0, 900, 375))
+        self.assertEqual(tiles[5], (700, 225, 1200, 600))
+
+    def test_parse_tile_layout(self):
+        self.assertEqual(parse_tile_layout("3x2", overlap=0.1), TileLayout(columns=3, rows=2, overlap=0.1))
+        self.assertIsNone(parse_tile_layout(""))
+        self.assertIsNone(parse_tile_layout("1x1"))
+        with self.assertRaises(ValueError):
+            parse_tile_layout("three")
+        with self.assertRaises(ValueError):
+            parse_tile_layout("0x2")
+
+    def test_merge_prefers_whole_faces_over_cut_ones(self):
+        cut_face = face(100, 100, 20, score=0.95)
+        whole = face(100, 100, 40, score=0.8)
+        elsewhere = face(300, 100, 40, score=0.7)
+
+        merged = merge_detections([cut_face, whole, elsewhere], cut=[True, False, False])
+
+        self.assertEqual(merged, [whole, elsewhere])
+
+
+class DetectTiledTests(unittest.TestCase):
+    def test_small_faces_are_found_in_tiles_and_duplicates_merged(self):
+        squares = [
+            (1600, 900, 24),  # too small for a single pass over the whole frame
+            (700, 300, 400),  # larger than the overlap: only whole in the full-frame pass
+            (620, 100, 60),   # in the overlap of the first two tiles
+        ]
+        frame, levels = scene(1920, 1080, squares)
+        detector = SquareDetector(levels)
+
+        single_pass = detector.detect(frame)
+        detector.calls = 0
+        detected = detect_tiled(detector, frame, TileLayout(columns=3, rows=2), max_side=640)
+
+        self.assertEqual(len(single_pass), 2)
+        self.assertEqual(detector.calls, 7)
+        boxes = sorted((f.bbox["x"], f.bbox["y"], f.bbox["width"]) for f in detected)
+        self.assertEqual(len(boxes), 3)
+        for box, expected in zip(boxes, sorted(squares)):
+            self.assertTrue(np.allclose(box, expected, atol=4), (box, expected))
@@ -0,0 +1,89 @@
+import unittest
+import uuid
+
+import numpy as np
+
+from app.face.detectors.base import DetectedFace
+from app.face.pipeline import FaceRecognitionPipeline
+from app.face.preprocessing.alignment import ARCFACE_DST
+from app.face.tracking import FaceTracker, Track
+from tests.face.test_pipeline import FakeDetector, make_embedder
+
+
+def face(x, y, size=40):
+    return DetectedFace(
+        bbox={"x": x, "y": y, "width": size, "height": size},
+        landmarks_5pt=ARCFACE_DST.copy(),
+        score=0.9,
+    )
+
+
+class FaceTrackerTests(unittest.TestCase):
+    def test_tracks_follow_faces_and_new_faces_get_new_ids(self):
+        tracker = FaceTracker()
+
+        first = tracker.update([face(0, 0), face(200, 0)])
+        second = tracker.update([face(205, 2), face(3, 1), face(400, 0)])
+
+        self.assertEqual([t.track_id for t in first], [1, 2])
+        self.assertEqual([t.track_id for t in second], [2, 1, 3])
+
+    def test_constant_velocity_prediction_follows_a_fast_face(self):
+        tracker = FaceTracker(max_centre_distance=0.0)  # IoU with the predicted box only
+        # Accelerating: the last step (70 -> 100) only overlaps the previous box by IoU 0.14.
+        ids = [tracker.update([face(x, 0)])[0].track_id for x in (0, 10, 25, 45, 70, 100)]
+
+        self.assertEqual(ids, [1] * 6)
+
+    def test_lost_tracks_are_dropped_after_max_missed(self):
+        tracker = FaceTracker(max_missed=2)
+        tracker.update([face(0, 0)])
+        for _ in range(3):
+            tracker.update([])
+
+        self.assertEqual(tracker.tracks, [])
+        self.assertEqual(tracker.update([face(0, 0)])[0].track_id, 2)
+
+    def test_reembedding_on_interval_or_large_box_change(self):
+        tracker = FaceTracker(reembed_interval=3, reembed_iou=0.5)
+        track = tracker.update([face(0, 0)])[0]
+        self.assertTrue(tracker.needs_embedding(track))
+        tracker.embedded(track, np.ones(512, dtype=np.float32))
+
+        tracker.update([face(2, 0)])
+        self.assertFalse(tracker.needs_embedding(track))
+        tracker.update([face(25, 0)])  # moved more than half its width since it was embedded
+        self.assertTrue(tracker.needs_embedding(track))
+
+        tracker.embedded(track, np.ones(512, dtype=np.float32))
+        for _ in range(3):
+            tracker.update([face(25, 0)])
+        self.assertTrue(tracker.needs_embedding(track))
+
+    def test_identity_sticks_to_a_track_while_it_matches_nobody(self):
+        track = Track(track_id=1, box=np.zeros(4, dtype=np.float32))
+        user_id, other = uuid.uuid4(), uuid.uuid4()
+
+        self.assertEqual(track.identify(user_id, 0.8), (user_id, 0.8))
+        self.assertEqual(track.identify(None, 0.0), (user_id, 0.8))
+        self.assertEqual(track.identify(other, 0.7), (other, 0.7))
+
+
+class TrackedPipelineTests(unittest.TestCase):
+    def test_tracked_faces_reuse_their_embeddings(self):
+        embedder, rec = make_embedder()
+        pipeline = FaceRecognitionPipeline(detector=FakeDetector(count=2), embedder=embedder)
+        tracker = FaceTracker(reembed_interval=3)
+        frame = np.zeros((64, 64, 3), dtype=np.uint8)
+
+        results = [pipeline.embed_frame(frame, tracker=tracker) for _ in range(4)]
+
+        self.assertEqual([len(batch) for batch in rec.batches], [2, 2])  # frames 1 and 4
+        self.assertEqual([t.track_id for t in results[-1].tracks], [1, 2])
+        self.assertTrue(np.allclose(results[1].embeddings, results[0].embeddings))
+        self.assertEqual((tracker.embeddings_computed, tracker.embeddings_reused), (4, 4))
+        self.assertIsNone(pipeline.embed_frame(frame).tracks)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import uuid
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+import numpy as np
+
+from app.api import deps
+from app.api.deps import build_runtime
+
+
+class FakeSharedService:
+    def scoped(self, user_ids):
+        return sorted(user_ids)
+
+
+class RecordingFaceService:
+    def __init__(self):
+        self.loads = []
+
+    def load_gallery(self, user_ids, matrix):
+        self.loads.append(dict(zip(user_ids, matrix)))
+
+
+class ClassRuntimeTests(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE users (id CHAR(32) PRIMARY KEY, first_name TEXT, last_name TEXT, "
+                "photo_encoding BLOB, active BOOLEAN, email TEXT, role TEXT, photo_path TEXT, "
+                "student_number TEXT, major TEXT, employee_number TEXT, department TEXT, title TEXT)"
+            ))
+            conn.execute(text(
+                "CREATE TABLE class_users (id CHAR(32), class_id CHAR(32), first_name TEXT, "
+                "last_name TEXT, photo_encoding BLOB)"
+            ))
+        self.db = Session(engine)
+        self.class_id = uuid.uuid4()
+
+    def tearDown(self):
+        self.db.close()
+
+    def enroll(self, first_name, active, encoding=b"\0" * 2048):
+        user_id = uuid.uuid4()
+        self.db.execute(
+            text(
+                "INSERT INTO users (id, first_name, last_name, photo_encoding, active) "
+                "VALUES (:id, :name, 'Doe', :encoding, :active)"
+            ),
+            {"id": user_id.hex, "name": first_name, "encoding": encoding, "active": active},
+        )
+        self.db.execute(
+            text("INSERT INTO class_users VALUES (:id, :class_id, :name, 'Doe', :encoding)"),
+            {"id": user_id.hex, "class_id": self.class_id.hex, "name": first_name, "encoding": encoding},
+        )
+        return user_id
+
+    def test_class_runtime_scopes_and_names_active_members_only(self):
+        active = self.enroll("Ada", active=True)
+        self.enroll("Ina", active=False)
+        self.enroll("Nora", active=True, encoding=None)
+
+        with patch("app.api.deps._shared_face_service", return_value=FakeSharedService()):
+            runtime = build_runtime(self.db, class_id=self.class_id)
+
+        self.assertEqual(runtime.face_service, [active])
+        self.assertEqual(runtime.user_names, {active: "Ada Doe"})
+
+
+    def test_gallery_reloads_when_an_encoding_changes_but_the_roster_size_does_not(self):
+        ada = self.enroll("Ada", active=True, encoding=np.ones(512, np.float32).tobytes())
+        self.enroll("Bo", active=True)
+        service = RecordingFaceService()
+
+        with patch.object(deps, "face_service", service), patch.object(deps, "_gallery_fingerprint", None), \
+                patch.object(deps.settings, "GALLERY_SNAPSHOT_DIR", ""):
+            deps._shared_face_service(self.db)
+            deps._shared_face_service(self.db)
+            self.assertEqual(len(service.loads), 1)
+
+            # Re-enrolled by another worker: same number of encodings, new values.
+            self.db.execute(
+                text("UPDATE users SET photo_encoding = :encoding WHERE id = :id"),
+                {"id": ada.hex, "encoding": np.full(512, 2, np.float32).tobytes()},
+            )
+            deps._shared_face_service(self.db)
+
+        self.assertEqual(len(service.loads), 2)
+        self.assertEqual(service.loads[1][ada][0], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
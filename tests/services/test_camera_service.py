@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from app.services.camera_service import CameraService
+from app.services.frame_slot import LatestFrameSlot
+
+
+class FakeCapture:
+    """Stands in for cv2.VideoCapture: a blocking read() that yields numbered frames."""
+
+    def __init__(self, frames=5, read_delay=0.01):
+        self.frames = frames
+        self.read_delay = read_delay
+        self.reads = 0
+        self.released = False
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return True
+
+    def read(self):
+        if self.reads >= self.frames:
+            return False, None
+        time.sleep(self.read_delay)
+        self.reads += 1
+        return True, np.full((2, 2, 3), self.reads, dtype=np.uint8)
+
+    def release(self):
+        self.released = True
+
+
+class LatestFrameSlotTests(unittest.IsolatedAsyncioTestCase):
+    async def test_get_returns_newest_frame_and_counts_dropped_ones(self):
+        slot = LatestFrameSlot()
+        for value in range(3):
+            slot.put(np.full(1, value))
+
+        seq, frame = await slot.get()
+
+        self.assertEqual(seq, 3)
+        self.assertEqual(frame[0], 2)
+        self.assertEqual(slot.dropped, 2)
+
+    async def test_waiter_is_woken_from_another_thread_and_by_close(self):
+        slot = LatestFrameSlot()
+        threading.Timer(0.01, slot.put, args=(np.ones(1),)).start()
+        seq, frame = await asyncio.wait_for(slot.get(), timeout=1)
+        self.assertEqual(seq, 1)
+
+        threading.Timer(0.01, slot.close).start()
+        seq, frame = await asyncio.wait_for(slot.get(after=seq), timeout=1)
+        self.assertIsNone(frame)
+
+
+class CameraServiceTests(unittest.IsolatedAsyncioTestCase):
+    async def test_threaded_capture_yields_fresh_frames_until_the_source_ends(self):
+        capture = FakeCapture(frames=20, read_delay=0.005)
+        with patch("app.services.camera_service.cv2.VideoCapture", return_value=capture):
+            camera = CameraService(threaded=True)
+            camera.frame_interval = 0.03
+            self.assertTrue(camera.start())
+            values = [int(frame[0, 0, 0]) async for frame in camera.get_frames()]
+            camera.stop()
+
+        self.assertEqual(values, sorted(set(values)))
+        self.assertLess(len(values), 20)
+        self.assertGreater(camera.dropped_frames, 0)
+        self.assertTrue(capture.released)
+
+    async def test_stop_leaves_release_to_a_capture_thread_stuck_in_read(self):
+        capture = FakeCapture(frames=2, read_delay=0.3)
+        with patch("app.services.camera_service.cv2.VideoCapture", return_value=capture):
+            camera = CameraService(threaded=True)
+            camera.start()
+            thread = camera._capture_thread
+            with patch("app.services.camera_service.CAPTURE_JOIN_TIMEOUT_SECONDS", 0.01):
+                camera.stop()
+
+            self.assertFalse(capture.released)  # read() still in flight
+            thread.join(timeout=1)
+        self.assertTrue(capture.released)
+        self.assertEqual(capture.reads, 1)
+
+    async def test_event_loop_keeps_running_while_capture_blocks(self):
+        capture = FakeCapture(frames=2, read_delay=0.2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        with patch("app.services.camera_service.cv2.VideoCapture", return_value=capture):
+            camera = CameraService(threaded=True)
+            camera.frame_interval = 0
+            camera.start()
+            task = asyncio.create_task(ticker())
+            frames = [frame async for frame in camera.get_frames()]
+            task.cancel()
+            camera.stop()
+
+        self.assertEqual(len(frames), 2)
+        self.assertGreater(ticks, 20)
+
+    async def test_pacing_accounts_for_consumer_time_and_skips_overrun_ticks(self):
+        capture = FakeCapture(frames=6, read_delay=0)
+        with patch("app.services.camera_service.cv2.VideoCapture", return_value=capture):
+            camera = CameraService(threaded=False)
+            camera.start()
+            start = time.monotonic()
+            arrivals = []
+            async for _ in camera.get_frames(fps=50):
+                arrivals.append(time.monotonic() - start)
+                if len(arrivals) == 2:
+                    time.sleep(0.07)  # overrun three and a half 20 ms slots
+            camera.stop()
+
+        self.assertEqual(camera.late_ticks, 2)
+        gaps = np.diff(arrivals)
+        self.assertGreater(gaps[2:].min(), 0.015)  # no burst to make up the lost ticks
+        self.assertLess(arrivals[-1], 0.25)
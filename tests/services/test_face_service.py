@@ -1,19 +1,32 @@
+import threading
 import unittest
 import uuid
 from unittest.mock import patch
 
 import numpy as np
 
+from app.face.detectors.base import DetectedFace
+from app.face.pipeline import FrameFaces
 from app.services.face_service import FaceService
 
 
 class FakePipeline:
-    def __init__(self, frame_results=None, embedding=None):
+    def __init__(self, frame_results=None, embedding=None, rejected=None):
         self.frame_results = list(frame_results or [])
         self.embedding = embedding
-
-    def process_frame(self, frame):
-        return list(self.frame_results)
+        self.rejected = rejected
+
+    def embed_frame(self, frame, tracker=None, tiling=None):
+        detections = [
+            DetectedFace(bbox=result["bbox"], landmarks_5pt=np.zeros((5, 2), dtype=np.float32), score=1.0)
+            for result in self.frame_results
+        ]
+        embeddings = (
+            np.stack([result["embedding"] for result in self.frame_results])
+            if self.frame_results
+            else np.empty((0, 2), dtype=np.float32)
+        )
+        return FrameFaces(detections=detections, embeddings=embeddings, rejected=self.rejected)
 
     def extract_embedding(self, image):
         return self.embedding
@@ -42,6 +55,21 @@ class FaceServiceTests(unittest.TestCase):
         self.assertEqual(results[0]["confidence"], 0.9)
         self.assertEqual(results[0]["bbox"]["width"], 3)
 
+    def test_faces_rejected_by_the_quality_gate_stay_unknown(self):
+        user_id = uuid.uuid4()
+        encoding = np.array([1.0, 0.0], dtype=np.float32)
+        pipeline = FakePipeline(
+            frame_results=[{"embedding": encoding, "bbox": {"x": 1, "y": 2, "width": 3, "height": 4}}],
+            rejected=["blur"],
+        )
+
+        with patch("app.services.face_service.create_pipeline", return_value=pipeline):
+            service = FaceService({user_id: encoding})
+            results = service.process_frame(np.zeros((4, 4, 3), dtype=np.uint8))
+
+        self.assertIsNone(results[0]["user_id"])
+        self.assertEqual(results[0]["quality"], "blur")
+
     def test_process_frame_returns_unknown_when_below_threshold(self):
         user_id = uuid.uuid4()
         pipeline = FakePipeline(
@@ -61,20 +89,130 @@ class FaceServiceTests(unittest.TestCase):
         self.assertIsNone(results[0]["user_id"])
         self.assertEqual(results[0]["confidence"], 0.0)
 
-    def test_add_and_remove_encoding_rebuild_the_known_matrix(self):
+    def test_one_to_one_matching_gives_each_user_to_a_single_face(self):
+        alice, bob = uuid.uuid4(), uuid.uuid4()
+        bbox = {"x": 0, "y": 0, "width": 1, "height": 1}
+        pipeline = FakePipeline(
+            frame_results=[
+                {"embedding": np.array([0.8, 0.6], dtype=np.float32), "bbox": bbox},
+                {"embedding": np.array([1.0, 0.0], dtype=np.float32), "bbox": bbox},
+            ]
+        )
+        known = {
+            alice: np.array([1.0, 0.0], dtype=np.float32),
+            bob: np.array([0.0, 1.0], dtype=np.float32),
+        }
+
+        with patch("app.services.face_service.create_pipeline", return_value=pipeline):
+            service = FaceService(known)
+            service.threshold = 0.5
+            independent = service.process_frame(np.zeros((4, 4, 3), dtype=np.uint8))
+            service.one_to_one = True
+            assigned = service.process_frame(np.zeros((4, 4, 3), dtype=np.uint8), top_k=2)
+
+        self.assertEqual([r["user_id"] for r in independent], [alice, alice])
+        self.assertEqual([r["user_id"] for r in assigned], [bob, alice])
+        self.assertEqual(assigned[0]["confidence"], 0.6)
+        self.assertEqual([c[0] for c in assigned[0]["candidates"]], [alice, bob])
+        self.assertNotIn("candidates", independent[0])
+
+    def test_add_and_remove_encoding_update_the_gallery(self):
         first_user = uuid.uuid4()
         second_user = uuid.uuid4()
+        pipeline = FakePipeline(
+            frame_results=[
+                {"embedding": np.array([1.0, 0.0], dtype=np.float32), "bbox": {"x": 0, "y": 0, "width": 1, "height": 1}}
+            ]
+        )
 
-        with patch("app.services.face_service.create_pipeline", return_value=FakePipeline()):
+        with patch("app.services.face_service.create_pipeline", return_value=pipeline):
             service = FaceService({first_user: np.array([1.0, 0.0], dtype=np.float32)})
             service.add_encoding(second_user, np.array([0.0, 1.0], dtype=np.float32))
             self.assertEqual(set(service.known_encodings), {first_user, second_user})
-            self.assertEqual(service._known_matrix.shape, (2, 2))
+            self.assertEqual(service._gallery.matrix.shape, (2, 2))
+            self.assertEqual(service.size, 2)
 
             service.remove_encoding(first_user)
+            results = service.process_frame(np.zeros((4, 4, 3), dtype=np.uint8))
 
         self.assertEqual(set(service.known_encodings), {second_user})
-        self.assertEqual(service._known_matrix.shape, (1, 2))
+        self.assertEqual(service.size, 1)
+        self.assertEqual(service._gallery.tombstones, 1)
+        self.assertIsNone(results[0]["user_id"])
+
+    def test_load_gallery_serves_a_read_only_matrix_and_still_accepts_enrollments(self):
+        first_user, second_user = uuid.uuid4(), uuid.uuid4()
+        matrix = np.array([[1.0, 0.0]], dtype=np.float32)
+        matrix.flags.writeable = False
+        pipeline = FakePipeline(
+            frame_results=[
+                {"embedding": np.array([0.0, 1.0], dtype=np.float32), "bbox": {"x": 0, "y": 0, "width": 1, "height": 1}}
+            ]
+        )
+
+        with patch("app.services.face_service.create_pipeline", return_value=pipeline):
+            service = FaceService()
+            service.load_gallery([first_user], matrix)
+            self.assertTrue(np.shares_memory(service._gallery.matrix, matrix))
+            service.add_encoding(second_user, np.array([0.0, 1.0], dtype=np.float32))
+            results = service.process_frame(np.zeros((4, 4, 3), dtype=np.uint8))
+
+        self.assertEqual(results[0]["user_id"], second_user)
+        self.assertEqual(matrix.tolist(), [[1.0, 0.0]])
+
+    def test_scoped_service_only_matches_members_and_sees_new_enrollments(self):
+        member, outsider, late_member = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        pipeline = FakePipeline(
+            frame_results=[
+                {"embedding": np.array([1.0, 0.0], dtype=np.float32), "bbox": {"x": 0, "y": 0, "width": 1, "height": 1}}
+            ]
+        )
+
+        with patch("app.services.face_service.create_pipeline", return_value=pipeline):
+            service = FaceService({
+                outsider: np.array([1.0, 0.0], dtype=np.float32),
+                member: np.array([0.6, 0.8], dtype=np.float32),
+            })
+            service.threshold = 0.5
+            scoped = service.scoped([member, late_member])
+
+            self.assertEqual(service.process_frame(np.zeros((4, 4, 3)))[0]["user_id"], outsider)
+            self.assertEqual(scoped.process_frame(np.zeros((4, 4, 3)))[0]["user_id"], member)
+
+            service.add_encoding(late_member, np.array([1.0, 0.0], dtype=np.float32))
+            self.assertEqual(scoped.process_frame(np.zeros((4, 4, 3)))[0]["user_id"], late_member)
+            self.assertEqual(set(scoped.known_encodings), {member, late_member})
+
+    def test_enrollment_does_not_wait_for_a_running_search(self):
+        user_id, late_user = uuid.uuid4(), uuid.uuid4()
+        pipeline = FakePipeline(
+            frame_results=[
+                {"embedding": np.array([1.0, 0.0], dtype=np.float32), "bbox": {"x": 0, "y": 0, "width": 1, "height": 1}}
+            ]
+        )
+
+        with patch("app.services.face_service.create_pipeline", return_value=pipeline):
+            service = FaceService({user_id: np.array([1.0, 0.0], dtype=np.float32)})
+            index = service._index
+            enrolled = []
+
+            class EnrollingSnapshot:
+                def search(self, queries, k, mask=None):
+                    # Enroll from another thread mid-search; it would block if the search held the lock.
+                    thread = threading.Thread(
+                        target=lambda: enrolled.append(service.add_encoding(late_user, np.array([0.0, 1.0], np.float32)))
+                    )
+                    thread.start()
+                    thread.join(timeout=5)
+                    return snapshot.search(queries, k, mask=mask)
+
+            snapshot = index.snapshot()
+            with patch.object(index, "snapshot", return_value=EnrollingSnapshot()):
+                results = service.process_frame(np.zeros((4, 4, 3), dtype=np.uint8))
+
+        self.assertEqual(len(enrolled), 1)
+        self.assertEqual(results[0]["user_id"], user_id)
+        self.assertIn(late_user, service.known_encodings)
 
     def test_extract_face_encoding_delegates_to_pipeline(self):
         expected = np.array([0.5, 0.5], dtype=np.float32)
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from app.services.inference_executor import InferenceExecutor
+
+INFERENCE_SECONDS = 0.05
+
+
+class SlowFaceService:
+    """Blocks like ONNX inference does (time.sleep holds the calling thread)."""
+
+    def process_frame(self, frame):
+        time.sleep(INFERENCE_SECONDS)
+        return [{"user_id": None, "confidence": 0.0, "bbox": {}}]
+
+
+class RecordingFaceService(SlowFaceService):
+    """Records the threads inference ran on and how many calls overlapped."""
+
+    def __init__(self):
+        self.threads = set()
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def process_frame(self, frame):
+        with self._lock:
+            self.threads.add(threading.get_ident())
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            return super().process_frame(frame)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+async def run_streams(process, streams: int, frames: int):
+    async def stream():
+        for _ in range(frames):
+            await process(np.zeros((4, 4, 3), dtype=np.uint8))
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(stream() for _ in range(streams)))
+
+
+class InferenceExecutorTests(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_streams_never_run_inference_on_the_event_loop(self):
+        service = RecordingFaceService()
+        executor = InferenceExecutor(max_workers=2, max_pending=4)
+        max_pending = 0
+
+        async def offloaded(frame):
+            nonlocal max_pending
+            call = asyncio.ensure_future(executor.process_frame(service, frame))
+            await asyncio.sleep(0)  # let the call submit before sampling
+            max_pending = max(max_pending, executor.pending)
+            await call
+
+        try:
+            await run_streams(offloaded, streams=6, frames=3)
+        finally:
+            executor.shutdown()
+
+        self.assertNotIn(threading.get_ident(), service.threads)
+        self.assertLessEqual(service.max_running, 2)
+        self.assertLessEqual(max_pending, 4)
+        self.assertGreater(executor.dropped, 0)  # the bound was reached
+        self.assertEqual(executor.completed + executor.dropped, 18)
+        self.assertEqual(executor.pending, 0)
+
+    async def test_frames_beyond_max_pending_are_dropped(self):
+        executor = InferenceExecutor(max_workers=1, max_pending=2)
+        frame = np.zeros((4, 4, 3), dtype=np.uint8)
+        try:
+            results = await asyncio.gather(*(executor.process_frame(SlowFaceService(), frame) for _ in range(5)))
+        finally:
+            executor.shutdown()
+
+        self.assertEqual(sum(result is None for result in results), 3)
+        self.assertEqual((executor.dropped, executor.completed, executor.pending), (3, 2, 0))
+
+    def test_unknown_kind_is_rejected(self):
+        with self.assertRaises(ValueError):
+            InferenceExecutor(kind="gpu")
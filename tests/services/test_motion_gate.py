@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+
+from app.services.motion_gate import MotionGate
+from tests.services.test_stream_scheduler import FakeClock
+
+
+def classroom(seed=0):
+    rng = np.random.default_rng(seed)
+    frame = np.full((480, 640, 3), 90, dtype=np.uint8)
+    return np.clip(frame + rng.normal(0, 4, frame.shape), 0, 255).astype(np.uint8)
+
+
+class MotionGateTests(unittest.TestCase):
+    def test_static_scene_is_skipped_until_the_forced_refresh(self):
+        clock = FakeClock()
+        gate = MotionGate(refresh_seconds=5.0, clock=clock)
+
+        self.assertTrue(gate.should_recognise(classroom(0)))
+        for seed in range(1, 5):  # sensor noise only
+            clock.now += 1.0
+            self.assertFalse(gate.should_recognise(classroom(seed)))
+        clock.now += 1.0
+        self.assertTrue(gate.should_recognise(classroom(5)))
+
+        self.assertEqual((gate.passed, gate.saved, gate.forced), (2, 4, 1))
+
+    def test_motion_in_one_region_triggers_recognition(self):
+        gate = MotionGate(refresh_seconds=0, clock=FakeClock())
+        gate.should_recognise(classroom())
+
+        moved = classroom()
+        moved[300:340, 500:530] = 230  # someone standing up in one corner
+
+        self.assertTrue(gate.should_recognise(moved))
+        self.assertFalse(gate.should_recognise(moved))
+        self.assertEqual(gate.forced, 0)
+
+    def test_changed_resolution_resets_the_reference(self):
+        gate = MotionGate(clock=FakeClock())
+        gate.should_recognise(classroom())
+
+        self.assertTrue(gate.should_recognise(np.full((720, 1280, 3), 90, dtype=np.uint8)))
+
+
+if __name__ == "__main__":
+    unittest.main()
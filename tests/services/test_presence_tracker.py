@@ -36,6 +36,18 @@ class PresenceTrackerTests(unittest.TestCase):
         self.assertEqual(tracker.counters[user_id], 0)
         self.assertEqual(tracker.get_status_for_display(user_id), "absent")
 
+    def test_entry_frames_must_come_from_one_track(self):
+        user_id = uuid.uuid4()
+        tracker = PresenceTracker(entry_threshold=2)
+
+        tracker.update([{"user_id": user_id, "confidence": 0.7, "track_id": 1}])
+        switched = tracker.update([{"user_id": user_id, "confidence": 0.7, "track_id": 2}])
+        confirmed = tracker.update([{"user_id": user_id, "confidence": 0.9, "track_id": 2}])
+
+        self.assertEqual(switched, [])
+        self.assertEqual(len(confirmed), 1)
+        self.assertEqual(confirmed[0].track_id, 2)
+
     def test_reset_clears_all_tracking_state(self):
         user_id = uuid.uuid4()
         tracker = PresenceTracker(entry_threshold=1)
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+from app.services.camera_service import CameraService
+from app.services.replay_capture import (
+    ImageDirectoryCapture,
+    ReplayCapture,
+    SyntheticCapture,
+    check_replay_pacing,
+    is_replay_source,
+    open_replay_capture,
+)
+
+
+def read_all(capture, limit=100):
+    frames = []
+    while len(frames) < limit:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(frame)
+    return frames
+
+
+class ReplaySourceTests(unittest.TestCase):
+    def test_synthetic_source_size_and_length(self):
+        capture = open_replay_capture("synthetic://64x48?frames=3", pacing="fast")
+
+        frames = read_all(capture)
+
+        self.assertEqual(len(frames), 3)
+        self.assertEqual(frames[0].shape, (48, 64, 3))
+        self.assertFalse(np.array_equal(frames[0], frames[1]))
+
+    def test_image_directory_replays_in_name_order_and_loops(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for value in (30, 10, 20):
+                cv2.imwrite(os.path.join(directory, f"{value:03d}.png"), np.full((4, 4, 3), value, np.uint8))
+            with open(os.path.join(directory, "notes.txt"), "w") as f:
+                f.write("not an image")
+
+            self.assertTrue(is_replay_source(directory))
+            frames = read_all(ImageDirectoryCapture(directory))
+            looped = read_all(ReplayCapture(ImageDirectoryCapture(directory), fps=0, loop=True), limit=5)
+
+        self.assertEqual([int(frame[0, 0, 0]) for frame in frames], [10, 20, 30])
+        self.assertEqual([int(frame[0, 0, 0]) for frame in looped], [10, 20, 30, 10, 20])
+
+    def test_realtime_pacing_follows_the_source_rate_and_fast_does_not(self):
+        realtime = ReplayCapture(SyntheticCapture(8, 8, frames=6), fps=50, pacing="realtime")
+        fast = ReplayCapture(SyntheticCapture(8, 8, frames=6), fps=50, pacing="fast")
+
+        start = time.monotonic()
+        read_all(realtime)
+        realtime_seconds = time.monotonic() - start
+        start = time.monotonic()
+        read_all(fast)
+        fast_seconds = time.monotonic() - start
+
+        self.assertGreaterEqual(realtime_seconds, 0.09)  # 5 intervals of 20 ms
+        self.assertLess(fast_seconds, 0.05)
+
+    def test_local_paths_must_be_videos_or_image_directories(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaisesRegex(ValueError, "no JPEG/PNG images"):
+                is_replay_source(directory)
+            notes = os.path.join(directory, "notes.txt")
+            clip = os.path.join(directory, "lecture.MP4")
+            for path in (notes, clip):
+                open(path, "w").close()
+
+            with self.assertRaisesRegex(ValueError, "Valid options are a video file"):
+                is_replay_source(notes)
+            self.assertTrue(is_replay_source(clip))
+            with patch("app.services.camera_service.cv2.VideoCapture") as open_device:
+                self.assertFalse(CameraService(camera_id=notes).start())
+            open_device.assert_not_called()
+
+    def test_devices_and_stream_urls_are_not_replay_sources(self):
+        self.assertFalse(is_replay_source(0))
+        self.assertFalse(is_replay_source("rtsp://cam.local/stream"))
+        with self.assertRaises(ValueError):
+            check_replay_pacing("slow")
+
+
+class CameraServiceReplayTests(unittest.IsolatedAsyncioTestCase):
+    async def test_camera_service_streams_a_synthetic_source(self):
+        with patch("app.services.camera_service.settings.CAMERA_REPLAY_PACING", "fast"):
+            camera = CameraService(camera_id="synthetic://32x24?frames=5", threaded=False)
+            self.assertTrue(camera.start())
+        frames = [frame async for frame in camera.get_frames(fps=1000)]
+        camera.stop()
+
+        self.assertEqual(len(frames), 5)
+        self.assertEqual(camera.frames_captured, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,291 @@
+import asyncio
+import threading
+import time
+import unittest
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+from app.services.attendance_service import PresenceTracker
+from app.services.camera_service import CameraService
+from app.services.inference_executor import InferenceExecutor
+from app.services.motion_gate import MotionGate
+from app.services.stream_hub import StreamFrame, StreamHub, StreamPipeline, StreamSubscriber
+from app.services.stream_scheduler import StreamScheduler
+from tests.services.test_camera_service import FakeCapture
+
+
+class StaticCapture(FakeCapture):
+    """A camera watching a scene where nothing moves."""
+
+    def read(self):
+        ret, frame = super().read()
+        return ret, None if frame is None else np.full_like(frame, 90)
+
+
+class NoFaces:
+    def process_frame(self, frame):
+        return []
+
+
+class OneUnknownFace:
+    def process_frame(self, frame):
+        return [{"user_id": None, "confidence": 0.0, "bbox": {"x": 0, "y": 0, "width": 1, "height": 1}}]
+
+
+class OneKnownFace:
+    user_id = uuid.uuid4()
+
+    def process_frame(self, frame):
+        return [{"user_id": self.user_id, "confidence": 0.9, "bbox": {"x": 0, "y": 0, "width": 1, "height": 1}}]
+
+
+def frame_message(seq):
+    return StreamFrame(seq=seq, jpeg=b"jpeg", faces=[], timestamp=datetime.now(timezone.utc))
+
+
+class StreamSubscriberTests(unittest.IsolatedAsyncioTestCase):
+    async def test_slow_viewer_loses_oldest_frames_but_no_control_messages(self):
+        subscriber = StreamSubscriber(max_frames=2)
+        subscriber.publish(frame_message(1))
+        subscriber.publish({"type": "attendance_update"})
+        subscriber.publish(frame_message(2))
+        subscriber.publish(frame_message(3))
+        subscriber.close()
+
+        received = []
+        while (message := await subscriber.get()) is not None:
+            received.append(message.seq if isinstance(message, StreamFrame) else message["type"])
+
+        self.assertEqual(received, ["attendance_update", 2, 3])
+        self.assertEqual(subscriber.dropped_frames, 1)
+
+
+class StreamHubTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.executor = InferenceExecutor(max_workers=1)
+        self.captures = []
+        self.created = 0
+        self.capture_type = FakeCapture
+        device = patch("app.services.camera_service.cv2.VideoCapture", side_effect=self.open_device)
+        device.start()
+        self.addCleanup(device.stop)
+
+    async def asyncTearDown(self):
+        self.executor.shutdown()
+
+    def open_device(self, camera_id):
+        self.captures.append(self.capture_type(frames=1000, read_delay=0.005))
+        return self.captures[-1]
+
+    def create_pipeline(self, motion_gate=None, thumbnail_fps=1.0, face_service=None):
+        self.created += 1
+        runtime = SimpleNamespace(
+            face_service=face_service or NoFaces(),
+            presence_tracker=PresenceTracker(),
+            live_presence_tracker=None,
+            user_names={},
+        )
+        return StreamPipeline(
+            key="room",
+            camera=CameraService(threaded=True),
+            runtime=runtime,
+            executor=self.executor,
+            scheduler=StreamScheduler(preview_fps=50, recognition_fps=10),
+            record_attendance=lambda event: None,
+            motion_gate=motion_gate,
+            thumbnail_fps=thumbnail_fps,
+            thumbnail_width=1,
+        )
+
+    async def next_frame(self, subscriber):
+        while True:
+            message = await asyncio.wait_for(subscriber.get(), timeout=2)
+            if isinstance(message, StreamFrame):
+                return message
+
+    async def test_viewers_share_one_pipeline_until_the_last_one_leaves(self):
+        hub = StreamHub()
+        first = await hub.subscribe("room", self.create_pipeline)
+        second = await hub.subscribe("room", self.create_pipeline)
+
+        frames = [await self.next_frame(first), await self.next_frame(second)]
+
+        self.assertEqual(self.created, 1)
+        self.assertTrue(all(frame.jpeg for frame in frames))
+
+        await hub.unsubscribe("room", first)
+        self.assertIn("room", hub)
+        self.assertFalse(self.captures[0].released)
+
+        await hub.unsubscribe("room", second)
+        self.assertNotIn("room", hub)
+        self.assertTrue(self.captures[0].released)
+
+        third = await hub.subscribe("room", self.create_pipeline)
+        await self.next_frame(third)
+        await hub.unsubscribe("room", third)
+        self.assertEqual(self.created, 2)
+
+    async def test_concurrent_first_viewers_share_one_pipeline_built_off_the_loop(self):
+        hub = StreamHub()
+        build_threads = []
+
+        def create_pipeline():
+            build_threads.append(threading.get_ident())
+            time.sleep(0.05)  # e.g. loading the gallery
+            return self.create_pipeline()
+
+        subscribers = await asyncio.gather(*(hub.subscribe("room", create_pipeline) for _ in range(3)))
+
+        self.assertEqual(self.created, 1)
+        self.assertNotIn(threading.get_ident(), build_threads)
+        self.assertEqual(len({id(subscriber) for subscriber in subscribers}), 3)
+        for subscriber in subscribers:
+            await self.next_frame(subscriber)
+            await hub.unsubscribe("room", subscriber)
+        self.assertNotIn("room", hub)
+
+    async def test_camera_teardown_does_not_hold_up_other_viewers(self):
+        hub = StreamHub()
+        leaving = await hub.subscribe("room-a", self.create_pipeline)
+        staying = await hub.subscribe("room-b", self.create_pipeline)
+        camera = hub._pipelines["room-a"].camera
+        release = threading.Event()
+        stop_camera = camera.stop
+
+        def slow_stop():
+            release.wait(timeout=2)
+            stop_camera()
+
+        camera.stop = slow_stop
+        teardown = asyncio.create_task(hub.unsubscribe("room-a", leaving))
+        await asyncio.sleep(0.05)
+
+        joined = await asyncio.wait_for(hub.subscribe("room-b", self.create_pipeline), timeout=0.5)
+
+        self.assertFalse(teardown.done())
+        self.assertNotIn("room-a", hub)
+        release.set()
+        await teardown
+        await hub.unsubscribe("room-b", joined)
+        await hub.unsubscribe("room-b", staying)
+
+    async def test_finished_pipeline_is_stopped_before_it_is_replaced(self):
+        hub = StreamHub()
+        first = await hub.subscribe("room", self.create_pipeline)
+        finished = hub._pipelines["room"]
+        self.captures[0].frames = self.captures[0].reads  # the source ends
+        while await asyncio.wait_for(first.get(), timeout=2) is not None:
+            pass
+        self.assertTrue(finished.finished)
+
+        second = await hub.subscribe("room", self.create_pipeline)
+
+        self.assertFalse(finished.camera.is_running)  # stopped, not just ended
+        self.assertIsNone(finished._task)
+        self.assertIsNot(hub._pipelines["room"], finished)
+        await hub.unsubscribe("room", first)  # late leave of the finished pipeline
+        self.assertIn("room", hub)
+        await self.next_frame(second)
+        await hub.unsubscribe("room", second)
+        self.assertNotIn("room", hub)
+
+    async def test_viewer_that_stops_reading_does_not_hold_back_others(self):
+        hub = StreamHub()
+        stalled = await hub.subscribe("room", self.create_pipeline, max_frames=1)
+        active = await hub.subscribe("room", self.create_pipeline)
+
+        seqs = [(await self.next_frame(active)).seq for _ in range(8)]
+        await hub.unsubscribe("room", stalled)
+        await hub.unsubscribe("room", active)
+
+        self.assertEqual(seqs, sorted(seqs))
+        self.assertGreater(stalled.dropped_frames, 0)
+
+    async def test_motion_gate_skips_recognition_of_a_static_scene(self):
+        self.capture_type = StaticCapture
+        hub = StreamHub()
+        gate = MotionGate(refresh_seconds=0)
+        viewer = await hub.subscribe("room", lambda: self.create_pipeline(motion_gate=gate))
+
+        for _ in range(30):  # 0.6 s of preview, recognition due every 0.1 s
+            await self.next_frame(viewer)
+        stats = hub.stats()["room"]
+        await hub.unsubscribe("room", viewer)
+
+        self.assertEqual(stats["recognitions"], 1)
+        self.assertGreaterEqual(stats["recognitions_gated"], 3)
+        self.assertEqual(stats["recognitions_gated"], gate.saved)
+
+    async def test_gated_recognitions_of_unchanged_faces_publish_no_new_faces_version(self):
+        self.capture_type = StaticCapture
+        hub = StreamHub()
+        gate = MotionGate(refresh_seconds=0)
+        viewer = await hub.subscribe(
+            "room",
+            lambda: self.create_pipeline(motion_gate=gate, face_service=OneUnknownFace()),
+            image="none",
+        )
+
+        frames = [await self.next_frame(viewer) for _ in range(30)]
+        stats = hub.stats()["room"]
+        await hub.unsubscribe("room", viewer)
+
+        self.assertGreaterEqual(stats["recognitions_gated"], 3)
+        labelled = [frame for frame in frames if frame.faces]
+        self.assertEqual({frame.faces_version for frame in labelled}, {1})
+        self.assertTrue(all(frame.faces[0] is labelled[0].faces[0] for frame in labelled))
+        self.assertEqual(labelled[0].faces[0]["status"], "unknown")
+
+    async def test_gated_recognitions_do_not_count_towards_attendance(self):
+        self.capture_type = StaticCapture
+        hub = StreamHub()
+        gate = MotionGate(refresh_seconds=0)
+        events = []
+
+        def create_pipeline():
+            pipeline = self.create_pipeline(motion_gate=gate, face_service=OneKnownFace())
+            pipeline.runtime.presence_tracker = PresenceTracker(entry_threshold=3)
+            pipeline.record_attendance = events.append
+            return pipeline
+
+        viewer = await hub.subscribe("room", create_pipeline, image="none")
+        for _ in range(30):  # one recognition, then a gated one every 0.1 s
+            await self.next_frame(viewer)
+        stats = hub.stats()["room"]
+        await hub.unsubscribe("room", viewer)
+
+        self.assertEqual(stats["recognitions"], 1)
+        self.assertGreaterEqual(stats["recognitions_gated"], 3)
+        self.assertEqual(events, [])
+
+    async def test_thumbnail_fps_zero_turns_thumbnails_off(self):
+        hub = StreamHub()
+        viewer = await hub.subscribe(
+            "room", lambda: self.create_pipeline(thumbnail_fps=0), image="thumbnail"
+        )
+
+        frames = [await self.next_frame(viewer) for _ in range(5)]
+        await hub.unsubscribe("room", viewer)
+
+        self.assertTrue(all(frame.thumbnail is None for frame in frames))
+
+    async def test_metadata_viewers_get_no_rendered_frames(self):
+        hub = StreamHub()
+        viewer = await hub.subscribe(
+            "room", lambda: self.create_pipeline(thumbnail_fps=10), image="thumbnail"
+        )
+
+        frames = [await self.next_frame(viewer) for _ in range(15)]
+        stats = hub.stats()["room"]
+        await hub.unsubscribe("room", viewer)
+
+        self.assertTrue(all(frame.jpeg is None for frame in frames))
+        self.assertEqual(stats["frames_rendered"], 0)
+        thumbnails = [frame.thumbnail for frame in frames if frame.thumbnail is not None]
+        self.assertTrue(0 < len(thumbnails) < len(frames))
+        self.assertEqual(frames[0].frame_size, (2, 2))
@@ -0,0 +1,74 @@
+import unittest
+
+from app.services.stream_scheduler import StreamScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class StreamSchedulerTests(unittest.TestCase):
+    def test_recognition_runs_at_its_own_rate_below_the_preview_rate(self):
+        clock = FakeClock()
+        scheduler = StreamScheduler(preview_fps=10, recognition_fps=2, clock=clock)
+
+        recognised = []
+        for tick in range(20):  # 2 seconds of preview at 10 FPS
+            if scheduler.recognition_due():
+                scheduler.recognition_started()
+                scheduler.recognition_finished(elapsed=0.02)
+                recognised.append(tick)
+            scheduler.frame_sent()
+            clock.now += 0.1
+
+        self.assertEqual(recognised, [0, 5, 10, 15])
+        stats = scheduler.snapshot()
+        self.assertEqual((stats["preview_fps"], stats["recognition_fps"]), (10.0, 2.0))
+        self.assertEqual(stats["avg_inference_ms"], 20.0)
+
+    def test_slow_inference_skips_recognitions_without_a_catch_up_burst(self):
+        clock = FakeClock()
+        scheduler = StreamScheduler(preview_fps=10, recognition_fps=10, clock=clock)
+
+        self.assertTrue(scheduler.recognition_due())
+        scheduler.recognition_started()
+        for _ in range(4):  # inference takes 0.4 s
+            clock.now += 0.1
+            self.assertFalse(scheduler.recognition_due())
+        scheduler.recognition_finished()
+
+        self.assertTrue(scheduler.recognition_due())
+        scheduler.recognition_started()
+        scheduler.recognition_finished()
+        self.assertFalse(scheduler.recognition_due())
+
+        stats = scheduler.stats
+        self.assertEqual((stats.recognitions, stats.recognitions_skipped), (2, 4))
+        self.assertAlmostEqual(stats.last_inference_seconds, 0.0)
+
+    def test_refused_frames_count_as_dropped(self):
+        scheduler = StreamScheduler(preview_fps=10, recognition_fps=5, clock=FakeClock())
+        scheduler.recognition_started()
+        scheduler.recognition_finished(completed=False)
+
+        self.assertEqual((scheduler.stats.recognitions, scheduler.stats.recognitions_dropped), (0, 1))
+        self.assertFalse(scheduler.recognition_in_flight)
+
+    def test_gated_recognition_waits_for_the_next_deadline(self):
+        clock = FakeClock()
+        scheduler = StreamScheduler(preview_fps=10, recognition_fps=2, clock=clock)
+
+        self.assertTrue(scheduler.recognition_due())
+        scheduler.recognition_gated()
+        self.assertFalse(scheduler.recognition_due())
+        clock.now += 0.5
+        self.assertTrue(scheduler.recognition_due())
+        self.assertEqual((scheduler.stats.recognitions_gated, scheduler.stats.recognitions), (1, 0))
+
+    def test_rates_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            StreamScheduler(preview_fps=0, recognition_fps=5)
@@ -0,0 +1,71 @@
+import base64
+import json
+import unittest
+import uuid
+from datetime import datetime, timezone
+
+from app.utils.stream_protocol import (
+    FRAME_HEADER,
+    check_image_mode,
+    check_protocol,
+    faces_message,
+    json_faces_message,
+    json_frame_message,
+    pack_frame,
+    unpack_frame,
+)
+
+
+class StreamProtocolTests(unittest.TestCase):
+    def setUp(self):
+        self.timestamp = datetime(2026, 1, 5, 9, 30, 0, 250000, tzinfo=timezone.utc)
+        self.user_id = uuid.uuid4()
+        self.faces = [
+            {
+                "user_id": self.user_id,
+                "confidence": 0.87,
+                "bbox": {"x": 1, "y": 2, "width": 30, "height": 40},
+                "name": "Ada Lovelace",
+                "status": "present",
+            },
+            {"user_id": None, "confidence": 0.0, "bbox": {"x": 5, "y": 6, "width": 7, "height": 8}},
+        ]
+
+    def test_binary_frame_round_trips_header_and_jpeg(self):
+        jpeg = b"\xff\xd8jpeg-bytes\xff\xd9"
+        message = pack_frame(jpeg, seq=42, timestamp=self.timestamp)
+
+        self.assertEqual(len(message), FRAME_HEADER.size + len(jpeg))
+        self.assertEqual(unpack_frame(message), (42, self.timestamp, jpeg))
+
+    def test_faces_message_is_compact_and_pairs_by_sequence(self):
+        message = json.loads(faces_message(42, self.faces, self.timestamp))
+
+        self.assertEqual(message["seq"], 42)
+        self.assertEqual(message["faces"][0], [1, 2, 30, 40, str(self.user_id), "Ada Lovelace", 0.87, "present"])
+        self.assertEqual(message["faces"][1][4:], [None, None, 0.0, None])
+
+    def test_json_mode_keeps_the_original_frame_message(self):
+        message = json_frame_message(b"jpeg", self.faces, self.timestamp)
+
+        self.assertEqual(message["type"], "frame")
+        self.assertEqual(base64.b64decode(message["image"]), b"jpeg")
+        self.assertEqual(message["faces"][0]["user_id"], str(self.user_id))
+        self.assertEqual(message["timestamp"], self.timestamp.isoformat())
+
+    def test_metadata_messages_carry_the_source_frame_size(self):
+        compact = json.loads(faces_message(7, self.faces, self.timestamp, frame_size=(1280, 720)))
+        verbose = json_faces_message(self.faces, self.timestamp, (1280, 720))
+
+        self.assertEqual((compact["w"], compact["h"]), (1280, 720))
+        self.assertEqual((verbose["type"], verbose["width"], verbose["height"]), ("faces", 1280, 720))
+        self.assertNotIn("image", verbose)
+        self.assertNotIn("w", json.loads(faces_message(7, self.faces, self.timestamp)))
+
+    def test_unknown_protocol_and_malformed_frames_are_rejected(self):
+        with self.assertRaises(ValueError):
+            check_protocol("msgpack")
+        with self.assertRaises(ValueError):
+            check_image_mode("video")
+        with self.assertRaises(ValueError):
+            unpack_frame(b"\x01\x01")